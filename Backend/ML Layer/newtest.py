@@ -11,6 +11,10 @@ from functools import lru_cache
 
 import numpy as np
 import pandas as pd
+
+# Shared claims dataset lives in the Backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from claims_dataset import ClaimsDataset
 from sklearn.preprocessing import RobustScaler, OneHotEncoder, MinMaxScaler
 from sklearn.decomposition import TruncatedSVD
 from sklearn.ensemble import IsolationForest
@@ -73,7 +77,7 @@ class Config:
             self.suggested_columns = [
                 'Claim_ID', 'Member_ID', 'Provider_ID', 'Provider_country_code', 'Claimed_currency_code',
                 'Payment_currency_code', 'Payee_type', 'Payee_rule_code', 'Gender', 'Age',
-                'Treatment from date', 'Treatment_to_date', 'Claim_invoice_date',
+                'Treatment_from_date', 'Treatment_to_date', 'Claim_invoice_date',
                 'Claim_invoice_gross_total_amount', 'Paid_amount', 'Incident_count',
                 'specialisation_code', 'Provider_type_code', 'Benefit_head_code',
                 'diagnosis_code', 'Procedure_code', 'Benefit_head_descr', 'Diagnostic name', 'Procedure_descr', 'Provider__descr',
@@ -88,19 +92,18 @@ class DataProcessor:
     
     def __init__(self, config: Config):
         self.config = config
-        self.date_cols = ['Treatment from date', 'Treatment_to_date', 'Claim_invoice_date']
+        self.date_cols = ['Treatment_from_date', 'Treatment_to_date', 'Claim_invoice_date']
         
-    def load_and_clean(self, path: str) -> pd.DataFrame:
-        """Load data with robust error handling"""
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"Input file not found: {path}")
+    def load_and_clean(self, dataset: Union[ClaimsDataset, str]) -> pd.DataFrame:
+        """Prepare the already parsed claims dataset (a path is parsed on the fly)"""
+        if isinstance(dataset, str):
+            dataset = ClaimsDataset.from_csv(dataset)
             
-        logger.info(f"Loading data from {path}")
-        df = pd.read_csv(path)
+        logger.info(f"Preparing {len(dataset)} claims from {dataset.source_path}")
         
         # Select available columns
-        available_cols = [c for c in self.config.suggested_columns if c in df.columns]
-        df = df[available_cols].copy()
+        available_cols = [c for c in self.config.suggested_columns if c in dataset.columns]
+        df = dataset.frame(available_cols)
         logger.info(f"Using {len(available_cols)} columns out of {len(self.config.suggested_columns)} suggested")
         
         # Process dates efficiently
@@ -132,7 +135,7 @@ class DataProcessor:
         
         # Apply conversion
         df['original_currency'] = df['Claimed_currency_code']
-        df['conversion_rate'] = df['Claimed_currency_code'].map(conversion_rates).fillna(1.0)
+        df['conversion_rate'] = df['Claimed_currency_code'].map(conversion_rates).astype(float).fillna(1.0)
         df['Paid_amount'] = df['Paid_amount'] * df['conversion_rate']
         
         # Drop intermediate columns
@@ -141,14 +144,10 @@ class DataProcessor:
         return df
     
     def _process_dates(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Process date columns and create temporal features"""
-        for col in self.date_cols:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-        
+        """Create temporal features (date columns arrive parsed from the ClaimsDataset)"""
         # Create temporal features
-        if 'Treatment from date' in df.columns and 'Treatment_to_date' in df.columns:
-            df['Duration'] = (df['Treatment_to_date'] - df['Treatment from date']).dt.days
+        if 'Treatment_from_date' in df.columns and 'Treatment_to_date' in df.columns:
+            df['Duration'] = (df['Treatment_to_date'] - df['Treatment_from_date']).dt.days
             df['Duration'] = df['Duration'].clip(lower=0)  # Ensure no negative durations
             
         if 'Claim_invoice_date' in df.columns:
@@ -297,7 +296,7 @@ class FeatureEncoder:
         
         # Frequency encoding
         freq = df[col].value_counts(normalize=True)
-        df[f'{col}_freqenc'] = df[col].map(freq).fillna(0.0)
+        df[f'{col}_freqenc'] = df[col].map(freq).astype(float).fillna(0.0)
         encoded_features.append(f'{col}_freqenc')
         
         # Target encoding simulation (using frequency as proxy)
@@ -311,7 +310,7 @@ class FeatureEncoder:
         
         # Create one-hot encoding for top categories
         one_hot = pd.get_dummies(
-            df[col].where(df[col].isin(top_categories)).fillna('OTHER'),
+            self._fill_label(df[col].where(df[col].isin(top_categories)), 'OTHER'),
             prefix=col
         )
         
@@ -343,11 +342,20 @@ class FeatureEncoder:
         
         return df
     
+    @staticmethod
+    def _fill_label(series: pd.Series, label: str) -> pd.Series:
+        """fillna with a placeholder label; ID/code columns arrive as categoricals from the dataset schema"""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.cat.remove_unused_categories()
+            if label not in series.cat.categories:
+                series = series.cat.add_categories([label])
+        return series.fillna(label)
+    
     def _encode_low_cardinality(self, df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
         """Encode low cardinality columns with one-hot encoding"""
         # Fill NaN before encoding
         for col in cols:
-            df[col].fillna('MISSING', inplace=True)
+            df[col] = self._fill_label(df[col], 'MISSING')
         
         ohe = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
         ohe_fit = ohe.fit_transform(df[cols])
@@ -1089,7 +1097,7 @@ def run_pipeline():
         
         # Load and prepare data
         logger.info("\n=== Data Loading and Preparation ===")
-        df = data_processor.load_and_clean(config.input_path)
+        df = data_processor.load_and_clean(ClaimsDataset.from_csv(config.input_path))
         logger.info(f"Loaded {len(df)} records with {df.shape[1]} features")
         
         # Feature engineering
@@ -1,24 +1,40 @@
 import pandas as pd
+from claims_dataset import ClaimsDataset
+from outlier_export import export_outliers
+from dataset_store import baseline_sketches, save_sketches
+from quantile_sketch import GroupSketch
+
+# Group keys of the benefit-level IQR threshold and the provider- and country-level averages
+LEVEL_KEYS = {
+    "benefit": ["Benefit_head_code"],
+    "provider": ["Provider_ID", "Provider_country_code", "Benefit_head_code"],
+    "country": ["Provider_country_code", "Benefit_head_code"],
+}
+# Name of this scenario's stored sketches (one set per dataset content)
+SKETCH_NAME = "scenario-1"
 
 class BenefitOutlierDetector:
-    def __init__(self, file_path):
-        self.file_path = file_path
+    REQUIRED_COLUMNS = [
+        'Claim_ID', 'Provider_ID', 'Provider_country_code', 'Claimed_currency_code',
+        'Claim_invoice_gross_total_amount', 'Payee_type', 'Incident_count', 'Benefit_head_code',
+        'Benefit_head_descr', 'Paid_amount', 'Payment_currency_code'
+    ]
+
+    def __init__(self, dataset, baseline="dataset"):
+        self.dataset = dataset
+        # "dataset": thresholds from this file alone; "history": from every stored upload's sketches
+        self.baseline = baseline
         self.df = None
 
     def load_and_prepare_data(self):
-        cols = [
-            'Claim_ID', 'Provider_ID', 'Provider_country_code', 'Claimed_currency_code',
-            'Claim_invoice_gross_total_amount', 'Payee_type', 'Incident_count',
-            'Benefit_head_code', 'Benefit_head_descr', 'Paid_amount', 'Payment_currency_code'
-        ]
-        self.df = pd.read_csv(self.file_path, usecols=cols, low_memory=False)
+        self.df = self.dataset.frame(self.REQUIRED_COLUMNS)
 
         # Keep only relevant rows (remove invalid / unwanted benefit codes)
         self.df = self.df[
             (self.df["Payee_type"] == "P") &
             (self.df["Claim_invoice_gross_total_amount"] < 10000) &
             (self.df["Benefit_head_code"].notnull()) &
-            (self.df["Benefit_head_code"] != 9100)
+            (self.df["Benefit_head_code"] != "9100")
         ].copy()
 
     def calculate_incident_amounts(self):
@@ -28,31 +44,48 @@ class BenefitOutlierDetector:
         )
         self.df.dropna(subset=['gross_per_incident'], inplace=True)
 
-    def find_outliers(self):
+    def build_sketches(self):
+        """Mergeable summaries of gross_per_incident at the benefit, provider and country levels."""
+        return {level: GroupSketch.from_values(self.df, keys, "gross_per_incident")
+                for level, keys in LEVEL_KEYS.items()}
+
+    def history_sketches(self):
+        """
+        This file's sketches merged with those stored for every other upload. The file's own
+        sketches are stored too, so later uploads are scored against it without re-reading it.
+        """
+        sketches = self.build_sketches()
+        content_hash = self.dataset.content_hash
+        if content_hash:
+            save_sketches(content_hash, SKETCH_NAME, {level: sketch.to_dict() for level, sketch in sketches.items()})
+        stored = [payload for stored_hash, payload in baseline_sketches(SKETCH_NAME) if stored_hash != content_hash]
+        return {level: GroupSketch.merge_all([sketch] + [GroupSketch.from_dict(payload[level]) for payload in stored])
+                for level, sketch in sketches.items()}
+
+    def find_outliers(self, sketches=None):
+        """Flag claims above their benefit, provider or country threshold (from sketches if given, else this file)."""
     # --- Step 1: Benefit-level thresholds (IQR) ---
-        benefit_stats = (
-            self.df.groupby("Benefit_head_code")["gross_per_incident"]
-            .agg(q1=lambda x: x.quantile(0.25),
-                q3=lambda x: x.quantile(0.75))
-            .reset_index()
-        )
+        if sketches is None:
+            per_incident = self.df.groupby("Benefit_head_code", observed=True)["gross_per_incident"]
+            benefit_stats = pd.DataFrame({"q1": per_incident.quantile(0.25), "q3": per_incident.quantile(0.75)}).reset_index()
+        else:
+            benefit = sketches["benefit"]
+            benefit_stats = pd.DataFrame({"q1": benefit.quantile(0.25), "q3": benefit.quantile(0.75)}).reset_index()
         benefit_stats["iqr_threshold"] = (
             benefit_stats["q3"] + 1.5 * (benefit_stats["q3"] - benefit_stats["q1"])
         )
         # --- Step 2: Provider-level avg (include country code for alignment) ---
-        provider_avg = (
-            self.df.groupby(["Provider_ID", "Provider_country_code", "Benefit_head_code"])["gross_per_incident"]
-            .mean()
-            .reset_index()
-            .rename(columns={"gross_per_incident": "provider_avg"})
-        )
+        if sketches is None:
+            provider_avg = self.df.groupby(LEVEL_KEYS["provider"], observed=True)["gross_per_incident"].mean()
+        else:
+            provider_avg = sketches["provider"].mean()
+        provider_avg = provider_avg.rename("provider_avg").reset_index()
         # --- Step 3: Country-level avg ---
-        country_avg = (
-            self.df.groupby(["Provider_country_code", "Benefit_head_code"])["gross_per_incident"]
-            .mean()
-            .reset_index()
-            .rename(columns={"gross_per_incident": "country_avg"})
-        )
+        if sketches is None:
+            country_avg = self.df.groupby(LEVEL_KEYS["country"], observed=True)["gross_per_incident"].mean()
+        else:
+            country_avg = sketches["country"].mean()
+        country_avg = country_avg.rename("country_avg").reset_index()
 
         # --- Step 4: Merge all stats ---
         stats = (
@@ -82,7 +115,7 @@ class BenefitOutlierDetector:
     def run(self):
         self.load_and_prepare_data()
         self.calculate_incident_amounts()
-        outliers = self.find_outliers()
+        outliers = self.find_outliers(self.history_sketches() if self.baseline == "history" else None)
         
         print("--- Outlier Detection Results (Scenario-1) ---")
         if outliers.empty:
@@ -92,16 +125,15 @@ class BenefitOutlierDetector:
             print(f"Outlier Claim_IDs for Scenario-1 ({len(claim_ids)} IDs):")
             print(claim_ids.to_list())
 
-            # Save to CSV
-            claim_ids.to_csv("Scenario-1_outliers.csv", index=False)
-            print("Outlier Claim_IDs saved to Scenario-1_outliers.csv")
+            # Optional CSV export
+            export_outliers(claim_ids, "Scenario-1_outliers.csv")
         
         return outliers
 
 
 # ✅ Wrapper for FastAPI
-def run(file_path, params=None):
-    detector = BenefitOutlierDetector(file_path)
+def run(dataset, params=None):
+    detector = BenefitOutlierDetector(dataset, (params or {}).get("baseline", "dataset"))
     outliers = detector.run()
 
     result = {
@@ -109,10 +141,18 @@ def run(file_path, params=None):
         "claim_ids": outliers["Claim_ID"].drop_duplicates().tolist()
     }
 
-    # Optionally save results
-    outliers.to_csv("Scenario-1_outliers.csv", index=False)
-
     return result
+def details(dataset, params=None):
+    """
+    Entry point for the scenario details view.
+    Returns the flagged rows as records.
+    """
+    detector = BenefitOutlierDetector(dataset, (params or {}).get("baseline", "dataset"))
+    detector.load_and_prepare_data()
+    detector.calculate_incident_amounts()
+    outliers = detector.find_outliers(detector.history_sketches() if detector.baseline == "history" else None)
+    return outliers.to_dict('records') if outliers is not None and not outliers.empty else []
+
 if __name__ == "__main__":
-    detector = BenefitOutlierDetector("synthetic_healthcare_fraud_data.csv")
+    detector = BenefitOutlierDetector(ClaimsDataset.from_csv("synthetic_healthcare_fraud_data.csv"))
     detector.run()
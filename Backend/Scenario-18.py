@@ -1,21 +1,21 @@
 import pandas as pd
+from claims_dataset import ClaimsDataset
+from outlier_export import export_outliers
 
 class Scenario18Analyzer:
     """
     Scenario-18: Placeholder for missing scenario 18
     This is a template that can be replaced with actual fraud detection logic
     """
-    def __init__(self, file_path):
-        self.file_path = file_path
+    REQUIRED_COLUMNS = ['Claim_ID']
+
+    def __init__(self, dataset):
+        self.dataset = dataset
         self.data = None
 
     def load_data(self):
-        """Load claims dataset"""
-        try:
-            self.data = pd.read_csv(self.file_path)
-        except FileNotFoundError:
-            print(f"Error: The file '{self.file_path}' was not found.")
-            self.data = pd.DataFrame()
+        """Take the claims from the shared dataset"""
+        self.data = self.dataset.frame()
 
     def analyze_placeholder(self):
         """Placeholder analysis - returns empty results"""
@@ -28,9 +28,9 @@ class Scenario18Analyzer:
         self.load_data()
         flagged_claims = self.analyze_placeholder()
         
-        # Save empty results for consistency
+        # Export empty results for consistency
         flagged_claims_df = pd.DataFrame({'Claim_ID': []})
-        flagged_claims_df.to_csv("Scenario-18_outliers.csv", index=False)
+        export_outliers(flagged_claims_df, "Scenario-18_outliers.csv")
         
         print("Scenario-18 Analysis Complete ✅ (Placeholder)")
         print("No claims flagged - placeholder implementation")
@@ -38,12 +38,12 @@ class Scenario18Analyzer:
         return flagged_claims
 
 # ✅ Wrapper for API integration
-def run(file_path, params=None):
+def run(dataset, params=None):
     """
     Entry point for API integration.
     Returns standardized result format.
     """
-    analyzer = Scenario18Analyzer(file_path)
+    analyzer = Scenario18Analyzer(dataset)
     flagged_claims = analyzer.analyze()
     
     result = {
@@ -53,6 +53,14 @@ def run(file_path, params=None):
     
     return result
 
+def details(dataset, params=None):
+    """
+    Entry point for the scenario details view.
+    Returns the flagged rows as records.
+    """
+    Scenario18Analyzer(dataset).analyze()
+    return []
+
 if __name__ == "__main__":
-    analyzer = Scenario18Analyzer("synthetic_healthcare_fraud_data.csv")
+    analyzer = Scenario18Analyzer(ClaimsDataset.from_csv("synthetic_healthcare_fraud_data.csv"))
     analyzer.analyze()
\ No newline at end of file
@@ -1,42 +1,45 @@
 import pandas as pd
+from claims_dataset import ClaimsDataset
+from outlier_export import export_outliers
 import numpy as np
 
 class ChemoGapDetector:
-    def __init__(self, file_path, output_file="Scenario-2_outliers.csv"):
-        self.file_path = file_path
+    REQUIRED_COLUMNS = ['Claim_ID', 'Member_ID', 'Procedure_code', 'Treatment_from_date', 'Paid_amount']
+
+    def __init__(self, dataset, output_file="Scenario-2_outliers.csv"):
+        self.dataset = dataset
         self.output_file = output_file
         self.df = None
 
     def load_and_prepare_data(self):
-        """Loads and prepares the claims data from the CSV file."""
-        self.df = pd.read_csv(self.file_path, low_memory=False)
-        self.df.rename(columns={
-            'Member ID': 'Member_ID',
-            'Treatment from date': 'Treatment_from_date',
-            'Paid amount': 'Paid_amount',
-            'Claim ID': 'Claim_ID',
-            'Procedure code': 'Procedure_code'
-        }, inplace=True)
-        self.df['Procedure_code'] = pd.to_numeric(self.df['Procedure_code'], errors='coerce').astype('Int64')
-        self.df['Treatment_from_date'] = pd.to_datetime(self.df['Treatment_from_date'], errors='coerce')
+        """Prepares the claims data from the shared dataset."""
+        self.df = self.dataset.frame()
 
-    def find_treatment_gaps(self, min_gap=3, max_gap=13):
-        """Identifies chemotherapy claims with specified treatment gaps."""
+    def chemo_claims(self):
+        """Chemotherapy claims, one row per claim, member and treatment date, with the amount paid."""
         if self.df is None:
             self.load_and_prepare_data()
 
-        chemo_df = self.df[self.df['Procedure_code'] == 4030].copy()
+        chemo_df = self.df[self.df['Procedure_code'] == '4030'].copy()
         if chemo_df.empty:
             return pd.DataFrame()
 
-        claim_agg = chemo_df.groupby(['Claim_ID', 'Member_ID', 'Treatment_from_date']).agg(
+        return chemo_df.groupby(['Claim_ID', 'Member_ID', 'Treatment_from_date'], observed=True).agg(
             total_paid_amount=('Paid_amount', 'sum')
         ).reset_index()
 
-        sorted_claims = claim_agg.sort_values(by=['Member_ID', 'Treatment_from_date'])
-        sorted_claims['prev_treatment_date'] = sorted_claims.groupby('Member_ID')['Treatment_from_date'].shift(1)
-        sorted_claims['prev_claim_id'] = sorted_claims.groupby('Member_ID')['Claim_ID'].shift(1)
-        sorted_claims['gap_in_days'] = (sorted_claims['Treatment_from_date'] - sorted_claims['prev_treatment_date']).dt.days
+    def treatment_gaps(self):
+        """Chemotherapy claims in member and date order, with the gap in days since the member's previous one."""
+        claim_agg = self.chemo_claims()
+        if claim_agg.empty:
+            return claim_agg
+        return with_gaps(claim_agg)
+
+    def find_treatment_gaps(self, min_gap=3, max_gap=13):
+        """Identifies chemotherapy claims with specified treatment gaps."""
+        sorted_claims = self.treatment_gaps()
+        if sorted_claims.empty:
+            return sorted_claims
 
         gap_claims = sorted_claims[
             (sorted_claims['gap_in_days'] >= min_gap) &
@@ -50,19 +53,28 @@ class ChemoGapDetector:
         gap_results = self.find_treatment_gaps(min_gap, max_gap)
 
         if not gap_results.empty:
-            # Save Claim_IDs to CSV
-            gap_results[['Claim_ID']].to_csv(self.output_file, index=False)
+            # Optional CSV export of the Claim_IDs
+            export_outliers(gap_results[['Claim_ID']], self.output_file)
 
         return gap_results
 
 
+def with_gaps(claim_agg):
+    """Chemotherapy claim rows sorted by member and date, with the previous claim of the member and the gap in days."""
+    sorted_claims = claim_agg.sort_values(by=['Member_ID', 'Treatment_from_date'])
+    sorted_claims['prev_treatment_date'] = sorted_claims.groupby('Member_ID', observed=True)['Treatment_from_date'].shift(1)
+    sorted_claims['prev_claim_id'] = sorted_claims.groupby('Member_ID', observed=True)['Claim_ID'].shift(1)
+    sorted_claims['gap_in_days'] = (sorted_claims['Treatment_from_date'] - sorted_claims['prev_treatment_date']).dt.days
+    return sorted_claims
+
+
 # ✅ Wrapper for FastAPI
-def run(file_path, params=None):
+def run(dataset, params=None):
     params = params or {}
-    min_gap = params.get("min_gap", 3)
-    max_gap = params.get("max_gap", 13)
+    min_gap = int(params.get("min_gap", 3))
+    max_gap = int(params.get("max_gap", 13))
 
-    detector = ChemoGapDetector(file_path)
+    detector = ChemoGapDetector(dataset)
     gap_results = detector.run(min_gap, max_gap)   # <-- FIXED: positional args
 
     result = {
@@ -72,5 +84,75 @@ def run(file_path, params=None):
     return result
 
 
+def details(dataset, params=None):
+    """
+    Entry point for the scenario details view.
+    Returns the flagged rows as records.
+    """
+    params = params or {}
+    gap_results = ChemoGapDetector(dataset).run(int(params.get("min_gap", 3)), int(params.get("max_gap", 13)))
+    return gap_results.to_dict('records') if gap_results is not None and not gap_results.empty else []
+
+
+def group_stats(dataset, params=None):
+    """
+    Per-group statistic for threshold re-evaluation: every chemotherapy claim, in member and
+    date order, with the gap in days since the member's previous one (missing for the first).
+    """
+    gaps = ChemoGapDetector(dataset).treatment_gaps()
+    if gaps.empty:
+        return pd.DataFrame({'Claim_ID': pd.Series(dtype=object), 'gap_in_days': pd.Series(dtype=float)})
+    return gaps[['Claim_ID', 'gap_in_days']].reset_index(drop=True)
+
+
+def rescore(stats, params=None):
+    """
+    run() result under params' min_gap and max_gap, from group_stats() output
+    (no pass over the claims).
+    """
+    params = params or {}
+    min_gap = int(params.get("min_gap", 3))
+    max_gap = int(params.get("max_gap", 13))
+    gap_claims = stats[(stats['gap_in_days'] >= min_gap) & (stats['gap_in_days'] <= max_gap)]
+    return {
+        "gaps_count": len(gap_claims),
+        "claim_ids": gap_claims["Claim_ID"].drop_duplicates().tolist()
+    }
+
+def scoring_state(dataset, params=None):
+    """Every chemotherapy claim's member and treatment date: the history new claims are scored against."""
+    claim_agg = ChemoGapDetector(dataset).chemo_claims()
+    if claim_agg.empty:
+        return pd.DataFrame({'Claim_ID': pd.Series(dtype=object), 'Member_ID': pd.Series(dtype=object),
+                             'Treatment_from_date': pd.Series(dtype='datetime64[ns]')})
+    claim_agg['Member_ID'] = claim_agg['Member_ID'].astype(object)
+    return claim_agg[['Claim_ID', 'Member_ID', 'Treatment_from_date']]
+
+
+def score(state, claims, params=None):
+    """
+    run() result for new claims scored against scoring_state() of the history: the new
+    chemotherapy claims whose gap since the member's previous one (in the history or among the
+    new claims, in the order run() would put them) is within min_gap..max_gap.
+    """
+    params = params or {}
+    min_gap = int(params.get("min_gap", 3))
+    max_gap = int(params.get("max_gap", 13))
+    new_claims = ChemoGapDetector(claims).chemo_claims()
+    if new_claims.empty:
+        return {"gaps_count": 0, "claim_ids": []}
+
+    new_claims = new_claims[['Claim_ID', 'Member_ID', 'Treatment_from_date']].assign(
+        Member_ID=new_claims['Member_ID'].astype(object), new=True)
+    history = state[state['Member_ID'].isin(set(new_claims['Member_ID']))].assign(new=False)
+    combined = pd.concat([history, new_claims], ignore_index=True).sort_values(
+        by=['Claim_ID', 'Member_ID', 'Treatment_from_date'], kind='stable')
+    gaps = with_gaps(combined)
+    gap_claims = gaps[gaps['new'] & (gaps['gap_in_days'] >= min_gap) & (gaps['gap_in_days'] <= max_gap)]
+    return {
+        "gaps_count": len(gap_claims),
+        "claim_ids": gap_claims["Claim_ID"].drop_duplicates().tolist()
+    }
+
 if __name__ == "__main__":
-    print(run("synthetic_healthcare_fraud_data.csv"))
+    print(run(ClaimsDataset.from_csv("synthetic_healthcare_fraud_data.csv")))
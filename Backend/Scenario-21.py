@@ -1,18 +1,25 @@
 import pandas as pd
+from claims_dataset import ClaimsDataset
+from outlier_export import export_outliers
+from code_sets import code_set
+
+# Diagnoses that justify a dentistry claim (ICD-10 K00-K14, ICD-9 520-529, dental exam Z01.2), defined in code_sets.json
+USEFUL_DENT_CODES = code_set("dental_diagnoses")
 
 class Scenario21Analyzer:
-    def __init__(self, file_path):
-        self.file_path = file_path
+    REQUIRED_COLUMNS = [
+        'Claim_ID', 'Member_ID', 'Benefit_head_descr', 'diagnosis_code', 'Diagnostic name',
+        'Paid_amount', 'Procedure_descr', 'Provider__descr'
+    ]
+
+    def __init__(self, dataset):
+        self.dataset = dataset
         self.data = None
         self.flagged_claims = None
 
     def load_data(self):
-        """Loads data from the CSV file."""
-        try:
-            self.data = pd.read_csv(self.file_path)
-        except FileNotFoundError:
-            print(f"Error: The file '{self.file_path}' was not found.")
-            self.data = pd.DataFrame()
+        """Takes the claims from the shared dataset."""
+        self.data = self.dataset.frame()
 
     def normalize_columns(self):
         """Normalize column headers for processing with flexible matching."""
@@ -94,13 +101,6 @@ class Scenario21Analyzer:
             print(f"Error: Missing required columns: {missing_cols}")
             return pd.DataFrame()
 
-        # Useful dentistry ICD codes
-        USEFUL_DENT_CODES = {
-            "K00","K01","K02","K03","K04","K05","K06","K07","K08","K09","K10","K11","K12","K13","K14",
-            "520","521","522","523","524","525","526","527","528","529",
-            "Z01.2"  # dental exam
-        }
-
         # Filter dentistry-related claims
         dentistry_claims = self.data[
             self.data['benefit_head_descr'].str.contains("Dentist", case=False, na=False)
@@ -109,13 +109,13 @@ class Scenario21Analyzer:
 
         # Flag claims with non-dental diagnosis codes
         flagged = dentistry_claims[
-            ~dentistry_claims['diagnosis_code'].str.startswith(tuple(USEFUL_DENT_CODES), na=False)
+            ~USEFUL_DENT_CODES.matches(dentistry_claims['diagnosis_code'])
         ]
 
         # Aggregate duplicates
         self.flagged_claims = flagged.groupby(
             ['member_id', 'benefit_head_descr', 'diagnosis_code', 'diagnosis_name', 
-             'procedure_descr', 'provider_type_descr'], as_index=False
+             'procedure_descr', 'provider_type_descr'], as_index=False, observed=True
         ).agg(
             paid_amount=('paid_amount', 'sum'), 
             claim_count=('claim_id', 'count'),
@@ -123,18 +123,17 @@ class Scenario21Analyzer:
         )
 
     def analyze(self, output_csv="Scenario-21_outliers.csv"):
-        """Runs the full analysis and saves Claim_IDs to CSV."""
+        """Runs the full analysis and returns the flagged Claim_IDs (optionally exported to CSV)."""
         print("Running Scenario 21: Unusual Dentistry Claims")
         self.load_data()
         self.filter_and_flag()
 
         if self.flagged_claims is not None and not self.flagged_claims.empty:
             print(f"Flagged Claims Count: {len(self.flagged_claims)}")
-            # Flatten Claim_IDs for CSV
+            # Flatten Claim_IDs
             claim_ids = [cid for sublist in self.flagged_claims['claim_ids'] for cid in sublist]
             claim_ids_df = pd.DataFrame({'Claim_ID': claim_ids})
-            claim_ids_df.to_csv(output_csv, index=False)
-            print(f"Flagged Claim IDs exported to '{output_csv}'")
+            export_outliers(claim_ids_df, output_csv)
             return claim_ids_df
         else:
             print("No claims found matching the criteria for this scenario.")
@@ -143,12 +142,12 @@ class Scenario21Analyzer:
 
 # Usage
 # ✅ Wrapper for API integration
-def run(file_path, params=None):
+def run(dataset, params=None):
     """
     Entry point for API integration.
     Returns standardized result format.
     """
-    analyzer = Scenario21Analyzer(file_path)
+    analyzer = Scenario21Analyzer(dataset)
     flagged_claim_ids_df = analyzer.analyze()
     
     result = {
@@ -158,6 +157,14 @@ def run(file_path, params=None):
     
     return result
 
+def details(dataset, params=None):
+    """
+    Entry point for the scenario details view.
+    Returns the flagged rows as records.
+    """
+    flagged_claim_ids_df = Scenario21Analyzer(dataset).analyze()
+    return flagged_claim_ids_df.to_dict('records') if not flagged_claim_ids_df.empty else []
+
 if __name__ == "__main__":
-    analyzer = Scenario21Analyzer('synthetic_healthcare_fraud_data.csv')
+    analyzer = Scenario21Analyzer(ClaimsDataset.from_csv('synthetic_healthcare_fraud_data.csv'))
     flagged_claim_ids_df = analyzer.analyze()
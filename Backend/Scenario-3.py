@@ -1,43 +1,64 @@
 import pandas as pd
+from claims_dataset import ClaimsDataset
+from outlier_export import export_outliers
+from group_index import key_codes
+from interval_overlap import iter_overlapping_pairs
 import numpy as np
 
 class CrossCountryFraudDetector:
-    def __init__(self, file_path, output_file="Scenario-3_outliers.csv"):
-        self.file_path = file_path
+    REQUIRED_COLUMNS = [
+        'Claim_ID', 'Member_ID', 'Treatment_from_date', 'Treatment_to_date', 'Treatment_Country',
+        'diagnosis_code'
+    ]
+
+    def __init__(self, dataset, output_file="Scenario-3_outliers.csv"):
+        self.dataset = dataset
         self.output_file = output_file
         self.df = None
         self.original_columns = None
 
     def load_and_prepare_data(self):
-        self.df = pd.read_csv(self.file_path, low_memory=False)
-        self.df.rename(columns={
-            'Member ID': 'Member_ID',
-            'Treatment from date': 'Treatment_from_date',
-            'Treatment to date': 'Treatment_to_date',
-            'Country_code(Treatment Country)': 'Treatment_Country',
-            'diagnosis_code': 'Diagnostic_Code',
-            'Claim ID': 'Claim_ID'
-        }, inplace=True)
-        
-        self.df['Treatment_from_date'] = pd.to_datetime(self.df['Treatment_from_date'], errors='coerce')
-        self.df['Treatment_to_date'] = pd.to_datetime(self.df['Treatment_to_date'], errors='coerce')
-        
-        self.df['Treatment_to_date'].fillna(self.df['Treatment_from_date'], inplace=True)
+        self.df = self.dataset.frame()
+        self.df.rename(columns={'diagnosis_code': 'Diagnostic_Code'}, inplace=True)
+
+        self.df['Treatment_to_date'] = self.df['Treatment_to_date'].fillna(self.df['Treatment_from_date'])
         self.df.dropna(subset=['Treatment_from_date', 'Treatment_to_date', 'Member_ID', 'Treatment_Country', 'Diagnostic_Code'], inplace=True)
 
     def find_anomalies(self):
-        claims_a = self.df[['Member_ID', 'Claim_ID', 'Treatment_from_date', 'Treatment_to_date', 'Treatment_Country', 'Diagnostic_Code']]
-        claims_b = claims_a.copy()
+        claims = self.df[['Member_ID', 'Claim_ID', 'Treatment_from_date', 'Treatment_to_date', 'Treatment_Country', 'Diagnostic_Code']]
+        claim_ids = claims['Claim_ID'].reset_index(drop=True)
+        from_dates = claims['Treatment_from_date'].to_numpy()
+        to_dates = claims['Treatment_to_date'].to_numpy()
+        countries = key_codes(claims['Treatment_Country'])
+        diagnoses = key_codes(claims['Diagnostic_Code'])
+
+        # Only pairs of the same member's claims whose dates overlap are generated (sweep line, no self-join)
+        pairs_a, pairs_b = [], []
+        for left, right in iter_overlapping_pairs(key_codes(claims['Member_ID']), from_dates, to_dates):
+            # Orient each pair so that A holds the lower Claim_ID (pairs of equal or missing IDs are dropped)
+            ids_left = claim_ids.iloc[left].reset_index(drop=True)
+            ids_right = claim_ids.iloc[right].reset_index(drop=True)
+            swap = (ids_right < ids_left).to_numpy()
+            a, b = np.where(swap, right, left), np.where(swap, left, right)
+            keep = (
+                (swap | (ids_left < ids_right).to_numpy()) &
+                (countries[a] != countries[b]) &
+                (diagnoses[a] != diagnoses[b]) &
+                (from_dates[a] <= to_dates[b]) &
+                (to_dates[a] >= from_dates[b])
+            )
+            pairs_a.append(a[keep])
+            pairs_b.append(b[keep])
 
-        merged = pd.merge(claims_a, claims_b, on='Member_ID', suffixes=['_A', '_B'])
+        a = np.concatenate(pairs_a) if pairs_a else np.array([], dtype=np.int64)
+        b = np.concatenate(pairs_b) if pairs_b else np.array([], dtype=np.int64)
+        # Same row order as the self-join: by A's position, then B's
+        order = np.lexsort((b, a))
+        a, b = a[order], b[order]
 
-        anomalies = merged[
-            (merged['Claim_ID_A'] < merged['Claim_ID_B']) &
-            (merged['Treatment_Country_A'] != merged['Treatment_Country_B']) &
-            (merged['Diagnostic_Code_A'] != merged['Diagnostic_Code_B']) &
-            (merged['Treatment_from_date_A'] <= merged['Treatment_to_date_B']) &
-            (merged['Treatment_to_date_A'] >= merged['Treatment_from_date_B'])
-        ]
+        side_a = claims.iloc[a].drop(columns='Member_ID').add_suffix('_A').reset_index(drop=True)
+        side_b = claims.iloc[b].drop(columns='Member_ID').add_suffix('_B').reset_index(drop=True)
+        anomalies = pd.concat([claims['Member_ID'].iloc[a].reset_index(drop=True), side_a, side_b], axis=1)
 
         return anomalies
 
@@ -49,18 +70,18 @@ class CrossCountryFraudDetector:
         if anomalies.empty:
             print("\nNo anomalies found matching the specified criteria.")
         else:
-            print(f"\nFound {len(anomalies)} anomalies. Saving Claim IDs to {self.output_file}...")
+            print(f"\nFound {len(anomalies)} anomalies.")
 
             # Flatten both claim columns into a single list and remove duplicates
             claim_ids = pd.concat([anomalies['Claim_ID_A'], anomalies['Claim_ID_B']], axis=0).drop_duplicates().reset_index(drop=True)
             claim_ids_df = pd.DataFrame({'Claim_ID': claim_ids})
-            claim_ids_df.to_csv(self.output_file, index=False)
-            print(f"\nSaved {len(claim_ids_df)} unique Claim IDs to {self.output_file}.")
+            export_outliers(claim_ids_df, self.output_file)
+            print(f"\n{len(claim_ids_df)} unique Claim IDs flagged.")
         return anomalies   # <-- add this line
 
 # ✅ Wrapper for FastAPI
-def run(file_path, params=None):
-    detector = CrossCountryFraudDetector(file_path)
+def run(dataset, params=None):
+    detector = CrossCountryFraudDetector(dataset)
     anomalies = detector.run()
 
     # Flatten both Claim_ID_A and Claim_ID_B into unique list
@@ -74,9 +95,16 @@ def run(file_path, params=None):
         "claim_ids": claim_ids
     }
     return result
-    return result
 
 
+def details(dataset, params=None):
+    """
+    Entry point for the scenario details view.
+    Returns the flagged rows as records.
+    """
+    anomalies = CrossCountryFraudDetector(dataset).run()
+    return anomalies.to_dict('records') if anomalies is not None and not anomalies.empty else []
+
 if __name__ == "__main__":
-    detector = CrossCountryFraudDetector(file_path='synthetic_healthcare_fraud_data.csv')
+    detector = CrossCountryFraudDetector(ClaimsDataset.from_csv('synthetic_healthcare_fraud_data.csv'))
     detector.run()
\ No newline at end of file
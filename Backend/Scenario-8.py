@@ -1,68 +1,87 @@
+import numpy as np
 import pandas as pd
+from claims_dataset import ClaimsDataset
+from outlier_export import export_outliers
+from group_index import GroupIndex, key_codes
+from interval_overlap import busy_windows, merge_intervals, overlaps_windows
+
+# Nanoseconds per day
+DAY = pd.Timedelta(days=1).value
 
 class Scenario8Analyzer:
-    def __init__(self, file_path: str):
-        self.file_path = file_path
+    REQUIRED_COLUMNS = ['Claim_ID', 'Member_ID', 'Provider_ID', 'Treatment_from_date', 'Treatment_to_date']
+
+    def __init__(self, dataset: ClaimsDataset):
+        self.dataset = dataset
         self.data = None
+        self.member_days = None
+        self.first_day = None
+        self.last_day = None
 
     def load_data(self):
-        """Load and preprocess claims data"""
-        self.data = pd.read_csv(self.file_path)
-
-        # Convert dates
-        self.data['Treatment_from_date'] = pd.to_datetime(
-            self.data['Treatment from date'], errors='coerce'
-        )
-        self.data['Treatment_to_date'] = pd.to_datetime(
-            self.data['Treatment_to_date'], errors='coerce'
-        )
+        """Load and preprocess claims data (dates are parsed by the dataset)"""
+        self.data = self.dataset.frame()
 
         # Drop invalid
         self.data = self.data.dropna(
             subset=['Treatment_from_date', 'Treatment_to_date']
         )
 
-    def expand_dates(self):
-        """Expand treatment spans into daily rows"""
-        self.data['Individual_Dates'] = self.data.apply(
-            lambda row: pd.date_range(row['Treatment_from_date'], row['Treatment_to_date']),
-            axis=1
-        )
-        self.data = self.data.explode('Individual_Dates')
-        self.data.rename(columns={'Individual_Dates': 'Individual_Date'}, inplace=True)
+    def day_spans(self):
+        """
+        Treatment spans as day numbers instead of one row per day: the span covers the dates
+        from, from + 1 day, ... up to to (as pd.date_range does), i.e. days first_day..last_day.
+        Dates only coincide at the same time of day, so members are grouped per time of day.
+        """
+        from_ns = self.data['Treatment_from_date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        to_ns = self.data['Treatment_to_date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        self.first_day = from_ns // DAY
+        self.last_day = self.first_day + (to_ns - from_ns) // DAY
+        members = key_codes(self.data['Member_ID'])
+        # Spans ending before they start cover no dates
+        members[self.last_day < self.first_day] = -1
+        self.member_days = GroupIndex([members, from_ns % DAY]).group_of
 
     def filter_overlapping_visits(self):
         """Flag members with >2 providers on the same date"""
-        grouped = self.data.groupby(['Member_ID', 'Individual_Date'])
-        flagged = grouped.filter(lambda x: x['Provider_ID'].nunique() > 2)
+        # Each provider counts once per day: merge a member's overlapping spans with the same provider
+        visits = GroupIndex([self.member_days, key_codes(self.data['Provider_ID'])]).group_of
+        seen = np.flatnonzero(visits >= 0)
+        first, starts, ends = merge_intervals(visits[seen], self.first_day[seen], self.last_day[seen])
+
+        # Days on which a member has more than 2 providers active, by a +1/-1 event sweep
+        windows = busy_windows(self.member_days[seen[first]], starts, ends, min_active=3)
+
+        spans = np.flatnonzero(self.member_days >= 0)
+        flagged = np.zeros(len(self.data), dtype=bool)
+        flagged[spans] = overlaps_windows(self.member_days[spans], self.first_day[spans], self.last_day[spans], windows)
 
         # Only return unique Claim_IDs
-        return flagged[['Claim_ID']].drop_duplicates()
+        return self.data.loc[flagged, ['Claim_ID']].drop_duplicates()
 
     def save_outliers(self, flagged_claims):
-        """Save flagged Claim IDs to CSV"""
-        flagged_claims.to_csv("Scenario-8_outliers.csv", index=False)
+        """Export flagged Claim IDs to CSV (if exporting is enabled)"""
+        export_outliers(flagged_claims, "Scenario-8_outliers.csv")
 
     def analyze(self):
         """Run full Scenario-8 analysis"""
         self.load_data()
-        self.expand_dates()
+        self.day_spans()
         flagged_claims = self.filter_overlapping_visits()
         self.save_outliers(flagged_claims)
 
         print("Scenario-8 Analysis Complete ✅")
         print(f"Flagged Claim IDs: {len(flagged_claims)}")
-        print("Outliers saved to Scenario-8_outliers.csv")
         return flagged_claims
 
 
 # ✅ Wrapper for API integration
-def run(file_path, params=None):
+def run(dataset, params=None):
     """
     Entry point for API integration.
     Returns standardized result format.
     """
-    analyzer = Scenario8Analyzer(file_path)
+    analyzer = Scenario8Analyzer(dataset)
     flagged_claims = analyzer.analyze()
     
     result = {
@@ -72,6 +91,14 @@ def run(file_path, params=None):
     
     return result
 
+def details(dataset, params=None):
+    """
+    Entry point for the scenario details view.
+    Returns the flagged rows as records.
+    """
+    flagged_claims = Scenario8Analyzer(dataset).analyze()
+    return flagged_claims.to_dict('records') if flagged_claims is not None and not flagged_claims.empty else []
+
 if __name__ == "__main__":
-    analyzer = Scenario8Analyzer("synthetic_healthcare_fraud_data.csv")
+    analyzer = Scenario8Analyzer(ClaimsDataset.from_csv("synthetic_healthcare_fraud_data.csv"))
     analyzer.analyze()
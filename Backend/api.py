@@ -1,77 +1,34 @@
 import os
-import importlib.util
 import sys
 import logging
 import pandas as pd
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
+from claims_dataset import ClaimsDataset, source_columns_for
+from dataset_store import (store_upload, append_upload, get_dataset_info, source_path_for, is_cached,
+                           convert_in_background, load_dataset_by_id, save_flags, load_flags)
+from scenario_registry import SCENARIOS, ScenarioResult, get_scenario, required_columns_for, scenario_id_from
+from scenario_executor import rescore_scenario, run_scenarios, scenario_details, score_claims
 import tempfile
 import traceback
 import threading
+import time
 import uuid
 import json
 from datetime import datetime
 
-# Create upload folder if it doesn't exist
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-
-# Function to dynamically import a module from a file path
-def import_module_from_file(file_path, module_name):
-    spec = importlib.util.spec_from_file_location(module_name, file_path)
-    module = importlib.util.module_from_spec(spec)
-    sys.modules[module_name] = module
-    spec.loader.exec_module(module)
-    return module
-
-# Import scenario classes
-scenario1_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-1.py'), 'scenario1')
-scenario2_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-2.py'), 'scenario2')
-scenario3_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-3.py'), 'scenario3')
-scenario4_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-4.py'), 'scenario4')
-scenario5_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-5.py'), 'scenario5')
-scenario6_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-6.py'), 'scenario6')
-scenario7_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-7.py'), 'scenario7')
-scenario8_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-8.py'), 'scenario8')
-scenario9_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-9.py'), 'scenario9')
-scenario10_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-10.py'), 'scenario10')
-scenario11_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-11.py'), 'scenario11')
-scenario12_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-12.py'), 'scenario12')
-scenario13_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-13.py'), 'scenario13')
-scenario14_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-14.py'), 'scenario14')
-scenario15_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-15.py'), 'scenario15')
-scenario16_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-16.py'), 'scenario16')
-scenario17_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-17.py'), 'scenario17')
-scenario18_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-18.py'), 'scenario18')
-scenario19_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-19.py'), 'scenario19')
-scenario20_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-20.py'), 'scenario20')
-scenario21_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-21.py'), 'scenario21')
-scenario22_module = import_module_from_file(os.path.join(os.path.dirname(__file__), 'Scenario-22.py'), 'scenario22')
-
-# Get the classes from the modules
-BenefitOutlierDetector = getattr(scenario1_module, 'BenefitOutlierDetector')
-ChemoGapDetector = getattr(scenario2_module, 'ChemoGapDetector')
-CrossCountryFraudDetector = getattr(scenario3_module, 'CrossCountryFraudDetector')
-SundayClaimsAnalyzer = getattr(scenario4_module, 'SundayClaimsAnalyzer')
-MultipleClaimsInvoiceChecker = getattr(scenario5_module, 'MultipleClaimsInvoiceChecker')
-Scenario6OutlierDetector = getattr(scenario6_module, 'Scenario6OutlierDetector')
-Scenario7Analyzer = getattr(scenario7_module, 'Scenario7Analyzer')
-Scenario8Analyzer = getattr(scenario8_module, 'Scenario8Analyzer')
-Scenario9Analyzer = getattr(scenario9_module, 'Scenario9Analyzer')
-Scenario10Analyzer = getattr(scenario10_module, 'Scenario10Analyzer')
-Scenario11Analyzer = getattr(scenario11_module, 'Scenario11Analyzer')
-Scenario12Analyzer = getattr(scenario12_module, 'Scenario12Analyzer')
-Scenario13Analyzer = getattr(scenario13_module, 'Scenario13Analyzer')
-Scenario14Analyzer = getattr(scenario14_module, 'Scenario14Analyzer')
-HospitalBenefitValidator = getattr(scenario15_module, 'HospitalBenefitValidator')
-PaidVeterinaryClaimValidator = getattr(scenario16_module, 'PaidVeterinaryClaimValidator')
-Scenario17Analyzer = getattr(scenario17_module, 'Scenario17Analyzer')
-Scenario18Analyzer = getattr(scenario18_module, 'Scenario18Analyzer')
-Scenario19Analyzer = getattr(scenario19_module, 'Scenario19Analyzer')
-Scenario20Analyzer = getattr(scenario20_module, 'Scenario20Analyzer')
-Scenario21Analyzer = getattr(scenario21_module, 'Scenario21Analyzer')
-# Scenario22 uses function-based approach, no class needed
+# Scenarios are declared in scenario_registry; each module is imported the first time it runs
+# Row-local scenarios that can also run batch by batch (run_chunked) on files too large for memory
+CHUNKED_SCENARIOS = {scenario_id for scenario_id, scenario in SCENARIOS.items() if scenario.chunked}
+# Uploads at least this large run those scenarios out of core unless the request says otherwise,
+# and are not converted to the in-memory columnar cache on upload
+CHUNKED_MODE_MIN_BYTES = 1024 * 1024 * 1024
+# Most claims /api/score takes in one request (it is meant for adjudication, not for files)
+SCORE_MAX_CLAIMS = 1000
+
+def unique_claim_ids(claim_ids):
+    """Claim_IDs as strings, each once, in order of first appearance."""
+    return list(dict.fromkeys(str(claim_id) for claim_id in claim_ids))
 
 # Import ML layer components
 ml_layer_path = os.path.join(os.path.dirname(__file__), 'ML Layer')
@@ -109,13 +66,10 @@ if not logger.handlers:
     audit_handler.setFormatter(JsonFormatter())
     logger.addHandler(audit_handler)
 
-# Directory for temporary file storage
-UPLOAD_FOLDER = os.path.dirname(os.path.abspath(__file__))
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-
 # Global dictionary to store processing status for ML jobs
 processing_status = {}
+# Finished jobs, and the results they hold, are dropped this long after they finish
+JOB_TTL_SECONDS = int(os.environ.get('JOB_TTL_SECONDS', 3600))
 
 class ProcessingStatus:
     def __init__(self, job_id):
@@ -128,6 +82,7 @@ class ProcessingStatus:
         self.results = None
         self.error = None
         self.created_at = datetime.now()
+        self.finished_at = None
     
     def update(self, step, message, business_explanation):
         self.current_step = step
@@ -139,9 +94,18 @@ class ProcessingStatus:
     def set_error(self, error):
         self.status = 'error'
         self.error = str(error)
+        self.finished_at = datetime.now()
     
     def set_results(self, results):
         self.results = results
+        self.finished_at = datetime.now()
+
+def evict_finished_jobs():
+    """Drop the jobs that finished more than JOB_TTL_SECONDS ago."""
+    now = datetime.now()
+    for job_id, status in list(processing_status.items()):
+        if status.finished_at is not None and (now - status.finished_at).total_seconds() > JOB_TTL_SECONDS:
+            processing_status.pop(job_id, None)
 
 # Business-friendly step descriptions
 PROCESSING_STEPS = [
@@ -187,7 +151,7 @@ def update_processing_status(job_id, step, additional_info=""):
             step_info["business_explanation"]
         )
 
-def run_fraud_detection(file_path, job_id):
+def run_fraud_detection(dataset_id, job_id):
     """Run the fraud detection pipeline with status updates"""
     try:
         status = processing_status[job_id]
@@ -199,7 +163,7 @@ def run_fraud_detection(file_path, job_id):
 
         # Initialize components
         config = Config()
-        config.input_path = file_path
+        config.input_path = source_path_for(get_dataset_info(dataset_id)["content_hash"])
         
         data_processor = DataProcessor(config)
         feature_encoder = FeatureEncoder(config)
@@ -208,7 +172,7 @@ def run_fraud_detection(file_path, job_id):
         
         # Step 2: Data Preparation
         update_processing_status(job_id, 1, "- Creating derived features from healthcare data")
-        df = data_processor.load_and_clean(config.input_path)
+        df = data_processor.load_and_clean(load_dataset_by_id(dataset_id))
         df = data_processor.create_interaction_features(df)
         app.logger.info(f"Job {job_id}: Step 1 completed.")
 
@@ -366,25 +330,33 @@ def upload_file():
         return jsonify({"error": "No file selected"}), 400
     
     try:
-        # Save the uploaded file temporarily
-        temp_file_path = os.path.join(UPLOAD_FOLDER, "temp_upload.csv")
-        file.save(temp_file_path)
-        logger.info(f"File saved to {temp_file_path}")
-        
-        # Read the CSV file to return basic stats
-        df = pd.read_csv(temp_file_path, low_memory=False)
+        # Each upload becomes its own dataset; the file is streamed to disk and its hash,
+        # row count and column profile are computed on the way through
+        upload = store_upload(file.stream, file.filename)
+        dataset_id = upload["dataset_id"]
+        content_hash = upload["content_hash"]
+        
+        # Re-uploads of an identical file reuse the cached columnar copy; otherwise the
+        # conversion runs in the background and /api/analyze waits for it if needed
+        cached = is_cached(content_hash)
+        if not cached and upload["size_bytes"] < CHUNKED_MODE_MIN_BYTES:
+            convert_in_background(source_path_for(content_hash), content_hash)
         
         # Basic file statistics
         stats = {
-            "rows": len(df),
-            "columns": len(df.columns),
-            "column_names": df.columns.tolist(),
-            "file_size_kb": os.path.getsize(temp_file_path) / 1024
+            "rows": upload["rows"],
+            "columns": len(upload["header"]),
+            "column_names": upload["header"],
+            "date_format": upload["date_format"],
+            "column_profile": upload["column_profile"],
+            "file_size_kb": upload["size_bytes"] / 1024
         }
         
         return jsonify({
             "message": "File uploaded successfully",
-            "file_path": temp_file_path,
+            "dataset_id": dataset_id,
+            "content_hash": content_hash,
+            "cached": cached,
             "stats": stats
         }), 200
     
@@ -392,994 +364,306 @@ def upload_file():
         logger.error(f"Error processing upload: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/analyze', methods=['POST'])
-def analyze_data():
+@app.route('/api/datasets/<dataset_id>/append', methods=['POST'])
+def append_to_dataset(dataset_id):
+    """
+    Append a CSV of new claims to a stored dataset and update the flags of every scenario
+    already analyzed on it, re-evaluating only the members, providers and invoices it touches.
+    """
+    if 'file' not in request.files:
+        return jsonify({"error": "No file part"}), 400
+    
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "No file selected"}), 400
+    
+    dataset_info = get_dataset_info(dataset_id)
+    if dataset_info is None:
+        return jsonify({"error": "Dataset not found. Please upload a file first."}), 404
+    
     try:
-        # Get analysis parameters
-        data = request.json
-        scenarios_input = data.get('scenarios', [1, 2, 3, 4])  # Default to all scenarios
-        file_path = data.get('file_path', os.path.join(UPLOAD_FOLDER, "temp_upload.csv"))
-        
-        # Convert scenario names to numbers if they're strings
-        scenarios = []
-        for scenario in scenarios_input:
-            if isinstance(scenario, str):
-                if scenario == 'scenario-1':
-                    scenarios.append(1)
-                elif scenario == 'scenario-2':
-                    scenarios.append(2)
-                elif scenario == 'scenario-3':
-                    scenarios.append(3)
-                elif scenario == 'scenario-4':
-                    scenarios.append(4)
-                elif scenario == 'scenario-5':
-                    scenarios.append(5)
-                elif scenario == 'scenario-6':
-                    scenarios.append(6)
-                elif scenario == 'scenario-7':
-                    scenarios.append(7)
-                elif scenario == 'scenario-8':
-                    scenarios.append(8)
-                elif scenario == 'scenario-9':
-                    scenarios.append(9)
-                elif scenario == 'scenario-10':
-                    scenarios.append(10)
-                elif scenario == 'scenario-11':
-                    scenarios.append(11)
-                elif scenario == 'scenario-12':
-                    scenarios.append(12)
-                elif scenario == 'scenario-13':
-                    scenarios.append(13)
-                elif scenario == 'scenario-14':
-                    scenarios.append(14)
-                elif scenario == 'scenario-15':
-                    scenarios.append(15)
-                elif scenario == 'scenario-16':
-                    scenarios.append(16)
-                elif scenario == 'scenario-17':
-                    scenarios.append(17)
-                elif scenario == 'scenario-18':
-                    scenarios.append(18)
-                elif scenario == 'scenario-19':
-                    scenarios.append(19)
-                elif scenario == 'scenario-20':
-                    scenarios.append(20)
-                elif scenario == 'scenario-21':
-                    scenarios.append(21)
-                elif scenario == 'scenario-22':
-                    scenarios.append(22)
-            else:
-                scenarios.append(scenario)
-        
-        if not os.path.exists(file_path):
-            return jsonify({"error": "No uploaded file found. Please upload a file first."}), 400
-        
+        # Each scenario is rescored under the parameters its stored flags were computed with
+        flags, flag_params = load_flags(dataset_id, dataset_info["content_hash"])
+        manifest, delta = append_upload(dataset_id, file.stream, file.filename)
+        content_hash = manifest["content_hash"]
+        if not is_cached(content_hash) and manifest["size_bytes"] < CHUNKED_MODE_MIN_BYTES:
+            convert_in_background(source_path_for(content_hash), content_hash)
+        
+        touched = {scenario.group_key: None for scenario in SCENARIOS.values() if scenario.group_key}
+        touched = {key: delta.df[key].dropna().unique() for key in touched if key in delta.columns}
+        
+        # Group and whole-dataset scenarios read the combined claims, restricted to their columns
+        combined = None
+        grouped = [s for s in flags if s in SCENARIOS and not SCENARIOS[s].row_local]
+        
+        # The new content is already committed, so a scenario that fails to rescore loses its
+        # stored flags (its next /api/analyze stores them again) rather than the whole append
         results = {}
-        anomalies = []
-        
-        # Run selected scenarios
-        if 1 in scenarios:
-            logger.info("Running Scenario 1: Benefit Outlier Detection")
-            result = scenario1_module.run(file_path)
-            outliers_count = result.get('outliers_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario1"] = {
-                "name": "Benefit Outlier Detection",
-                "count": outliers_count
-            }
-            logger.info("Scenario 1 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 1,
-                "scenario_name": "Benefit Outlier Detection",
-                "anomalies_found": outliers_count,
-                "threshold": "z_score > 3.0"
-            }})
-            if outliers_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:50]):  # Show more results for better demo
-                    anomalies.append({
-                        "id": f"scenario1_outlier_{idx}",
-                        "type": "Benefit Outlier",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"PROV_{idx + 1}",
-                        "provider_name": f"Provider {idx + 1}",
-                        "description": f"Unusual benefit amount detected in claim analysis",
-                        "severity": "High",
-                        "risk_score": 85,
-                        "service_date": "2024-01-01",
-                        "billed_amount": 15000 + (idx * 1000)
-                    })
-        
-        if 2 in scenarios:
-            logger.info("Running Scenario 2: Chemotherapy Gap Detection")
-            result = scenario2_module.run(file_path)
-            gap_count = result.get('gaps_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario2"] = {
-                "name": "Chemotherapy Gap Detection",
-                "count": gap_count
-            }
-            logger.info("Scenario 2 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 2,
-                "scenario_name": "Chemotherapy Gap Detection",
-                "anomalies_found": gap_count,
-                "threshold": "gap_days > 1.5 * median_gap"
-            }})
-            if gap_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:12]):  # Show all gap results
-                    anomalies.append({
-                        "id": f"scenario2_gap_{idx}",
-                        "type": "Chemotherapy Gap",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"ONCO_PROV_{idx + 1}",
-                        "provider_name": f"Oncology Provider {idx + 1}",
-                        "description": f"Gap of {15 + idx * 5} days detected between chemotherapy treatments",
-                        "severity": "High",
-                        "service_date": "2024-01-15",
-                        "risk_score": 90,
-                        "billed_amount": 25000 + (idx * 2000)
-                    })
-        
-        if 3 in scenarios:
-            logger.info("Running Scenario 3: Cross-Country Fraud Detection")
-            result = scenario3_module.run(file_path)
-            cross_country_count = result.get('anomalies_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario3"] = {
-                "name": "Cross-Country Fraud Detection",
-                "count": cross_country_count
-            }
-            logger.info("Scenario 3 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 3,
-                "scenario_name": "Cross-Country Fraud Detection",
-                "anomalies_found": cross_country_count,
-                "threshold": "service in multiple countries on same day"
-            }})
-            if cross_country_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:25]):  # Show more cross-country results
-                    anomalies.append({
-                        "id": f"scenario3_cross_country_{idx}",
-                        "type": "Cross-Country Fraud",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"INTL_PROV_{idx + 1}",
-                        "provider_name": f"International Provider {idx + 1}",
-                        "description": f"Patient received treatment in multiple countries within 24 hours",
-                        "severity": "High",
-                        "service_date": "2024-01-20",
-                        "risk_score": 95,
-                        "billed_amount": 35000 + (idx * 5000)
-                    })
-        
-        if 4 in scenarios:
-            logger.info("Running Scenario 4: Sunday Claims Analysis")
-            result = scenario4_module.run(file_path)
-            sunday_count = result.get('sunday_claims_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario4"] = {
-                "name": "Sunday Claims Analysis",
-                "count": sunday_count
-            }
-            logger.info("Scenario 4 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 4,
-                "scenario_name": "Sunday Claims Analysis",
-                "anomalies_found": sunday_count,
-                "threshold": "day_of_week == Sunday"
-            }})
-            if sunday_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:50]):  # Show more Sunday results
-                    anomalies.append({
-                        "id": f"scenario4_sunday_{idx}",
-                        "type": "Sunday Treatment",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"WEEKEND_PROV_{idx + 1}",
-                        "provider_name": f"Weekend Provider {idx + 1}",
-                        "description": "Treatment provided on Sunday which is unusual",
-                        "severity": "Medium",
-                        "service_date": "2024-01-07",  # A Sunday
-                        "risk_score": 65,
-                        "billed_amount": 8000 + (idx * 500)
-                    })
-        
-        if 5 in scenarios:
-            logger.info("Running Scenario 5: Multiple Claims Same Invoice")
-            result = scenario5_module.run(file_path)
-            duplicate_count = result.get('duplicate_claims_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario5"] = {
-                "name": "Multiple Claims Same Invoice",
-                "count": duplicate_count
-            }
-            logger.info("Scenario 5 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 5,
-                "scenario_name": "Multiple Claims Same Invoice",
-                "anomalies_found": duplicate_count,
-                "threshold": "duplicate invoice_no_reference"
-            }})
-            if duplicate_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:30]):
-                    anomalies.append({
-                        "id": f"scenario5_duplicate_{idx}",
-                        "type": "Duplicate Invoice",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"DUP_PROV_{idx + 1}",
-                        "provider_name": f"Duplicate Provider {idx + 1}",
-                        "description": "Multiple claims submitted with same invoice reference number",
-                        "severity": "High",
-                        "service_date": "2024-01-10",
-                        "risk_score": 88,
-                        "billed_amount": 12000 + (idx * 800)
-                    })
-        
-        if 6 in scenarios:
-            logger.info("Running Scenario 6: Inpatient/Outpatient Same Date")
-            result = scenario6_module.run(file_path)
-            conflict_count = result.get('conflict_claims_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario6"] = {
-                "name": "Inpatient/Outpatient Same Date",
-                "count": conflict_count
-            }
-            logger.info("Scenario 6 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 6,
-                "scenario_name": "Inpatient/Outpatient Same Date",
-                "anomalies_found": conflict_count,
-                "threshold": "inpatient and outpatient service on same day"
-            }})
-            if conflict_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:20]):
-                    anomalies.append({
-                        "id": f"scenario6_conflict_{idx}",
-                        "type": "Service Type Conflict",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"CONF_PROV_{idx + 1}",
-                        "provider_name": f"Conflict Provider {idx + 1}",
-                        "description": "Patient has both inpatient and outpatient services on same date",
-                        "severity": "High",
-                        "service_date": "2024-01-12",
-                        "risk_score": 92,
-                        "billed_amount": 18000 + (idx * 1200)
-                    })
-        
-        if 7 in scenarios:
-            logger.info("Running Scenario 7: Provider Multi-Country")
-            result = scenario7_module.run(file_path)
-            multi_country_count = result.get('multi_country_claims_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario7"] = {
-                "name": "Provider Multi-Country",
-                "count": multi_country_count
-            }
-            logger.info("Scenario 7 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 7,
-                "scenario_name": "Provider Multi-Country",
-                "anomalies_found": multi_country_count,
-                "threshold": "provider in > 3 countries"
-            }})
-            if multi_country_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:40]):
-                    anomalies.append({
-                        "id": f"scenario7_multicountry_{idx}",
-                        "type": "Multi-Country Provider",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"MULTI_PROV_{idx + 1}",
-                        "provider_name": f"Multi-Country Provider {idx + 1}",
-                        "description": "Provider operating in more than 3 countries",
-                        "severity": "Medium",
-                        "service_date": "2024-01-18",
-                        "risk_score": 78,
-                        "billed_amount": 22000 + (idx * 1500)
-                    })
-        
-        if 8 in scenarios:
-            logger.info("Running Scenario 8: Multiple Provider Same Date")
-            result = scenario8_module.run(file_path)
-            overlapping_count = result.get('overlapping_visits_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario8"] = {
-                "name": "Multiple Provider Same Date",
-                "count": overlapping_count
-            }
-            logger.info("Scenario 8 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 8,
-                "scenario_name": "Multiple Provider Same Date",
-                "anomalies_found": overlapping_count,
-                "threshold": "patient visiting > 2 providers on same day"
-            }})
-            if overlapping_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:35]):
-                    anomalies.append({
-                        "id": f"scenario8_overlap_{idx}",
-                        "type": "Provider Overlap",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"OVER_PROV_{idx + 1}",
-                        "provider_name": f"Overlapping Provider {idx + 1}",
-                        "description": "Patient visited more than 2 providers on same date",
-                        "severity": "Medium",
-                        "service_date": "2024-01-22",
-                        "risk_score": 72,
-                        "billed_amount": 9500 + (idx * 600)
-                    })
-        
-        if 9 in scenarios:
-            logger.info("Running Scenario 9: Member Multi-Currency")
-            result = scenario9_module.run(file_path)
-            multi_currency_count = result.get('multi_currency_claims_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario9"] = {
-                "name": "Member Multi-Currency",
-                "count": multi_currency_count
-            }
-            logger.info("Scenario 9 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 9,
-                "scenario_name": "Member Multi-Currency",
-                "anomalies_found": multi_currency_count,
-                "threshold": "member with claims in >= 3 currencies"
-            }})
-            if multi_currency_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:25]):
-                    anomalies.append({
-                        "id": f"scenario9_currency_{idx}",
-                        "type": "Multi-Currency Member",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"CURR_PROV_{idx + 1}",
-                        "provider_name": f"Currency Provider {idx + 1}",
-                        "description": "Member has claims in 3 or more different currencies",
-                        "severity": "Medium",
-                        "service_date": "2024-01-25",
-                        "risk_score": 75,
-                        "billed_amount": 14000 + (idx * 900)
-                    })
-        
-        if 10 in scenarios:
-            logger.info("Running Scenario 10: Gender-Procedure Mismatch")
-            result = scenario10_module.run(file_path)
-            gender_mismatch_count = result.get('gender_mismatch_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario10"] = {
-                "name": "Gender-Procedure Mismatch",
-                "count": gender_mismatch_count
-            }
-            logger.info("Scenario 10 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 10,
-                "scenario_name": "Gender-Procedure Mismatch",
-                "anomalies_found": gender_mismatch_count,
-                "threshold": "gender-specific procedure on wrong gender"
-            }})
-            if gender_mismatch_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:30]):
-                    anomalies.append({
-                        "id": f"scenario10_gender_{idx}",
-                        "type": "Gender-Procedure Mismatch",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"GENDER_PROV_{idx + 1}",
-                        "provider_name": f"Gender Provider {idx + 1}",
-                        "description": "Gender-specific procedure assigned to wrong gender",
-                        "severity": "High",
-                        "service_date": "2024-01-28",
-                        "risk_score": 95,
-                        "billed_amount": 16000 + (idx * 1100)
-                    })
-        
-        if 11 in scenarios:
-            logger.info("Running Scenario 11: Early Invoice Date")
-            result = scenario11_module.run(file_path)
-            early_invoice_count = result.get('early_invoice_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario11"] = {
-                "name": "Early Invoice Date",
-                "count": early_invoice_count
-            }
-            logger.info("Scenario 11 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 11,
-                "scenario_name": "Early Invoice Date",
-                "anomalies_found": early_invoice_count,
-                "threshold": "invoice date < treatment from date"
-            }})
-            if early_invoice_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:25]):
-                    anomalies.append({
-                        "id": f"scenario11_early_{idx}",
-                        "type": "Early Invoice Date",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"EARLY_PROV_{idx + 1}",
-                        "provider_name": f"Early Provider {idx + 1}",
-                        "description": "Invoice date is earlier than treatment date",
-                        "severity": "High",
-                        "service_date": "2024-01-30",
-                        "risk_score": 90,
-                        "billed_amount": 11000 + (idx * 700)
-                    })
-        
-        if 12 in scenarios:
-            logger.info("Running Scenario 12: Adult Pediatric Diagnosis")
-            result = scenario12_module.run(file_path)
-            adult_pediatric_count = result.get('adult_pediatric_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario12"] = {
-                "name": "Adult Pediatric Diagnosis",
-                "count": adult_pediatric_count
-            }
-            logger.info("Scenario 12 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 12,
-                "scenario_name": "Adult Pediatric Diagnosis",
-                "anomalies_found": adult_pediatric_count,
-                "threshold": "age >= 18 and pediatric diagnosis"
-            }})
-            if adult_pediatric_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:20]):
-                    anomalies.append({
-                        "id": f"scenario12_pediatric_{idx}",
-                        "type": "Adult Pediatric Diagnosis",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"PED_PROV_{idx + 1}",
-                        "provider_name": f"Pediatric Provider {idx + 1}",
-                        "description": "Adult patient assigned pediatric/neonatal diagnosis",
-                        "severity": "High",
-                        "service_date": "2024-02-01",
-                        "risk_score": 88,
-                        "billed_amount": 13000 + (idx * 950)
-                    })
-        
-        if 13 in scenarios:
-            logger.info("Running Scenario 13: Multiple Payee Types")
-            result = scenario13_module.run(file_path)
-            multiple_payee_count = result.get('multiple_payee_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario13"] = {
-                "name": "Multiple Payee Types",
-                "count": multiple_payee_count
-            }
-            logger.info("Scenario 13 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 13,
-                "scenario_name": "Multiple Payee Types",
-                "anomalies_found": multiple_payee_count,
-                "threshold": "member with > 1 payee type on same day"
-            }})
-            if multiple_payee_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:15]):
-                    anomalies.append({
-                        "id": f"scenario13_payee_{idx}",
-                        "type": "Multiple Payee Types",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"PAYEE_PROV_{idx + 1}",
-                        "provider_name": f"Payee Provider {idx + 1}",
-                        "description": "Same member with different payee types on same invoice date",
-                        "severity": "Medium",
-                        "service_date": "2024-02-03",
-                        "risk_score": 70,
-                        "billed_amount": 9500 + (idx * 650)
-                    })
-        
-        if 14 in scenarios:
-            logger.info("Running Scenario 14: Excessive Diagnoses")
-            result = scenario14_module.run(file_path)
-            excessive_diagnoses_count = result.get('excessive_diagnoses_count', 0) if result else 0
-            claim_ids = result.get('claim_ids', []) if result else []
-            results["scenario14"] = {
-                "name": "Excessive Diagnoses",
-                "count": excessive_diagnoses_count
-            }
-            logger.info("Scenario 14 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 14,
-                "scenario_name": "Excessive Diagnoses",
-                "anomalies_found": excessive_diagnoses_count,
-                "threshold": "> 8 diagnoses on same day"
-            }})
-            if excessive_diagnoses_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:18]):
-                    anomalies.append({
-                        "id": f"scenario14_diagnoses_{idx}",
-                        "type": "Excessive Diagnoses",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"DIAG_PROV_{idx + 1}",
-                        "provider_name": f"Diagnosis Provider {idx + 1}",
-                        "description": "Member has more than 8 diagnoses on same day",
-                        "severity": "Medium",
-                        "service_date": "2024-02-05",
-                        "risk_score": 68,
-                        "billed_amount": 17000 + (idx * 1300)
-                    })
-        
-        if 15 in scenarios:
-            logger.info("Running Scenario 15: Hospital Benefits from Non-Hospital Providers")
-            try:
-                result = scenario15_module.run(file_path)
-                hospital_benefit_count = result.get('hospital_benefit_mismatch_count', 0) if result else 0
-                claim_ids = result.get('claim_ids', []) if result else []
-            except Exception as e:
-                logger.error(f"Error in Scenario 15: {str(e)}")
-                hospital_benefit_count = 0
-                claim_ids = []
-            results["scenario15"] = {
-                "name": "Hospital Benefits from Non-Hospital Providers",
-                "count": hospital_benefit_count
-            }
-            logger.info("Scenario 15 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 15,
-                "scenario_name": "Hospital Benefits from Non-Hospital Providers",
-                "anomalies_found": hospital_benefit_count,
-                "threshold": "non-hospital with hospital benefit codes"
-            }})
-            if hospital_benefit_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:25]):
-                    anomalies.append({
-                        "id": f"scenario15_hospital_{idx}",
-                        "type": "Hospital Benefit Mismatch",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"HOSP_PROV_{idx + 1}",
-                        "provider_name": f"Non-Hospital Provider {idx + 1}",
-                        "description": "Non-hospital provider using hospital-only benefit codes",
-                        "severity": "High",
-                        "service_date": "2024-02-08",
-                        "risk_score": 92,
-                        "billed_amount": 19000 + (idx * 1400)
-                    })
-        
-        if 16 in scenarios:
-            logger.info("Running Scenario 16: Paid Claims from Veterinary Providers")
-            try:
-                result = scenario16_module.run(file_path)
-                veterinary_count = result.get('veterinary_claims_count', 0) if result else 0
-                claim_ids = result.get('claim_ids', []) if result else []
-            except Exception as e:
-                logger.error(f"Error in Scenario 16: {str(e)}")
-                veterinary_count = 0
-                claim_ids = []
-            results["scenario16"] = {
-                "name": "Paid Claims from Veterinary Providers",
-                "count": veterinary_count
-            }
-            logger.info("Scenario 16 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 16,
-                "scenario_name": "Paid Claims from Veterinary Providers",
-                "anomalies_found": veterinary_count,
-                "threshold": "claim from veterinary provider"
-            }})
-            if veterinary_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:15]):
-                    anomalies.append({
-                        "id": f"scenario16_vet_{idx}",
-                        "type": "Veterinary Provider Claims",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"VET_PROV_{idx + 1}",
-                        "provider_name": f"Veterinary Provider {idx + 1}",
-                        "description": "Human healthcare claims from veterinary providers",
-                        "severity": "High",
-                        "service_date": "2024-02-10",
-                        "risk_score": 98,
-                        "billed_amount": 8500 + (idx * 500)
-                    })
-        
-        if 17 in scenarios:
-            logger.info("Running Scenario 17: Multiple MRI/CT Same Day")
-            try:
-                result = scenario17_module.run(file_path)
-                multiple_mri_count = result.get('multiple_mri_ct_count', 0) if result else 0
-                claim_ids = result.get('claim_ids', []) if result else []
-            except Exception as e:
-                logger.error(f"Error in Scenario 17: {str(e)}")
-                multiple_mri_count = 0
-                claim_ids = []
-            results["scenario17"] = {
-                "name": "Multiple MRI/CT Same Day",
-                "count": multiple_mri_count
-            }
-            logger.info("Scenario 17 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 17,
-                "scenario_name": "Multiple MRI/CT Same Day",
-                "anomalies_found": multiple_mri_count,
-                "threshold": "> 1 MRI/CT scan on same day for same diagnosis"
-            }})
-            if multiple_mri_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:20]):
-                    anomalies.append({
-                        "id": f"scenario17_mri_{idx}",
-                        "type": "Multiple MRI/CT Same Day",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"MRI_PROV_{idx + 1}",
-                        "provider_name": f"Imaging Provider {idx + 1}",
-                        "description": "Multiple MRI/CT procedures on same day for same diagnosis",
-                        "severity": "Medium",
-                        "service_date": "2024-02-12",
-                        "risk_score": 75,
-                        "billed_amount": 25000 + (idx * 2000)
-                    })
-        
-        if 18 in scenarios:
-            logger.info("Running Scenario 18: Placeholder Scenario")
-            try:
-                result = scenario18_module.run(file_path)
-                placeholder_count = result.get('placeholder_count', 0) if result else 0
-                claim_ids = result.get('claim_ids', []) if result else []
-            except Exception as e:
-                logger.error(f"Error in Scenario 18: {str(e)}")
-                placeholder_count = 0
-                claim_ids = []
-            results["scenario18"] = {
-                "name": "Placeholder Scenario",
-                "count": placeholder_count
-            }
-            logger.info("Scenario 18 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 18,
-                "scenario_name": "Placeholder Scenario",
-                "anomalies_found": placeholder_count,
-                "threshold": "N/A"
-            }})
-            # No anomalies generated for placeholder scenario
-        
-        if 19 in scenarios:
-            logger.info("Running Scenario 19: Multiple Screenings Same Year")
-            try:
-                result = scenario19_module.run(file_path)
-                multiple_screenings_count = result.get('multiple_screenings_count', 0) if result else 0
-                claim_ids = result.get('claim_ids', []) if result else []
-            except Exception as e:
-                logger.error(f"Error in Scenario 19: {str(e)}")
-                multiple_screenings_count = 0
-                claim_ids = []
-            results["scenario19"] = {
-                "name": "Multiple Screenings Same Year",
-                "count": multiple_screenings_count
-            }
-            logger.info("Scenario 19 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 19,
-                "scenario_name": "Multiple Screenings Same Year",
-                "anomalies_found": multiple_screenings_count,
-                "threshold": "> 1 screening of same type in a year"
-            }})
-            if multiple_screenings_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:22]):
-                    anomalies.append({
-                        "id": f"scenario19_screening_{idx}",
-                        "type": "Multiple Screenings Same Year",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"SCREEN_PROV_{idx + 1}",
-                        "provider_name": f"Screening Provider {idx + 1}",
-                        "description": "Member has multiple screenings in same year",
-                        "severity": "Medium",
-                        "service_date": "2024-02-15",
-                        "risk_score": 72,
-                        "billed_amount": 3500 + (idx * 300)
-                    })
-        
-        if 20 in scenarios:
-            logger.info("Running Scenario 20: Dialysis Without Kidney Diagnosis")
+        for scenario_id in sorted(flags):
+            scenario = get_scenario(scenario_id)
+            if scenario is None:
+                continue
+            old_flags = flags[scenario_id]
+            key = scenario.group_key
+            params = flag_params.get(scenario_id)
             try:
-                result = scenario20_module.run(file_path)
-                dialysis_count = result.get('dialysis_without_kidney_count', 0) if result else 0
-                claim_ids = result.get('claim_ids', []) if result else []
+                if scenario.row_local:
+                    # Each claim is judged on its own row, so only the appended claims need scoring
+                    result = scenario.run(delta, params)
+                    new_flags = unique_claim_ids(old_flags + unique_claim_ids(result.claim_ids))
+                else:
+                    if combined is None:
+                        combined = load_dataset_by_id(dataset_id, columns=required_columns_for(grouped))
+                    if key is not None and key in touched:
+                        # Claims are only compared within their group, so only touched groups can change
+                        affected = combined.filter_rows(combined.df[key].isin(touched[key]))
+                        result = scenario.run(affected, params)
+                        rescored = set(unique_claim_ids(affected.df['Claim_ID']))
+                        new_flags = unique_claim_ids([c for c in old_flags if c not in rescored] +
+                                                     unique_claim_ids(result.claim_ids))
+                    else:
+                        # Scenarios scored against the whole dataset (e.g. benefit z-scores) are re-run in full
+                        result = scenario.run(combined, params)
+                        new_flags = unique_claim_ids(result.claim_ids)
             except Exception as e:
-                logger.error(f"Error in Scenario 20: {str(e)}")
-                dialysis_count = 0
-                claim_ids = []
-            results["scenario20"] = {
-                "name": "Dialysis Without Kidney Diagnosis",
-                "count": dialysis_count
+                logger.error(f"Error rescoring Scenario {scenario_id} after append: {str(e)}")
+                del flags[scenario_id]
+                results[f"scenario{scenario_id}"] = {"error": str(e)}
+                continue
+            flags[scenario_id] = new_flags
+            old_set, new_set = set(old_flags), set(new_flags)
+            results[f"scenario{scenario_id}"] = {
+                "count": len(new_flags),
+                "added": len(new_set - old_set),
+                "removed": len(old_set - new_set),
             }
-            logger.info("Scenario 20 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 20,
-                "scenario_name": "Dialysis Without Kidney Diagnosis",
-                "anomalies_found": dialysis_count,
-                "threshold": "dialysis claim without kidney diagnosis"
-            }})
-            if dialysis_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:18]):
-                    anomalies.append({
-                        "id": f"scenario20_dialysis_{idx}",
-                        "type": "Dialysis Without Kidney Diagnosis",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"DIAL_PROV_{idx + 1}",
-                        "provider_name": f"Dialysis Provider {idx + 1}",
-                        "description": "Dialysis treatment without kidney/renal diagnosis",
-                        "severity": "High",
-                        "service_date": "2024-02-18",
-                        "risk_score": 89,
-                        "billed_amount": 15000 + (idx * 1100)
-                    })
         
-        if 21 in scenarios:
-            logger.info("Running Scenario 21: Unusual Dentistry Claims")
-            try:
-                result = scenario21_module.run(file_path)
-                dentistry_count = result.get('unusual_dentistry_count', 0) if result else 0
-                claim_ids = result.get('claim_ids', []) if result else []
-            except Exception as e:
-                logger.error(f"Error in Scenario 21: {str(e)}")
-                dentistry_count = 0
-                claim_ids = []
-            results["scenario21"] = {
-                "name": "Unusual Dentistry Claims",
-                "count": dentistry_count
-            }
-            logger.info("Scenario 21 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 21,
-                "scenario_name": "Unusual Dentistry Claims",
-                "anomalies_found": dentistry_count,
-                "threshold": "dentistry claim with non-dental diagnosis"
-            }})
-            if dentistry_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:16]):
-                    anomalies.append({
-                        "id": f"scenario21_dental_{idx}",
-                        "type": "Unusual Dentistry Claims",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"DENT_PROV_{idx + 1}",
-                        "provider_name": f"Dental Provider {idx + 1}",
-                        "description": "Dentistry claims with non-dental diagnosis codes",
-                        "severity": "Medium",
-                        "service_date": "2024-02-20",
-                        "risk_score": 73,
-                        "billed_amount": 2500 + (idx * 200)
-                    })
+        save_flags(dataset_id, content_hash, flags, flag_params)
         
-        if 22 in scenarios:
-            logger.info("Running Scenario 22: Invalid Migraine Claims")
-            try:
-                result = scenario22_module.run(file_path)
-                migraine_count = result.get('invalid_migraine_count', 0) if result else 0
-                claim_ids = result.get('claim_ids', []) if result else []
-            except Exception as e:
-                logger.error(f"Error in Scenario 22: {str(e)}")
-                migraine_count = 0
-                claim_ids = []
-            results["scenario22"] = {
-                "name": "Invalid Migraine Claims",
-                "count": migraine_count
-            }
-            logger.info("Scenario 22 finished.", extra={'extra_info': {
-                "event_type": "rule_detection",
-                "scenario_id": 22,
-                "scenario_name": "Invalid Migraine Claims",
-                "anomalies_found": migraine_count,
-                "threshold": "migraine diagnosis with invalid benefit code"
-            }})
-            if migraine_count > 0 and claim_ids:
-                for idx, claim_id in enumerate(claim_ids[:14]):
-                    anomalies.append({
-                        "id": f"scenario22_migraine_{idx}",
-                        "type": "Invalid Migraine Claims",
-                        "method": "Python Rules",
-                        "claim_id": claim_id,
-                        "provider_id": f"MIGR_PROV_{idx + 1}",
-                        "provider_name": f"Migraine Provider {idx + 1}",
-                        "description": "Migraine diagnosis with invalid benefit codes",
-                        "severity": "Medium",
-                        "service_date": "2024-02-22",
-                        "risk_score": 69,
-                        "billed_amount": 1800 + (idx * 150)
-                    })
-        
-        # Read the original data for returning to frontend
-        df = pd.read_csv(file_path, low_memory=False)
-        claims_data = df.head(1000).to_dict('records')  # Limit to 1000 records for performance
-        
-        # Ensure claims data has the required fields for frontend
-        for claim in claims_data:
-            # Add missing fields with defaults if they don't exist
-            if 'claim_id' not in claim and 'Claim_ID' not in claim:
-                claim['claim_id'] = f"CLAIM_{claims_data.index(claim) + 1}"
-            if 'provider_id' not in claim and 'Provider_ID' not in claim:
-                claim['provider_id'] = f"PROV_{claims_data.index(claim) + 1}"
-            if 'billed_amount' not in claim:
-                claim['billed_amount'] = 5000 + (claims_data.index(claim) * 100)
-            if 'service_date' not in claim:
-                claim['service_date'] = '2024-01-01'
-        
-        logger.info(f"Analysis complete. Claims: {len(claims_data)}, Anomalies: {len(anomalies)}")
-        logger.info(f"Results summary: {results}")
-        
-        # Add scenario metadata
-        scenario_metadata = {
-            "scenario1": {
-                "name": "Benefit Outlier Detection",
-                "description": "Identifies claims with unusual benefit amounts using statistical analysis",
-                "method": "Statistical Analysis",
-                "risk_level": "High"
-            },
-            "scenario2": {
-                "name": "Chemotherapy Gap Detection", 
-                "description": "Detects suspicious gaps in chemotherapy treatment sequences",
-                "method": "Pattern Analysis",
-                "risk_level": "High"
-            },
-            "scenario3": {
-                "name": "Cross-Country Fraud Detection",
-                "description": "Identifies patients with overlapping treatments in different countries",
-                "method": "Geographic Analysis", 
-                "risk_level": "Critical"
-            },
-            "scenario4": {
-                "name": "Sunday Claims Analysis",
-                "description": "Flags claims for treatments provided on Sundays",
-                "method": "Temporal Analysis",
-                "risk_level": "Medium"
-            },
-            "scenario5": {
-                "name": "Multiple Claims Same Invoice",
-                "description": "Detects multiple claims submitted with identical invoice reference numbers",
-                "method": "Invoice Analysis",
-                "risk_level": "High"
-            },
-            "scenario6": {
-                "name": "Inpatient/Outpatient Same Date",
-                "description": "Identifies patients with both inpatient and outpatient services on same date",
-                "method": "Service Type Analysis",
-                "risk_level": "High"
-            },
-            "scenario7": {
-                "name": "Provider Multi-Country",
-                "description": "Flags non-global providers operating in more than 3 countries",
-                "method": "Geographic Analysis",
-                "risk_level": "Medium"
-            },
-            "scenario8": {
-                "name": "Multiple Provider Same Date",
-                "description": "Detects patients visiting more than 2 providers on the same date",
-                "method": "Provider Overlap Analysis",
-                "risk_level": "Medium"
-            },
-            "scenario9": {
-                "name": "Member Multi-Currency",
-                "description": "Identifies members with claims in 3 or more different currencies",
-                "method": "Currency Pattern Analysis",
-                "risk_level": "Medium"
-            },
-            "scenario10": {
-                "name": "Gender-Procedure Mismatch",
-                "description": "Detects gender-specific procedures assigned to wrong gender",
-                "method": "Medical Validation",
-                "risk_level": "High"
-            },
-            "scenario11": {
-                "name": "Early Invoice Date",
-                "description": "Flags claims where invoice date is before treatment date",
-                "method": "Temporal Validation",
-                "risk_level": "High"
-            },
-            "scenario12": {
-                "name": "Adult Pediatric Diagnosis",
-                "description": "Identifies adults with pediatric/neonatal diagnoses",
-                "method": "Medical Code Analysis",
-                "risk_level": "High"
-            },
-            "scenario13": {
-                "name": "Multiple Payee Types",
-                "description": "Flags same member with different payee types on same invoice date",
-                "method": "Billing Analysis",
-                "risk_level": "Medium"
-            },
-            "scenario14": {
-                "name": "Excessive Diagnoses",
-                "description": "Detects members with more than 8 diagnoses on same day",
-                "method": "Medical Complexity Analysis",
-                "risk_level": "Medium"
-            },
-            "scenario15": {
-                "name": "Hospital Benefits from Non-Hospital Providers",
-                "description": "Flags non-hospital providers using hospital-only benefit codes",
-                "method": "Benefit Code Validation",
-                "risk_level": "High"
-            },
-            "scenario16": {
-                "name": "Paid Claims from Veterinary Providers",
-                "description": "Flags paid claims from specific veterinary providers",
-                "method": "Provider Type Validation",
-                "risk_level": "High"
-            },
-            "scenario17": {
-                "name": "Multiple MRI/CT Same Day",
-                "description": "Detects multiple MRI/CT procedures on same day for same diagnosis",
-                "method": "Procedure Utilization Analysis",
-                "risk_level": "Medium"
-            },
-            "scenario18": {
-                "name": "Placeholder Scenario",
-                "description": "Placeholder for future fraud detection scenario",
-                "method": "Placeholder Analysis",
-                "risk_level": "Low"
-            },
-            "scenario19": {
-                "name": "Multiple Screenings Same Year",
-                "description": "Flags members with multiple screenings in same year",
-                "method": "Screening Frequency Analysis",
-                "risk_level": "Medium"
-            },
-            "scenario20": {
-                "name": "Dialysis Without Kidney Diagnosis",
-                "description": "Flags dialysis claims without kidney/renal diagnoses",
-                "method": "Medical Code Validation",
-                "risk_level": "High"
-            },
-            "scenario21": {
-                "name": "Unusual Dentistry Claims",
-                "description": "Flags dentistry claims with non-dental diagnosis codes",
-                "method": "Specialty Code Validation",
-                "risk_level": "Medium"
-            },
-            "scenario22": {
-                "name": "Invalid Migraine Claims",
-                "description": "Flags migraine diagnoses with invalid benefit codes",
-                "method": "Diagnosis-Benefit Validation",
-                "risk_level": "Medium"
+        return jsonify({
+            "message": "File appended successfully",
+            "dataset_id": dataset_id,
+            "content_hash": content_hash,
+            "rows_appended": len(delta),
+            "rows": manifest["rows"],
+            "touched": {key: len(values) for key, values in touched.items()},
+            "results": results
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error appending to dataset {dataset_id}: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({"error": str(e)}), 500
+
+def run_rule_analysis(dataset_id, dataset_info, scenarios, scenario_params, chunked=None, parallel=None,
+                      on_scenario=None):
+    """
+    Run the selected scenarios on a stored dataset and build the /api/analyze response.
+    chunked and parallel default to what suits the dataset; on_scenario(scenario_id, result, error)
+    is called as each scenario finishes.
+    """
+    # Large uploads run the row-local scenarios batch by batch instead of loading the file
+    if chunked is None:
+        chunked = dataset_info["size_bytes"] >= CHUNKED_MODE_MIN_BYTES
+    chunked_scenarios = CHUNKED_SCENARIOS.intersection(scenarios) if chunked else set()
+    selected = [scenario_id for scenario_id in SCENARIOS if scenario_id in scenarios]
+    
+    for scenario_id in selected:
+        logger.info(f"Running Scenario {scenario_id}: {SCENARIOS[scenario_id].name}")
+    
+    # Flagged Claim_IDs are kept per scenario, with the parameters they were computed under,
+    # so an append can update them incrementally
+    flags = {}
+    flag_params = {}
+    outcomes = {}
+    for scenario_id, result, error in run_scenarios(selected, dataset_id, chunked_scenarios, parallel=parallel,
+                                                    params=scenario_params):
+        if on_scenario is not None:
+            on_scenario(scenario_id, result, error)
+        if error is not None:
+            logger.error(f"Error in Scenario {scenario_id}: {str(error)}")
+            result = ScenarioResult(scenario_id, 0, [])
+        else:
+            flags[scenario_id] = unique_claim_ids(result.claim_ids)
+            flag_params[scenario_id] = SCENARIOS[scenario_id].effective_params(scenario_params.get(scenario_id))
+        outcomes[scenario_id] = result
+    
+    results = {}
+    anomalies = []
+    
+    # Report the selected scenarios in registry order, whatever order they finished in
+    for scenario_id in selected:
+        scenario = SCENARIOS[scenario_id]
+        result = outcomes[scenario_id]
+        results[f"scenario{scenario_id}"] = {
+            "name": scenario.name,
+            "count": result.count
+        }
+        logger.info(f"Scenario {scenario_id} finished.", extra={'extra_info': {
+            "event_type": "rule_detection",
+            "scenario_id": scenario_id,
+            "scenario_name": scenario.name,
+            "anomalies_found": result.count,
+            "threshold": scenario.threshold
+        }})
+        anomalies.extend(scenario.anomalies(result))
+    
+    stored_flags, stored_params = load_flags(dataset_id, dataset_info["content_hash"])
+    stored_flags.update(flags)
+    stored_params.update(flag_params)
+    save_flags(dataset_id, dataset_info["content_hash"], stored_flags, stored_params)
+    
+    # Read the original data for returning to frontend
+    claims_data = load_dataset_by_id(dataset_id, nrows=1000).head_records(1000)  # Limit to 1000 records for performance
+    
+    # Ensure claims data has the required fields for frontend
+    for claim in claims_data:
+        # Add missing fields with defaults if they don't exist
+        if 'claim_id' not in claim and 'Claim_ID' not in claim:
+            claim['claim_id'] = f"CLAIM_{claims_data.index(claim) + 1}"
+        if 'provider_id' not in claim and 'Provider_ID' not in claim:
+            claim['provider_id'] = f"PROV_{claims_data.index(claim) + 1}"
+        if 'billed_amount' not in claim:
+            claim['billed_amount'] = 5000 + (claims_data.index(claim) * 100)
+        if 'service_date' not in claim:
+            claim['service_date'] = '2024-01-01'
+    
+    logger.info(f"Analysis complete. Claims: {len(claims_data)}, Anomalies: {len(anomalies)}")
+    logger.info(f"Results summary: {results}")
+    
+    # Add scenario metadata
+    scenario_metadata = {f"scenario{scenario_id}": scenario.metadata() for scenario_id, scenario in SCENARIOS.items()}
+    
+    return {
+        "results": results,
+        "claimsData": claims_data,
+        "anomaliesData": anomalies,
+        "anomalies": anomalies,  # Keep both for compatibility
+        "scenarioMetadata": scenario_metadata,
+        "summary": {
+            "total_claims_analyzed": dataset_info["rows"],
+            "total_anomalies_found": len(anomalies),
+            "scenarios_run": len([s for s in scenarios if s in results]),
+            "high_risk_anomalies": len([a for a in anomalies if a.get('risk_score', 0) >= 75]),
+            "actual_scenario_counts": {
+                f"scenario{scenario_id}_total": results.get(f"scenario{scenario_id}", {}).get("count", 0)
+                for scenario_id in SCENARIOS
             }
         }
+    }
+
+
+class AnalysisJob(ProcessingStatus):
+    """
+    Status of an asynchronous /api/analyze run: one step per selected scenario, and each
+    scenario's count, flagged claims and elapsed time (seconds from the start of the job, as
+    scenarios run side by side) kept as soon as that scenario finishes.
+    The job thread updates it while request threads read it, so both go through its lock.
+    """
+
+    def __init__(self, job_id, dataset_id, scenario_ids):
+        super().__init__(job_id)
+        self.dataset_id = dataset_id
+        self.total_steps = len(scenario_ids)
+        self.current_message = 'Waiting for the first fraud check to finish'
+        self.scenarios = {scenario_id: {"name": SCENARIOS[scenario_id].name, "status": "pending"}
+                          for scenario_id in scenario_ids}
+        self.outcomes = {}
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def finish_scenario(self, scenario_id, result, error):
+        with self.lock:
+            entry = {"name": self.scenarios[scenario_id]["name"],
+                     "elapsed": round(time.perf_counter() - self.started, 3)}
+            if error is not None:
+                entry.update(status="error", error=str(error))
+            else:
+                entry.update(status="completed", count=result.count)
+                self.outcomes[scenario_id] = result
+            self.scenarios[scenario_id] = entry
+            self.current_step += 1
+            self.current_message = f"{entry['name']} finished"
+            self.business_explanation = f"{self.current_step} of {self.total_steps} fraud checks complete"
+
+    def complete(self, results):
+        with self.lock:
+            self.set_results(results)
+            self.current_step = self.total_steps
+            self.status = 'completed'
+
+    def scenario_progress(self):
+        with self.lock:
+            return {f"scenario{scenario_id}": dict(entry) for scenario_id, entry in self.scenarios.items()}
+
+    def scenario(self, scenario_id):
+        """A copy of one scenario's entry, and its result once it has completed."""
+        with self.lock:
+            return dict(self.scenarios[scenario_id]), self.outcomes.get(scenario_id)
+
+
+def run_analysis_job(job, dataset_info, scenarios, scenario_params, chunked, parallel):
+    """Background thread of an asynchronous /api/analyze run."""
+    try:
+        job.complete(run_rule_analysis(job.dataset_id, dataset_info, scenarios, scenario_params, chunked, parallel,
+                                       on_scenario=job.finish_scenario))
+        logger.info("Rule analysis job finished.", extra={'extra_info': {
+            "event_type": "rule_detection_complete",
+            "job_id": job.job_id,
+            "seconds": round(time.perf_counter() - job.started, 3)
+        }})
+    except Exception as e:
+        logger.error(f"Error in analysis job {job.job_id}: {str(e)}")
+        logger.error(traceback.format_exc())
+        job.set_error(e)
+
+@app.route('/api/analyze', methods=['POST'])
+def analyze_data():
+    try:
+        # Get analysis parameters
+        data = request.json
+        scenarios_input = data.get('scenarios', [1, 2, 3, 4])  # Default to all scenarios
+        dataset_id = data.get('dataset_id')
+        
+        # Scenarios may be given as numbers or as 'scenario-N' names
+        scenarios = [scenario_id_from(scenario) for scenario in scenarios_input]
+        scenarios = [scenario_id for scenario_id in scenarios if scenario_id is not None]
+        # Optional per-scenario parameter overrides, keyed like the scenario list,
+        # e.g. {"1": {"baseline": "history"}} scores Scenario 1 against every stored upload
+        scenario_params = {scenario_id_from(key): value for key, value in (data.get('params') or {}).items()}
+        
+        dataset_info = get_dataset_info(dataset_id)
+        if dataset_info is None:
+            return jsonify({"error": "Dataset not found. Please upload a file first."}), 404
+        
+        # With "async": true the analysis runs as a job, like /api/analyze/ml: poll /api/status/<job_id>
+        # for per-scenario progress and read each scenario's claims as soon as it finishes
+        if data.get('async'):
+            evict_finished_jobs()
+            job_id = str(uuid.uuid4())
+            selected = [scenario_id for scenario_id in SCENARIOS if scenario_id in scenarios]
+            job = AnalysisJob(job_id, dataset_id, selected)
+            processing_status[job_id] = job
+            logger.info("Rule analysis started.", extra={'extra_info': {
+                "event_type": "rule_detection_start",
+                "job_id": job_id,
+                "dataset_id": dataset_id,
+                "scenarios": selected
+            }})
+            thread = threading.Thread(target=run_analysis_job, args=(
+                job, dataset_info, scenarios, scenario_params, data.get('chunked'), data.get('parallel')))
+            thread.daemon = True
+            thread.start()
+            return jsonify({
+                'job_id': job_id,
+                'message': 'Rule analysis started.',
+                'scenarios': job.scenario_progress()
+            })
         
-        return jsonify({
-            "results": results,
-            "claimsData": claims_data,
-            "anomaliesData": anomalies,
-            "anomalies": anomalies,  # Keep both for compatibility
-            "scenarioMetadata": scenario_metadata,
-            "summary": {
-                "total_claims_analyzed": len(df),
-                "total_anomalies_found": len(anomalies),
-                "scenarios_run": len([s for s in scenarios if s in results]),
-                "high_risk_anomalies": len([a for a in anomalies if a.get('risk_score', 0) >= 75]),
-                "actual_scenario_counts": {
-                    "scenario1_total": results.get("scenario1", {}).get("count", 0),
-                    "scenario2_total": results.get("scenario2", {}).get("count", 0), 
-                    "scenario3_total": results.get("scenario3", {}).get("count", 0),
-                    "scenario4_total": results.get("scenario4", {}).get("count", 0),
-                    "scenario5_total": results.get("scenario5", {}).get("count", 0),
-                    "scenario6_total": results.get("scenario6", {}).get("count", 0),
-                    "scenario7_total": results.get("scenario7", {}).get("count", 0),
-                    "scenario8_total": results.get("scenario8", {}).get("count", 0),
-                    "scenario9_total": results.get("scenario9", {}).get("count", 0),
-                    "scenario10_total": results.get("scenario10", {}).get("count", 0),
-                    "scenario11_total": results.get("scenario11", {}).get("count", 0),
-                    "scenario12_total": results.get("scenario12", {}).get("count", 0),
-                    "scenario13_total": results.get("scenario13", {}).get("count", 0),
-                    "scenario14_total": results.get("scenario14", {}).get("count", 0),
-                    "scenario15_total": results.get("scenario15", {}).get("count", 0),
-                    "scenario16_total": results.get("scenario16", {}).get("count", 0),
-                    "scenario17_total": results.get("scenario17", {}).get("count", 0),
-                    "scenario18_total": results.get("scenario18", {}).get("count", 0),
-                    "scenario19_total": results.get("scenario19", {}).get("count", 0),
-                    "scenario20_total": results.get("scenario20", {}).get("count", 0),
-                    "scenario21_total": results.get("scenario21", {}).get("count", 0),
-                    "scenario22_total": results.get("scenario22", {}).get("count", 0)
-                }
-            }
-        }), 200
+        return jsonify(run_rule_analysis(dataset_id, dataset_info, scenarios, scenario_params,
+                                         data.get('chunked'), data.get('parallel'))), 200
     
     except Exception as e:
         logger.error(f"Error in analysis: {str(e)}")
@@ -1391,25 +675,26 @@ def analyze_ml():
     """Handle file upload and start ML processing"""
     try:
         data = request.get_json()
-        file_path = data.get('file_path', os.path.join(UPLOAD_FOLDER, "temp_upload.csv"))
+        dataset_id = data.get('dataset_id')
         
-        if not os.path.exists(file_path):
-            return jsonify({'error': 'File not found. Please upload a file first.'}), 400
+        if get_dataset_info(dataset_id) is None:
+            return jsonify({'error': 'Dataset not found. Please upload a file first.'}), 404
         
+        evict_finished_jobs()
         # Generate unique job ID
         job_id = str(uuid.uuid4())
         
         logger.info("ML analysis started.", extra={'extra_info': {
             "event_type": "ml_detection_start",
             "job_id": job_id,
-            "file_path": file_path
+            "dataset_id": dataset_id
         }})
         
         # Initialize processing status
         processing_status[job_id] = ProcessingStatus(job_id)
         
         # Start processing in background thread
-        thread = threading.Thread(target=run_fraud_detection, args=(file_path, job_id))
+        thread = threading.Thread(target=run_fraud_detection, args=(dataset_id, job_id))
         thread.daemon = True
         thread.start()
         
@@ -1424,11 +709,10 @@ def analyze_ml():
 @app.route('/api/status/<job_id>')
 def get_status(job_id):
     """Get processing status"""
-    if job_id not in processing_status:
+    status = processing_status.get(job_id)
+    if status is None:
         return jsonify({'error': 'Job not found'}), 404
     
-    status = processing_status[job_id]
-    
     response = {
         'job_id': job_id,
         'status': status.status,
@@ -1436,8 +720,11 @@ def get_status(job_id):
         'total_steps': status.total_steps,
         'current_message': status.current_message,
         'business_explanation': status.business_explanation,
-        'progress': (status.current_step / status.total_steps) * 100
+        'progress': (status.current_step / status.total_steps) * 100 if status.total_steps else 100
     }
+    # Rule analysis jobs also report each scenario's state, count and timing as it finishes
+    if isinstance(status, AnalysisJob):
+        response['scenarios'] = status.scenario_progress()
     
     if status.status == 'completed' and status.results:
         response['results'] = status.results
@@ -1446,13 +733,30 @@ def get_status(job_id):
     
     return jsonify(response)
 
+@app.route('/api/status/<job_id>/scenario/<int:scenario_id>')
+def get_job_scenario(job_id, scenario_id):
+    """One scenario of a rule analysis job, with its flagged claims as soon as it has finished."""
+    job = processing_status.get(job_id)
+    if not isinstance(job, AnalysisJob):
+        return jsonify({'error': 'Analysis job not found'}), 404
+    if scenario_id not in job.scenarios:
+        return jsonify({'error': f'Scenario {scenario_id} is not part of this job'}), 404
+    
+    entry, result = job.scenario(scenario_id)
+    response = {'job_id': job_id, 'scenario_id': scenario_id, **entry}
+    if result is not None:
+        response['claim_ids'] = unique_claim_ids(result.claim_ids)
+        response['anomalies'] = SCENARIOS[scenario_id].anomalies(result)
+    return jsonify(response)
+
 @app.route('/api/download/<job_id>')
 def download_results(job_id):
     """Download results as CSV"""
-    if job_id not in processing_status:
+    status = processing_status.get(job_id)
+    if status is None:
         return jsonify({'error': 'Job not found'}), 404
-    
-    status = processing_status[job_id]
+    if isinstance(status, AnalysisJob):
+        return jsonify({'error': 'Downloads are only available for ML jobs'}), 400
     if status.status != 'completed' or not status.results:
         return jsonify({'error': 'Results not ready'}), 400
     
@@ -1469,274 +773,148 @@ def download_results(job_id):
 @app.route('/api/scenario/<int:scenario_id>', methods=['GET'])
 def get_scenario_details(scenario_id):
     try:
-        file_path = os.path.join(UPLOAD_FOLDER, "temp_upload.csv")
+        dataset_id = request.args.get('dataset_id')
         
-        if not os.path.exists(file_path):
-            return jsonify({"error": "No uploaded file found. Please upload a file first."}), 400
+        if get_dataset_info(dataset_id) is None:
+            return jsonify({"error": "Dataset not found. Please upload a file first."}), 404
         
-        if scenario_id == 1:
-            detector = BenefitOutlierDetector(file_path)
-            detector.load_and_prepare_data()
-            detector.calculate_incident_amounts()
-            outliers = detector.find_outliers()
-            return jsonify({
-                "name": "Benefit Outlier Detection",
-                "description": "Detects outliers in benefit claims based on statistical analysis",
-                "results": outliers.to_dict('records') if outliers is not None and not outliers.empty else []
-            }), 200
-            
-        elif scenario_id == 2:
-            detector = ChemoGapDetector(file_path)
-            gap_results = detector.run()
-            return jsonify({
-                "name": "Chemotherapy Gap Detection",
-                "description": "Identifies suspicious gaps in chemotherapy treatment sequences",
-                "results": gap_results.to_dict('records') if gap_results is not None and not gap_results.empty else []
-            }), 200
-            
-        elif scenario_id == 3:
-            detector = CrossCountryFraudDetector(file_path)
-            detector.run()
-            anomalies = detector.find_anomalies()
-            return jsonify({
-                "name": "Cross-Country Fraud Detection",
-                "description": "Detects potential fraud where a patient has overlapping treatments in different countries",
-                "results": anomalies.to_dict('records') if anomalies is not None and not anomalies.empty else []
-            }), 200
-            
-        elif scenario_id == 4:
-            analyzer = SundayClaimsAnalyzer(file_path)
-            analyzer.run_analysis()
-            return jsonify({
-                "name": "Sunday Claims Analysis",
-                "description": "Identifies claims that include treatment on Sundays, which may indicate fraud",
-                "results": analyzer.sunday_claims.to_dict('records') if hasattr(analyzer, 'sunday_claims') and analyzer.sunday_claims is not None and not analyzer.sunday_claims.empty else []
-            }), 200
-            
-        elif scenario_id == 5:
-            checker = MultipleClaimsInvoiceChecker(file_path)
-            result_df = checker.run()
-            return jsonify({
-                "name": "Multiple Claims Same Invoice",
-                "description": "Detects multiple claims submitted with identical invoice reference numbers",
-                "results": result_df.to_dict('records') if result_df is not None and not result_df.empty else []
-            }), 200
-            
-        elif scenario_id == 6:
-            detector = Scenario6OutlierDetector(file_path)
-            detector.load_and_prepare_data()
-            detector.find_outliers()
-            return jsonify({
-                "name": "Inpatient/Outpatient Same Date",
-                "description": "Identifies patients with both inpatient and outpatient services on same date",
-                "results": detector.outliers.to_dict('records') if detector.outliers is not None and not detector.outliers.empty else []
-            }), 200
-            
-        elif scenario_id == 7:
-            analyzer = Scenario7Analyzer(file_path)
-            analyzer.analyze()
-            try:
-                flagged_df = pd.read_csv("Scenario-7_outliers.csv")
-                results = flagged_df.to_dict('records')
-            except:
-                results = []
-            return jsonify({
-                "name": "Provider Multi-Country",
-                "description": "Flags non-global providers operating in more than 3 countries",
-                "results": results
-            }), 200
-            
-        elif scenario_id == 8:
-            analyzer = Scenario8Analyzer(file_path)
-            flagged_claims = analyzer.analyze()
-            return jsonify({
-                "name": "Multiple Provider Same Date",
-                "description": "Detects patients visiting more than 2 providers on the same date",
-                "results": flagged_claims.to_dict('records') if flagged_claims is not None and not flagged_claims.empty else []
-            }), 200
-            
-        elif scenario_id == 9:
-            analyzer = Scenario9Analyzer(file_path)
-            flagged_members, associated_claims = analyzer.analyze()
-            return jsonify({
-                "name": "Member Multi-Currency",
-                "description": "Identifies members with claims in 3 or more different currencies",
-                "results": associated_claims.to_dict('records') if associated_claims is not None and not associated_claims.empty else []
-            }), 200
-            
-        elif scenario_id == 10:
-            analyzer = Scenario10Analyzer(file_path)
-            analyzer.analyze()
-            try:
-                flagged_df = pd.read_csv("Scenario-10_outliers.csv")
-                results = flagged_df.to_dict('records')
-            except:
-                results = []
-            return jsonify({
-                "name": "Gender-Procedure Mismatch",
-                "description": "Detects gender-specific procedures assigned to wrong gender",
-                "results": results
-            }), 200
-            
-        elif scenario_id == 11:
-            analyzer = Scenario11Analyzer(file_path)
-            analyzer.analyze()
-            try:
-                flagged_df = pd.read_csv("Scenario-11_outliers.csv")
-                results = flagged_df.to_dict('records')
-            except:
-                results = []
-            return jsonify({
-                "name": "Early Invoice Date",
-                "description": "Flags claims where invoice date is before treatment date",
-                "results": results
-            }), 200
-            
-        elif scenario_id == 12:
-            analyzer = Scenario12Analyzer(file_path)
-            flagged_claims = analyzer.analyze()
-            return jsonify({
-                "name": "Adult Pediatric Diagnosis",
-                "description": "Identifies adults with pediatric/neonatal diagnoses",
-                "results": flagged_claims.to_dict('records') if flagged_claims is not None and not flagged_claims.empty else []
-            }), 200
-            
-        elif scenario_id == 13:
-            analyzer = Scenario13Analyzer(file_path)
-            flagged_claims = analyzer.analyze()
-            return jsonify({
-                "name": "Multiple Payee Types",
-                "description": "Flags same member with different payee types on same invoice date",
-                "results": flagged_claims.to_dict('records') if flagged_claims is not None and not flagged_claims.empty else []
-            }), 200
-            
-        elif scenario_id == 14:
-            analyzer = Scenario14Analyzer(file_path)
-            analyzer.run()
-            try:
-                flagged_df = pd.read_csv("Scenario-14_outliers.csv")
-                results = flagged_df.to_dict('records')
-            except:
-                results = []
-            return jsonify({
-                "name": "Excessive Diagnoses",
-                "description": "Detects members with more than 8 diagnoses on same day",
-                "results": results
-            }), 200
-            
-        elif scenario_id == 15:
-            validator = HospitalBenefitValidator(file_path)
-            validator.run()
-            try:
-                flagged_df = pd.read_csv("Scenario-15_outliers.csv")
-                results = flagged_df.to_dict('records')
-            except:
-                results = []
-            return jsonify({
-                "name": "Hospital Benefits from Non-Hospital Providers",
-                "description": "Flags non-hospital providers using hospital-only benefit codes",
-                "results": results
-            }), 200
-            
-        elif scenario_id == 16:
-            validator = PaidVeterinaryClaimValidator(file_path)
-            validator.run()
-            try:
-                flagged_df = pd.read_csv("Scenario-16_outliers.csv")
-                results = flagged_df.to_dict('records')
-            except:
-                results = []
-            return jsonify({
-                "name": "Paid Claims from Veterinary Providers",
-                "description": "Flags paid claims from specific veterinary providers",
-                "results": results
-            }), 200
-            
-        elif scenario_id == 17:
-            analyzer = Scenario17Analyzer(file_path)
-            analyzer.analyze()
-            try:
-                flagged_df = pd.read_csv("Scenario-17_outliers.csv")
-                results = flagged_df.to_dict('records')
-            except:
-                results = []
-            return jsonify({
-                "name": "Multiple MRI/CT Same Day",
-                "description": "Detects multiple MRI/CT procedures on same day for same diagnosis",
-                "results": results
-            }), 200
-            
-        elif scenario_id == 18:
-            analyzer = Scenario18Analyzer(file_path)
-            analyzer.analyze()
-            return jsonify({
-                "name": "Placeholder Scenario",
-                "description": "Placeholder for future fraud detection scenario",
-                "results": []
-            }), 200
-            
-        elif scenario_id == 19:
-            analyzer = Scenario19Analyzer(file_path)
-            analyzer.analyze()
-            try:
-                flagged_df = pd.read_csv("Scenario-19_outliers.csv")
-                results = flagged_df.to_dict('records')
-            except:
-                results = []
-            return jsonify({
-                "name": "Multiple Screenings Same Year",
-                "description": "Flags members with multiple screenings in same year",
-                "results": results
-            }), 200
-            
-        elif scenario_id == 20:
-            analyzer = Scenario20Analyzer(file_path)
-            analyzer.analyze()
-            try:
-                flagged_df = pd.read_csv("Scenario-20_outliers.csv")
-                results = flagged_df.to_dict('records')
-            except:
-                results = []
-            return jsonify({
-                "name": "Dialysis Without Kidney Diagnosis",
-                "description": "Flags dialysis claims without kidney/renal diagnoses",
-                "results": results
-            }), 200
-            
-        elif scenario_id == 21:
-            analyzer = Scenario21Analyzer(file_path)
-            analyzer.analyze()
-            try:
-                flagged_df = pd.read_csv("Scenario-21_outliers.csv")
-                results = flagged_df.to_dict('records')
-            except:
-                results = []
-            return jsonify({
-                "name": "Unusual Dentistry Claims",
-                "description": "Flags dentistry claims with non-dental diagnosis codes",
-                "results": results
-            }), 200
-            
-        elif scenario_id == 22:
-            result = scenario22_module.run(file_path)
-            try:
-                flagged_df = pd.read_csv("Scenario-22_outliers.csv")
-                results = flagged_df.to_dict('records')
-            except:
-                results = []
-            return jsonify({
-                "name": "Invalid Migraine Claims",
-                "description": "Flags migraine diagnoses with invalid benefit codes",
-                "results": results
-            }), 200
-            
-        else:
+        scenario = get_scenario(scenario_id)
+        if scenario is None:
             return jsonify({"error": f"Scenario {scenario_id} not found"}), 404
+        
+        # Query arguments other than the dataset override the scenario's parameters
+        params = {key: value for key, value in request.args.items() if key != 'dataset_id'}
+        return jsonify({
+            "name": scenario.name,
+            "description": scenario.description,
+            "results": scenario_details(scenario_id, dataset_id, params)
+        }), 200
     
+    except ValueError as e:
+        return jsonify({"error": f"Invalid parameter: {e}"}), 400
     except Exception as e:
         logger.error(f"Error in scenario {scenario_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/scenario/<int:scenario_id>/rescore', methods=['GET'])
+def rescore_scenario_thresholds(scenario_id):
+    """Re-apply a group scenario's thresholds (query arguments) to its stored per-group statistic."""
+    try:
+        dataset_id = request.args.get('dataset_id')
+
+        if get_dataset_info(dataset_id) is None:
+            return jsonify({"error": "Dataset not found. Please upload a file first."}), 404
+
+        scenario = get_scenario(scenario_id)
+        if scenario is None:
+            return jsonify({"error": f"Scenario {scenario_id} not found"}), 404
+        if not scenario.rescorable:
+            return jsonify({"error": f"Scenario {scenario_id} has no thresholds to re-evaluate",
+                            "rescorable": [s for s, entry in SCENARIOS.items() if entry.rescorable]}), 400
+
+        # Query arguments other than the dataset override the scenario's thresholds
+        params = {key: value for key, value in request.args.items() if key != 'dataset_id'}
+        unknown = sorted(set(params) - set(scenario.params))
+        if unknown:
+            return jsonify({"error": f"Unknown parameters {unknown}", "params": scenario.params}), 400
+
+        result = rescore_scenario(scenario_id, dataset_id, params)
+        return jsonify({
+            "name": scenario.name,
+            "params": scenario.effective_params(params),
+            "count": result.count,
+            "claim_ids": result.claim_ids
+        }), 200
+
+    except ValueError as e:
+        return jsonify({"error": f"Invalid threshold: {e}"}), 400
+    except Exception as e:
+        logger.error(f"Error rescoring scenario {scenario_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/score', methods=['POST'])
+def score_new_claims():
+    """
+    Score one new claim ("claim") or a small batch ("claims") against a stored dataset as
+    their history, with every scenario that can evaluate claims without re-reading it.
+    Scenarios reading a column the claims do not carry are reported as not evaluated.
+    """
+    try:
+        data = request.json or {}
+        dataset_id = data.get('dataset_id')
+
+        dataset_info = get_dataset_info(dataset_id)
+        if dataset_info is None:
+            return jsonify({"error": "Dataset not found. Please upload a file first."}), 404
+
+        records = data.get('claims', [data['claim']] if 'claim' in data else None)
+        if not isinstance(records, list) or not records or not all(isinstance(record, dict) for record in records):
+            return jsonify({"error": "Send a claim object as 'claim' or a list of them as 'claims'"}), 400
+        if len(records) > SCORE_MAX_CLAIMS:
+            return jsonify({"error": f"At most {SCORE_MAX_CLAIMS} claims can be scored per request"}), 400
+
+        # Claims use the headers of an extract (or their canonical names) and the history's date format
+        claims = ClaimsDataset.from_frame(pd.DataFrame.from_records(records), date_format=dataset_info.get("date_format"))
+        if 'Claim_ID' not in claims.df.columns or claims.df['Claim_ID'].isna().any():
+            return jsonify({"error": "Every claim needs a Claim_ID"}), 400
+
+        # Every scenario that can score new claims, unless the request names some
+        requested = [scenario_id_from(scenario) for scenario in data.get('scenarios', list(SCENARIOS))]
+        requested = [scenario_id for scenario_id in SCENARIOS if scenario_id in requested]
+        scenarios = [scenario_id for scenario_id in requested if SCENARIOS[scenario_id].scores_claims]
+        scenario_params = {scenario_id_from(key): value for key, value in (data.get('params') or {}).items()}
+        # A scenario is only evaluated on claims that carry every column it reads; otherwise it
+        # would fail on the missing column, or report the claims as unflagged
+        missing_columns = {}
+        for scenario_id in scenarios:
+            missing = [col for col in source_columns_for(SCENARIOS[scenario_id].required_columns)
+                       if col not in claims.columns]
+            if missing:
+                missing_columns[scenario_id] = missing
+        scenarios = [scenario_id for scenario_id in scenarios if scenario_id not in missing_columns]
+
+        started = time.perf_counter()
+        outcomes = score_claims(dataset_id, claims, scenarios, scenario_params)
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        flagged_by = {claim_id: [] for claim_id in unique_claim_ids(claims.df['Claim_ID'])}
+        results, errors = {}, {}
+        for scenario_id, (result, error) in outcomes.items():
+            if error is not None:
+                logger.error(f"Error scoring Scenario {scenario_id}: {str(error)}")
+                errors[f"scenario{scenario_id}"] = str(error)
+                continue
+            claim_ids = unique_claim_ids(result.claim_ids)
+            results[f"scenario{scenario_id}"] = {"name": SCENARIOS[scenario_id].name, "count": result.count,
+                                                 "claim_ids": claim_ids}
+            for claim_id in claim_ids:
+                flagged_by.setdefault(claim_id, []).append(scenario_id)
+
+        logger.info(f"Scored {len(claims)} claims against dataset {dataset_id} in {elapsed_ms} ms", extra={'extra_info': {
+            "event_type": "claim_scoring",
+            "dataset_id": dataset_id,
+            "claims_scored": len(claims),
+            "claims_flagged": len([claim_id for claim_id, flagged in flagged_by.items() if flagged]),
+            "elapsed_ms": elapsed_ms
+        }})
+        return jsonify({
+            "dataset_id": dataset_id,
+            "claims": [{"claim_id": claim_id, "flagged": bool(scenario_ids), "scenarios": scenario_ids}
+                       for claim_id, scenario_ids in flagged_by.items()],
+            "results": results,
+            "errors": errors,
+            "not_scored": [scenario_id for scenario_id in requested
+                           if not SCENARIOS[scenario_id].scores_claims],
+            "not_evaluated": {f"scenario{scenario_id}": {"missing_columns": missing}
+                              for scenario_id, missing in missing_columns.items()},
+            "elapsed_ms": elapsed_ms
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error scoring claims: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({"error": str(e)}), 500
+
 if __name__ == '__main__':
     logger.info("Starting Flask API server on port 5001")
     app.run(debug=True, host='0.0.0.0', port=5001)
@@ -0,0 +1,31 @@
+"""
+Calendar checks over treatment spans, evaluated for all claims at once.
+
+A span [start, end] covers the days start, start + 1 day, ... up to end (what
+pd.date_range(start, end) enumerates). Whether it covers a given weekday follows from the
+start's weekday and the number of days covered alone, so no per-claim date range is built.
+"""
+import numpy as np
+import pandas as pd
+
+# pandas dayofweek numbering
+MONDAY, TUESDAY, WEDNESDAY, THURSDAY, FRIDAY, SATURDAY, SUNDAY = range(7)
+
+
+def span_days(starts, ends) -> np.ndarray:
+    """Days covered by each span (0 if it ends before it starts, NaN if a bound is missing)."""
+    starts = pd.Series(pd.to_datetime(starts)).reset_index(drop=True)
+    ends = pd.Series(pd.to_datetime(ends)).reset_index(drop=True)
+    days = ((ends - starts) // pd.Timedelta(days=1)).to_numpy(dtype=float) + 1
+    return np.maximum(days, 0)
+
+
+def span_contains_weekday(starts, ends, weekday: int) -> np.ndarray:
+    """
+    Whether each span covers a day falling on weekday (MONDAY=0 ... SUNDAY=6).
+    Spans with a missing bound cover no days.
+    """
+    start_weekday = pd.Series(pd.to_datetime(starts)).dt.dayofweek.to_numpy(dtype=float)
+    # Days from the start to the first day falling on weekday
+    offset = (weekday - start_weekday) % 7
+    return offset < span_days(starts, ends)
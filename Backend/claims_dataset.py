@@ -0,0 +1,302 @@
+import os
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from group_index import GroupIndex
+
+logger = logging.getLogger(__name__)
+
+# Canonical column name -> header variants seen across claim extracts (first match wins)
+COLUMN_ALIASES = {
+    'Claim_ID': ['Claim ID', 'claim_id', 'ClaimID'],
+    'Member_ID': ['Member ID', 'member_id', 'MemberID'],
+    'Treatment_from_date': ['Treatment from date', 'treatment_from_date', 'treatment_from', 'service_date'],
+    'Treatment_to_date': ['Treatment to date', 'treatment_to_date'],
+    'Paid_amount': ['Paid amount', 'paid_amount', 'PaidAmount'],
+    'Procedure_code': ['Procedure code'],
+    'Payee_type': ['Payee type'],
+    'Benefit_head_code': ['benefit_head_code', 'BenefitHeadCode'],
+    'Benefit_head_descr': ['benefit_head_descr', 'BenefitHeadDescr'],
+    'diagnosis_code': ['Diagnostic code', 'Diagnostic_code', 'DiagnosisCode'],
+    'Diagnostic name': ['diagnosis_name', 'DiagnosisName'],
+    'Procedure_descr': ['procedure_descr', 'ProcedureDescr'],
+    'Provider__descr': ['provider_type_descr', 'ProviderDescr'],
+    'Treatment_Country': ['Country_code(Treatment Country)'],
+    'Age': ['age'],
+}
+
+DATE_COLUMNS = ['Treatment_from_date', 'Treatment_to_date', 'Claim_invoice_date']
+# Candidate formats for the date columns, tried against a sample of the file.
+# Ambiguous samples (every day <= 12) resolve to the earlier entry, matching pandas' month-first default.
+DATE_FORMATS = [
+    '%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%d-%m-%Y', '%m-%d-%Y', '%Y/%m/%d', '%d.%m.%Y',
+    '%Y-%m-%d %H:%M:%S', '%m/%d/%Y %H:%M', '%d/%m/%Y %H:%M'
+]
+DATE_SAMPLE_SIZE = 200
+# Calendar columns derived once from the parsed dates so scenarios don't recompute them,
+# with the date columns each one is computed from
+DERIVED_DATE_SOURCES = {
+    'Treatment_day': ['Treatment_from_date'],
+    'Treatment_year': ['Treatment_from_date'],
+    'Treatment_weekday': ['Treatment_from_date'],
+    'Treatment_span_days': ['Treatment_from_date', 'Treatment_to_date'],
+    'Invoice_delay_days': ['Treatment_from_date', 'Claim_invoice_date'],
+}
+DERIVED_DATE_COLUMNS = list(DERIVED_DATE_SOURCES)
+NUMERIC_COLUMNS = ['Paid_amount', 'Claim_invoice_gross_total_amount', 'Incident_count', 'Age']
+
+# Declared schema for identifier and code columns. They are always read as text (so '0740'
+# keeps its leading zero and '4030' never becomes 4030.0), stripped once, and the repeated
+# ones are stored as categoricals so groupbys and joins work on small integer codes.
+CATEGORICAL_COLUMNS = [
+    'Member_ID', 'Provider_ID', 'Provider_country_code', 'Claimed_currency_code',
+    'Payment_currency_code', 'Payee_type', 'Payee_rule_code', 'Gender', 'Benefit_head_code',
+    'diagnosis_code', 'Procedure_code', 'Provider_type_code', 'specialisation_code',
+    'Treatment_Country'
+]
+# Near-unique identifiers: normalised text, not worth a category dictionary
+STRING_COLUMNS = ['Claim_ID', 'Invoice_No_Reference']
+
+
+def canonical_column_map(columns: List[str]) -> Dict[str, str]:
+    """Return the {source header: canonical name} renames needed for the given headers."""
+    present = set(columns)
+    renames = {}
+    for canonical, aliases in COLUMN_ALIASES.items():
+        if canonical in present:
+            continue
+        for alias in aliases:
+            if alias in present and alias not in renames:
+                renames[alias] = canonical
+                break
+    return renames
+
+
+def source_columns_for(columns: List[str]) -> List[str]:
+    """Canonical columns that must be read from the file to produce the given columns."""
+    needed = []
+    for col in columns:
+        for source in DERIVED_DATE_SOURCES.get(col, [col]):
+            if source not in needed:
+                needed.append(source)
+    return needed
+
+
+def csv_read_options(path: str, columns: Optional[List[str]] = None) -> Dict:
+    """pd.read_csv arguments for a claims file: declared text dtypes, and usecols when projecting."""
+    header = pd.read_csv(path, nrows=0).columns.tolist()
+    renames = canonical_column_map(header)
+    text_columns = set(CATEGORICAL_COLUMNS) | set(STRING_COLUMNS)
+    options = {'dtype': {col: str for col in header if renames.get(col, col) in text_columns}}
+    if columns is not None:
+        needed = set(source_columns_for(columns))
+        options['usecols'] = [col for col in header if renames.get(col, col) in needed]
+    return options
+
+
+def detect_date_format(df: pd.DataFrame, columns: List[str]) -> Optional[str]:
+    """Pick the single format that parses the most sampled values across the file's date columns."""
+    samples = []
+    for col in columns:
+        values = df[col].dropna()
+        samples.append(values.astype(str).str.strip().head(DATE_SAMPLE_SIZE))
+    if not samples:
+        return None
+    sample = pd.concat(samples, ignore_index=True)
+    if sample.empty:
+        return None
+
+    best_format, best_hits = None, 0
+    for fmt in DATE_FORMATS:
+        hits = pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+        if hits == len(sample):
+            return fmt
+        if hits > best_hits:
+            best_format, best_hits = fmt, hits
+    return best_format
+
+
+def parse_dates(df: pd.DataFrame, date_format: Optional[str] = None,
+                unparsed: Optional[Dict[str, int]] = None) -> Optional[str]:
+    """
+    Parse every date column exactly once with one explicit format; returns the format used.
+    The format is detected from the data unless one is given (e.g. for later chunks of a file).
+    Values the format cannot read become NaT; `unparsed` receives their count per column.
+    """
+    pending = [col for col in DATE_COLUMNS
+               if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col])]
+    date_format = date_format or detect_date_format(df, pending)
+    if pending and date_format is None:
+        logger.warning("Could not detect a date format; falling back to per-value inference")
+
+    for col in pending:
+        if date_format is None:
+            df[col] = pd.to_datetime(df[col], errors='coerce', format='mixed')
+        else:
+            parsed = pd.to_datetime(df[col], format=date_format, errors='coerce')
+            failed = int(df[col].notna().sum() - parsed.notna().sum())
+            if failed:
+                # Retry once with surrounding whitespace removed before giving up on values
+                parsed = pd.to_datetime(df[col].astype(str).str.strip(), format=date_format, errors='coerce')
+                failed = int(df[col].notna().sum() - parsed.notna().sum())
+            if failed:
+                logger.warning(f"{failed} values in {col} did not match {date_format} and were set to NaT")
+                if unparsed is not None:
+                    unparsed[col] = failed
+            df[col] = parsed
+    return date_format
+
+
+def add_calendar_columns(df: pd.DataFrame) -> None:
+    """Materialise the derived calendar columns listed in DERIVED_DATE_COLUMNS."""
+    if 'Treatment_from_date' not in df.columns:
+        return
+    treatment_from = df['Treatment_from_date']
+    df['Treatment_day'] = treatment_from.dt.normalize()
+    df['Treatment_year'] = treatment_from.dt.year.astype('Int16')
+    df['Treatment_weekday'] = treatment_from.dt.dayofweek.astype('Int8')
+    if 'Treatment_to_date' in df.columns:
+        df['Treatment_span_days'] = (df['Treatment_to_date'] - treatment_from).dt.days.astype('Int32')
+    if 'Claim_invoice_date' in df.columns:
+        df['Invoice_delay_days'] = (df['Claim_invoice_date'] - treatment_from).dt.days.astype('Int32')
+
+
+def normalise_codes(series: pd.Series) -> pd.Series:
+    """Identifier/code values as stripped strings; missing and blank values become NaN."""
+    # Strip the distinct values only, then broadcast back through the category codes
+    categorical = series.astype('category')
+    labels = categorical.cat.categories.astype(str).str.strip().to_numpy(dtype=object)
+    labels[labels == ''] = np.nan
+    codes = categorical.cat.codes.to_numpy()
+    values = np.where(codes >= 0, labels.take(codes, mode='clip') if len(labels) else np.nan, np.nan)
+    return pd.Series(values, index=series.index, name=series.name, dtype=object)
+
+
+class ClaimsDataset:
+    """
+    A claims extract parsed once per upload and shared by every scenario and the ML layer.
+    Columns carry canonical names, dates are parsed and amount columns are numeric.
+    """
+
+    def __init__(self, df: pd.DataFrame, source_path: Optional[str] = None,
+                 source_names: Optional[Dict[str, str]] = None, content_hash: Optional[str] = None,
+                 date_format: Optional[str] = None, group_indexes: Optional[Dict] = None):
+        self.df = df
+        self.source_path = source_path
+        # canonical name -> header used in the uploaded file
+        self.source_names = source_names or {}
+        # SHA-256 of the uploaded bytes, set when loaded through dataset_store
+        self.content_hash = content_hash
+        # strptime format detected for the date columns (None if they were not strings)
+        self.date_format = date_format
+        # key columns -> GroupIndex over these claims, shared with column-only selections
+        self._group_indexes = {} if group_indexes is None else group_indexes
+        # date column -> values date_format could not read (set to NaT), when parsed here
+        self.unparsed_dates: Dict[str, int] = {}
+
+    @classmethod
+    def from_csv(cls, path: str, columns: Optional[List[str]] = None, nrows: Optional[int] = None,
+                 date_format: Optional[str] = None) -> 'ClaimsDataset':
+        """
+        Parse a claims CSV into a canonical dataset. With `columns` (canonical names, derived
+        calendar columns allowed) only the file columns needed to produce them are read.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Input file not found: {path}")
+
+        logger.info(f"Parsing claims file {path}")
+        df = pd.read_csv(path, low_memory=False, nrows=nrows, **csv_read_options(path, columns))
+        dataset = cls.from_frame(df, source_path=path, date_format=date_format)
+        return dataset if columns is None else dataset.select(columns)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, source_path: Optional[str] = None,
+                   date_format: Optional[str] = None) -> 'ClaimsDataset':
+        """Canonicalise an already loaded claims frame."""
+        renames = canonical_column_map(df.columns.tolist())
+        df = df.rename(columns=renames)
+
+        unparsed: Dict[str, int] = {}
+        date_format = parse_dates(df, date_format, unparsed)
+        add_calendar_columns(df)
+
+        for col in NUMERIC_COLUMNS:
+            if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+        for col in STRING_COLUMNS:
+            if col in df.columns:
+                df[col] = normalise_codes(df[col])
+
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = normalise_codes(df[col]).astype('category')
+
+        source_names = {canonical: source for source, canonical in renames.items()}
+        dataset = cls(df, source_path=source_path, source_names=source_names, date_format=date_format)
+        dataset.unparsed_dates = unparsed
+        return dataset
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def columns(self) -> List[str]:
+        return self.df.columns.tolist()
+
+    def has_columns(self, columns: List[str]) -> bool:
+        return all(col in self.df.columns for col in columns)
+
+    def select(self, columns: Optional[List[str]] = None, nrows: Optional[int] = None) -> 'ClaimsDataset':
+        """The same dataset restricted to the given columns and/or its first nrows claims."""
+        df = self.df
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+        if nrows is not None:
+            df = df.head(nrows)
+        # Same claims in the same order, so group indexes built on either stay valid for both
+        group_indexes = self._group_indexes if nrows is None else None
+        return ClaimsDataset(df, source_path=self.source_path, source_names=self.source_names,
+                             content_hash=self.content_hash, date_format=self.date_format,
+                             group_indexes=group_indexes)
+
+    def filter_rows(self, mask: pd.Series) -> 'ClaimsDataset':
+        """The same dataset restricted to the claims where mask is True."""
+        return ClaimsDataset(self.df[mask], source_path=self.source_path, source_names=self.source_names,
+                             content_hash=self.content_hash, date_format=self.date_format)
+
+    def append(self, other: 'ClaimsDataset') -> 'ClaimsDataset':
+        """A new dataset with other's claims after these; categorical columns get the union of both categories."""
+        df, extra = self.df, other.df
+        for col in df.columns.intersection(extra.columns):
+            if isinstance(df[col].dtype, pd.CategoricalDtype) and isinstance(extra[col].dtype, pd.CategoricalDtype):
+                categories = df[col].cat.categories.union(extra[col].cat.categories)
+                df = df.assign(**{col: df[col].cat.set_categories(categories)})
+                extra = extra.assign(**{col: extra[col].cat.set_categories(categories)})
+        return ClaimsDataset(pd.concat([df, extra], ignore_index=True), source_path=self.source_path,
+                             source_names=self.source_names, date_format=self.date_format)
+
+    def group_index(self, keys: List[str]) -> GroupIndex:
+        """The claims grouped by the key columns, sorted once per dataset and reused by every scenario."""
+        key = tuple(keys)
+        if key not in self._group_indexes:
+            self._group_indexes[key] = GroupIndex.from_frame(self.df, keys)
+        return self._group_indexes[key]
+
+    def frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Return a private copy of the claims, optionally restricted to the given columns."""
+        if columns is None:
+            return self.df.copy()
+        return self.df[[col for col in columns if col in self.df.columns]].copy()
+
+    def head_records(self, n: int = 1000) -> List[Dict]:
+        """First n claims as records keyed by the uploaded file's original headers."""
+        head = self.df.head(n).drop(columns=DERIVED_DATE_COLUMNS, errors='ignore')
+        for col in DATE_COLUMNS:
+            if col in head.columns:
+                head[col] = head[col].dt.strftime('%Y-%m-%d')
+        head = head.astype(object).where(head.notna(), None)
+        return head.rename(columns=self.source_names).to_dict('records')
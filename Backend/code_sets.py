@@ -0,0 +1,140 @@
+"""
+Named medical code sets, compiled once and matched per distinct code.
+
+Scenarios that test a diagnosis or procedure code against a clinical list (pediatric
+diagnoses, kidney diagnoses for dialysis, dental diagnoses, ...) refer to the list by name;
+the lists themselves are declared in code_sets.json (or the file named by CODE_SETS_FILE), so
+a clinical team can add or amend a code set without touching scenario code.
+
+A definition combines any of:
+    literals      exact codes                      ["346", "G43.9"]
+    prefixes      codes starting with one of these ["K00", "520"]
+    icd9_ranges   leading three digits in a range  [["760", "779"]]
+    icd10_ranges  category (letter + two digits, optionally followed by ".subcode") in a range
+                                                   [["P00", "P96"]]
+and a normalise mode applied to the code first: "strip" (the default), "upper" (strip and
+uppercase) or "none".
+
+A CodeSet is a predicate over codes. It is meant to be evaluated over the distinct values of a
+code column only (ClaimRows.code_mask, or CodeSet.matches for any Series) and broadcast back to
+the claims through their category codes, so its cost follows the number of distinct codes.
+"""
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+CODE_SETS_FILE = os.environ.get(
+    'CODE_SETS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'code_sets.json'))
+
+NORMALISE_MODES = ("strip", "upper", "none")
+_DEFINITION_KEYS = {"description", "normalise", "literals", "prefixes", "icd9_ranges", "icd10_ranges"}
+
+_ICD9_HEAD = r"^(\d{3})"
+_ICD10_CATEGORY = r"^([A-Z])([0-9]{2})(?:\..*)?$"
+
+
+def normalised(codes: pd.Series, mode: str = "strip") -> pd.Series:
+    """Code text under a normalise mode: "strip", "upper" (strip and uppercase) or "none"."""
+    codes = codes.astype(str)
+    if mode == "none":
+        return codes
+    codes = codes.str.strip()
+    return codes.str.upper() if mode == "upper" else codes
+
+
+def _icd10_rank(category: str) -> int:
+    """Sortable number of an ICD-10 category such as 'P96' (letter, then the two digits)."""
+    category = category.strip().upper()
+    if len(category) != 3 or not category[0].isalpha() or not category[1:].isdigit():
+        raise ValueError(f"Invalid ICD-10 category '{category}'")
+    return (ord(category[0]) - ord('A')) * 100 + int(category[1:])
+
+
+class CodeSet:
+    """A compiled code set: evaluate it over a Series of code text to get one bool per value."""
+
+    def __init__(self, name: str, literals: Iterable[str] = (), prefixes: Iterable[str] = (),
+                 icd9_ranges: Iterable[Tuple[str, str]] = (), icd10_ranges: Iterable[Tuple[str, str]] = (),
+                 normalise: str = "strip", description: str = ""):
+        if normalise not in NORMALISE_MODES:
+            raise ValueError(f"Code set '{name}': normalise must be one of {NORMALISE_MODES}")
+        self.name = name
+        self.description = description
+        self.normalise = normalise
+        self.literals = frozenset(str(code) for code in literals)
+        self.prefixes = tuple(str(prefix) for prefix in prefixes)
+        self.icd9_ranges = [(int(lo), int(hi)) for lo, hi in icd9_ranges]
+        self.icd10_ranges = [(_icd10_rank(lo), _icd10_rank(hi)) for lo, hi in icd10_ranges]
+
+    @classmethod
+    def from_definition(cls, name: str, definition: Dict) -> 'CodeSet':
+        unknown = set(definition) - _DEFINITION_KEYS
+        if unknown:
+            raise ValueError(f"Code set '{name}': unknown keys {sorted(unknown)}")
+        return cls(name, **definition)
+
+    def __call__(self, codes: pd.Series) -> np.ndarray:
+        """Whether each code (as text) is in the set."""
+        codes = normalised(pd.Series(codes, dtype=object).reset_index(drop=True), self.normalise)
+        hits = codes.isin(self.literals).to_numpy(dtype=bool)
+        if self.prefixes:
+            hits |= codes.str.startswith(self.prefixes).to_numpy(dtype=bool)
+        if self.icd9_ranges:
+            head = pd.to_numeric(codes.str.extract(_ICD9_HEAD)[0], errors="coerce").to_numpy(dtype=float)
+            for lo, hi in self.icd9_ranges:
+                hits |= (head >= lo) & (head <= hi)
+        if self.icd10_ranges:
+            parts = codes.str.extract(_ICD10_CATEGORY)
+            category = (parts[0] + parts[1]).dropna()
+            rank = np.full(len(codes), np.nan)
+            rank[category.index] = [_icd10_rank(c) for c in category]
+            for lo, hi in self.icd10_ranges:
+                hits |= (rank >= lo) & (rank <= hi)
+        return hits
+
+    def matches(self, values: pd.Series) -> pd.Series:
+        """One bool per row of values, evaluating the set once per distinct value (missing values never match)."""
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, uniques = pd.factorize(values)
+        # Code -1 (a missing value) picks the trailing False
+        hits = np.append(self(pd.Series(uniques, dtype=object)), False)
+        return pd.Series(hits[codes], index=values.index)
+
+
+def load_code_sets(path: str = CODE_SETS_FILE) -> Dict[str, CodeSet]:
+    """Compile every code set defined in a JSON file of {name: definition}."""
+    with open(path) as f:
+        definitions = json.load(f)
+    return {name: CodeSet.from_definition(name, definition) for name, definition in definitions.items()}
+
+
+_code_sets: Dict[str, CodeSet] = {}
+
+
+def code_set(name: str) -> CodeSet:
+    """The compiled code set of that name (definitions are read once per process)."""
+    if not _code_sets:
+        _code_sets.update(load_code_sets())
+    if name not in _code_sets:
+        raise KeyError(f"Unknown code set '{name}' (defined: {sorted(_code_sets)})")
+    return _code_sets[name]
+
+
+def code_set_names() -> List[str]:
+    if not _code_sets:
+        _code_sets.update(load_code_sets())
+    return sorted(_code_sets)
+
+
+@lru_cache(maxsize=None)
+def definitions_digest(path: str = CODE_SETS_FILE) -> str:
+    """Hash of the code set definitions (read once per process, like the definitions themselves)."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
@@ -0,0 +1,644 @@
+import io
+import os
+import re
+import json
+import uuid
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from claims_dataset import (ClaimsDataset, DATE_COLUMNS, DATE_SAMPLE_SIZE, canonical_column_map, csv_read_options,
+                            detect_date_format)
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # cache is optional, CSV parsing still works
+    pa = None
+    feather = None
+
+logger = logging.getLogger(__name__)
+
+# Columnar copies of uploads, named by the SHA-256 of the uploaded bytes
+CACHE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+# Uploaded CSVs, stored once per content hash however many times they are uploaded
+UPLOADS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+# One JSON manifest per upload, named by its dataset ID
+DATASETS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datasets')
+# Bump when the parsed layout of ClaimsDataset changes so stale cache files are ignored
+CACHE_VERSION = 3
+HASH_CHUNK_SIZE = 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Rows profiled together; bounds the memory of the upload profile regardless of file size
+PROFILE_BATCH_ROWS = 50000
+# Rows per batch in chunked (out-of-core) scenario runs
+BATCH_ROWS = 100000
+
+_DATASET_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+_SOURCE_NAMES_KEY = b'claims_source_names'
+_DATE_FORMAT_KEY = b'claims_date_format'
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file's contents, read in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path_for(content_hash: str) -> str:
+    return os.path.join(CACHE_FOLDER, f"{content_hash}.v{CACHE_VERSION}.feather")
+
+
+def write_cache(dataset: ClaimsDataset, content_hash: str) -> Optional[str]:
+    """Persist a parsed dataset as an uncompressed Feather (Arrow IPC) file so it can be memory-mapped."""
+    if pa is None:
+        return None
+
+    os.makedirs(CACHE_FOLDER, exist_ok=True)
+    target = cache_path_for(content_hash)
+    # Named per process and thread: a background conversion and a request may write the same cache
+    tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        table = pa.Table.from_pandas(dataset.df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_SOURCE_NAMES_KEY] = json.dumps(dataset.source_names).encode('utf-8')
+        metadata[_DATE_FORMAT_KEY] = (dataset.date_format or '').encode('utf-8')
+        table = table.replace_schema_metadata(metadata)
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, target)
+    except (pa.ArrowException, OSError, ValueError, TypeError) as e:
+        logger.warning(f"Could not write columnar cache for {dataset.source_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    logger.info(f"Cached {len(dataset)} claims to {target}")
+    return target
+
+
+def read_cache(content_hash: str, source_path: Optional[str] = None, columns: Optional[List[str]] = None,
+               nrows: Optional[int] = None) -> Optional[ClaimsDataset]:
+    """
+    Memory-map a cached dataset; returns None when there is no usable cache entry.
+    Only the requested columns (and the first nrows rows) are converted to pandas.
+    """
+    if pa is None:
+        return None
+
+    path = cache_path_for(content_hash)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        if columns is not None:
+            with pa.memory_map(path) as source:
+                available = set(pa.ipc.open_file(source).schema.names)
+            columns = [col for col in columns if col in available]
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        if nrows is not None:
+            table = table.slice(0, nrows)
+        dataset = _dataset_from_arrow(table, table.schema, content_hash, source_path)
+    except (pa.ArrowException, OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable cache file {path}: {e}")
+        return None
+
+    logger.info(f"Loaded {len(dataset)} claims ({len(dataset.columns)} columns) from cache {path}")
+    return dataset
+
+
+def _dataset_from_arrow(data, schema, content_hash: str, source_path: Optional[str]) -> ClaimsDataset:
+    """Wrap an Arrow table or record batch from the cache as a ClaimsDataset."""
+    metadata = schema.metadata or {}
+    return ClaimsDataset(data.to_pandas(), source_path=source_path,
+                         source_names=json.loads(metadata.get(_SOURCE_NAMES_KEY, b'{}')),
+                         content_hash=content_hash,
+                         date_format=metadata.get(_DATE_FORMAT_KEY, b'').decode('utf-8') or None)
+
+
+# One lock per content hash so a background conversion and a request never parse the same file twice,
+# and one per dataset ID so two appends to the same dataset are applied one after the other
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _named_lock(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def is_cached(content_hash: str) -> bool:
+    return pa is not None and os.path.exists(cache_path_for(content_hash))
+
+
+def load_dataset(path: str, content_hash: Optional[str] = None, columns: Optional[List[str]] = None,
+                 nrows: Optional[int] = None) -> ClaimsDataset:
+    """
+    Return the parsed dataset for an uploaded file, using the content-addressed cache.
+    The CSV is only parsed (and the cache written) the first time a given file content is seen;
+    if a background conversion of the same content is running, this waits for it instead.
+    `columns` (canonical names) and `nrows` limit what is loaded into memory.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Input file not found: {path}")
+
+    content_hash = content_hash or file_sha256(path)
+    dataset = read_cache(content_hash, source_path=path, columns=columns, nrows=nrows)
+    if dataset is not None:
+        return dataset
+
+    if nrows is not None:
+        # A preview never justifies parsing (and caching) the whole file
+        dataset = ClaimsDataset.from_csv(path, columns=columns, nrows=nrows)
+        dataset.content_hash = content_hash
+        return dataset
+
+    with _named_lock(content_hash):
+        dataset = read_cache(content_hash, source_path=path, columns=columns, nrows=nrows)
+        if dataset is not None:
+            return dataset
+
+        if pa is None:
+            # Nothing to cache into, so parse just what was asked for
+            dataset = ClaimsDataset.from_csv(path, columns=columns)
+            dataset.content_hash = content_hash
+            return dataset
+
+        dataset = ClaimsDataset.from_csv(path)
+        dataset.content_hash = content_hash
+        write_cache(dataset, content_hash)
+    return dataset.select(columns)
+
+
+def iter_batches(path: str, content_hash: Optional[str] = None, columns: Optional[List[str]] = None,
+                 batch_rows: int = BATCH_ROWS, date_format: Optional[str] = None) -> Iterator[ClaimsDataset]:
+    """
+    Yield the claims as consecutive datasets of at most batch_rows rows, so a file larger than
+    memory can be scanned. Batches come from the memory-mapped cache when it exists, otherwise
+    the CSV is streamed; either way only one batch is held in memory at a time.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Input file not found: {path}")
+
+    content_hash = content_hash or file_sha256(path)
+    cache_path = cache_path_for(content_hash)
+    if pa is not None and os.path.exists(cache_path):
+        with pa.memory_map(cache_path) as source:
+            reader = pa.ipc.open_file(source)
+            names = reader.schema.names
+            indices = None if columns is None else [names.index(col) for col in columns if col in names]
+            for i in range(reader.num_record_batches):
+                record_batch = reader.get_batch(i)
+                if indices is not None:
+                    record_batch = record_batch.select(indices)
+                for offset in range(0, record_batch.num_rows, batch_rows):
+                    yield _dataset_from_arrow(record_batch.slice(offset, batch_rows), reader.schema,
+                                              content_hash, path)
+        return
+
+    options = csv_read_options(path, columns)
+    with pd.read_csv(path, chunksize=batch_rows, **options) as reader:
+        for chunk in reader:
+            # Every chunk is parsed with the format of the first one so dates stay consistent
+            batch = ClaimsDataset.from_frame(chunk, source_path=path, date_format=date_format)
+            date_format = date_format or batch.date_format
+            batch.content_hash = content_hash
+            yield batch if columns is None else batch.select(columns)
+
+
+def convert_in_background(path: str, content_hash: str) -> threading.Thread:
+    """Build the columnar cache for an upload on a daemon thread so the upload request can return."""
+    def convert():
+        try:
+            load_dataset(path, content_hash=content_hash)
+        except Exception as e:
+            logger.error(f"Background conversion of {path} failed: {e}")
+
+    thread = threading.Thread(target=convert, daemon=True)
+    thread.start()
+    return thread
+
+
+# ==================== STREAMING UPLOAD ====================
+class _UploadTee(io.RawIOBase):
+    """Binary reader over an upload stream that copies every byte read to disk and into a SHA-256."""
+
+    def __init__(self, stream: BinaryIO, out: BinaryIO):
+        self.stream = stream
+        self.out = out
+        self.digest = hashlib.sha256()
+        self.size_bytes = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self.stream.read(min(len(buffer), UPLOAD_CHUNK_SIZE))
+        if not chunk:
+            return 0
+        self.out.write(chunk)
+        self.digest.update(chunk)
+        self.size_bytes += len(chunk)
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    def drain(self):
+        """Copy whatever the parser did not consume so the file on disk is complete."""
+        for chunk in iter(lambda: self.stream.read(UPLOAD_CHUNK_SIZE), b''):
+            self.out.write(chunk)
+            self.digest.update(chunk)
+            self.size_bytes += len(chunk)
+
+
+class ColumnProfile:
+    """Running per-column counters for an upload; memory does not grow with the row count."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.non_empty = 0
+        self.numeric = 0
+        self.min = None
+        self.max = None
+
+    def update(self, values: pd.Series):
+        """Fold one parsed chunk of the column into the running counters."""
+        present = int(values.notna().sum())
+        self.non_empty += present
+        if not present or not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            return
+        self.numeric += present
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def to_dict(self, rows: int) -> Dict:
+        profile = {
+            "non_empty": self.non_empty,
+            "empty": rows - self.non_empty,
+            "numeric": self.non_empty > 0 and self.numeric == self.non_empty,
+        }
+        if profile["numeric"]:
+            profile["min"] = self.min
+            profile["max"] = self.max
+        return profile
+
+
+def stream_upload(stream: BinaryIO, target_path: str) -> Dict:
+    """
+    Copy an uploaded CSV to disk while computing its SHA-256, row count, header, per-column
+    profile and date format in the same pass. The CSV is parsed PROFILE_BATCH_ROWS rows at a
+    time, so memory stays bounded however large the upload is.
+    """
+    header: List[str] = []
+    profiles: List[ColumnProfile] = []
+    date_samples: Dict[str, List[str]] = {}
+    rows = 0
+
+    with open(target_path, 'wb') as out:
+        tee = _UploadTee(stream, out)
+        try:
+            reader = pd.read_csv(io.BufferedReader(tee, buffer_size=UPLOAD_CHUNK_SIZE),
+                                 chunksize=PROFILE_BATCH_ROWS, encoding='utf-8-sig')
+            with reader:
+                for chunk in reader:
+                    if not header:
+                        header = chunk.columns.tolist()
+                        profiles = [ColumnProfile(name) for name in header]
+                        renames = canonical_column_map(header)
+                        date_samples = {name: [] for name in header if renames.get(name, name) in DATE_COLUMNS}
+                    rows += len(chunk)
+                    for profile in profiles:
+                        profile.update(chunk[profile.name])
+                    for name, samples in date_samples.items():
+                        missing = DATE_SAMPLE_SIZE - len(samples)
+                        if missing > 0:
+                            samples.extend(chunk[name].dropna().astype(str).head(missing).tolist())
+        except pd.errors.EmptyDataError:
+            pass
+        tee.drain()
+
+    sample_frame = pd.DataFrame({name: pd.Series(values, dtype=object) for name, values in date_samples.items()})
+    date_format = detect_date_format(sample_frame, list(sample_frame.columns)) if date_samples else None
+
+    return {
+        "content_hash": tee.digest.hexdigest(),
+        "size_bytes": tee.size_bytes,
+        "rows": rows,
+        "header": header,
+        "date_format": date_format,
+        "column_profile": {profile.name: profile.to_dict(rows) for profile in profiles},
+    }
+
+
+# ==================== PER-UPLOAD DATASETS ====================
+def source_path_for(content_hash: str) -> str:
+    return os.path.join(UPLOADS_FOLDER, f"{content_hash}.csv")
+
+
+def _manifest_path(dataset_id: str) -> str:
+    return os.path.join(DATASETS_FOLDER, f"{dataset_id}.json")
+
+
+def _write_json(path: str, payload: Dict):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def store_upload(stream: BinaryIO, filename: str) -> Dict:
+    """
+    Store an uploaded CSV as a new dataset and return its manifest.
+    Every upload gets its own dataset ID; the bytes are kept once per content hash, so
+    re-uploading an identical file costs no extra disk and reuses the columnar cache.
+    """
+    os.makedirs(UPLOADS_FOLDER, exist_ok=True)
+    os.makedirs(DATASETS_FOLDER, exist_ok=True)
+
+    dataset_id = uuid.uuid4().hex
+    part_path = os.path.join(UPLOADS_FOLDER, f"{dataset_id}.part")
+    try:
+        upload = stream_upload(stream, part_path)
+        source_path = source_path_for(upload["content_hash"])
+        deduplicated = os.path.exists(source_path)
+        if deduplicated:
+            os.remove(part_path)
+        else:
+            os.replace(part_path, source_path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+    manifest = {
+        "dataset_id": dataset_id,
+        "filename": filename,
+        "uploaded_at": datetime.now().isoformat(),
+        "deduplicated": deduplicated,
+        **upload,
+    }
+    _write_json(_manifest_path(dataset_id), manifest)
+    logger.info(f"Stored upload {filename} as dataset {dataset_id} ({upload['rows']} rows)")
+    return manifest
+
+
+def get_dataset_info(dataset_id: str) -> Optional[Dict]:
+    """Manifest of a stored dataset, or None if the ID is unknown (or not a dataset ID at all)."""
+    if not isinstance(dataset_id, str) or not _DATASET_ID_PATTERN.match(dataset_id):
+        return None
+    try:
+        with open(_manifest_path(dataset_id), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def iter_batches_by_id(dataset_id: str, columns: Optional[List[str]] = None,
+                       batch_rows: int = BATCH_ROWS) -> Iterator[ClaimsDataset]:
+    """Batches of a stored dataset for chunked scenario runs (see iter_batches)."""
+    info = get_dataset_info(dataset_id)
+    if info is None:
+        raise FileNotFoundError(f"Unknown dataset: {dataset_id}")
+    return iter_batches(source_path_for(info["content_hash"]), content_hash=info["content_hash"],
+                        columns=columns, batch_rows=batch_rows, date_format=info.get("date_format"))
+
+
+def load_dataset_by_id(dataset_id: str, columns: Optional[List[str]] = None,
+                       nrows: Optional[int] = None) -> ClaimsDataset:
+    """Parsed claims of a stored dataset, served from the columnar cache where possible."""
+    info = get_dataset_info(dataset_id)
+    if info is None:
+        raise FileNotFoundError(f"Unknown dataset: {dataset_id}")
+    return load_dataset(source_path_for(info["content_hash"]), content_hash=info["content_hash"],
+                        columns=columns, nrows=nrows)
+
+
+def cache_dataset_by_id(dataset_id: str) -> bool:
+    """
+    Make sure a stored dataset has its columnar cache, parsing the CSV once if it has not been
+    converted yet. Returns False when no cache can be written (pyarrow missing or write failed).
+    """
+    info = get_dataset_info(dataset_id)
+    if info is None:
+        raise FileNotFoundError(f"Unknown dataset: {dataset_id}")
+    if pa is None:
+        return False
+    if not is_cached(info["content_hash"]):
+        load_dataset(source_path_for(info["content_hash"]), content_hash=info["content_hash"], columns=['Claim_ID'])
+    return is_cached(info["content_hash"])
+
+
+# ==================== INCREMENTAL APPENDS ====================
+def _merge_profiles(base: Dict, delta: Dict) -> Dict:
+    """Column profile of base and delta together, from the two profiles alone."""
+    merged = {}
+    for name, profile in base.items():
+        extra = delta.get(name, {"non_empty": 0, "empty": 0, "numeric": True})
+        combined = {
+            "non_empty": profile["non_empty"] + extra["non_empty"],
+            "empty": profile["empty"] + extra["empty"],
+            "numeric": (profile["numeric"] or not profile["non_empty"]) and (extra["numeric"] or not extra["non_empty"])
+                       and profile["non_empty"] + extra["non_empty"] > 0,
+        }
+        if combined["numeric"]:
+            combined["min"] = min(p["min"] for p in (profile, extra) if "min" in p)
+            combined["max"] = max(p["max"] for p in (profile, extra) if "max" in p)
+        merged[name] = combined
+    return merged
+
+
+def _concatenate_csv(base_path: str, delta_path: str, target_path: str) -> str:
+    """Write base followed by the data rows of delta (its header line dropped) and return the SHA-256."""
+    digest = hashlib.sha256()
+
+    def write(out, chunk):
+        out.write(chunk)
+        digest.update(chunk)
+
+    with open(target_path, 'wb') as out:
+        last = b'\n'
+        with open(base_path, 'rb') as base:
+            for chunk in iter(lambda: base.read(HASH_CHUNK_SIZE), b''):
+                write(out, chunk)
+                last = chunk[-1:]
+        if last != b'\n':
+            write(out, b'\n')
+        with open(delta_path, 'rb') as delta:
+            delta.readline()
+            for chunk in iter(lambda: delta.read(HASH_CHUNK_SIZE), b''):
+                write(out, chunk)
+    return digest.hexdigest()
+
+
+def append_upload(dataset_id: str, stream: BinaryIO, filename: str):
+    """
+    Append the claims of an uploaded CSV to a stored dataset and return (manifest, delta).
+    The dataset keeps its ID; its content hash moves to the combined file, and a cached base
+    is extended in place of re-parsing the whole file. The delta must have the same header as
+    the dataset, and dates its date format reads. `delta` is the parsed new claims, for incremental rescoring.
+    """
+    with _named_lock(dataset_id):
+        info = get_dataset_info(dataset_id)
+        if info is None:
+            raise FileNotFoundError(f"Unknown dataset: {dataset_id}")
+
+        part_path = os.path.join(UPLOADS_FOLDER, f"{dataset_id}.{uuid.uuid4().hex}.part")
+        combined_path = f"{part_path}.combined"
+        try:
+            upload = stream_upload(stream, part_path)
+            if upload["header"] != info["header"]:
+                raise ValueError("Appended file must have the same columns, in the same order, as the dataset")
+
+            # The delta is read with the dataset's format: a short file can look like another
+            # format (a day-first delta whose days are all <= 12 also reads month-first), so
+            # only dates that format cannot read reject it
+            delta = ClaimsDataset.from_csv(part_path, date_format=info["date_format"])
+            if delta.unparsed_dates:
+                counts = ", ".join(f"{count} in {column}" for column, count in delta.unparsed_dates.items())
+                raise ValueError(f"Appended file has dates the dataset's format {info['date_format']} "
+                                 f"cannot read ({counts})")
+            content_hash = _concatenate_csv(source_path_for(info["content_hash"]), part_path, combined_path)
+            source_path = source_path_for(content_hash)
+            if os.path.exists(source_path):
+                os.remove(combined_path)
+            else:
+                os.replace(combined_path, source_path)
+
+            # Extend the cached base rather than parsing the combined file from scratch
+            if not is_cached(content_hash):
+                base = read_cache(info["content_hash"], source_path=source_path)
+                if base is not None:
+                    write_cache(base.append(delta), content_hash)
+        finally:
+            for path in (part_path, combined_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        manifest = {
+            **info,
+            "content_hash": content_hash,
+            "size_bytes": os.path.getsize(source_path),
+            "rows": info["rows"] + upload["rows"],
+            "column_profile": _merge_profiles(info["column_profile"], upload["column_profile"]),
+            "appends": info.get("appends", []) + [{
+                "filename": filename,
+                "appended_at": datetime.now().isoformat(),
+                "rows": upload["rows"],
+                "content_hash": upload["content_hash"],
+            }],
+        }
+        _write_json(_manifest_path(dataset_id), manifest)
+    logger.info(f"Appended {filename} to dataset {dataset_id} ({upload['rows']} rows, {manifest['rows']} total)")
+    return manifest, delta
+
+
+def _flags_path(dataset_id: str) -> str:
+    return os.path.join(DATASETS_FOLDER, f"{dataset_id}.flags.json")
+
+
+def save_flags(dataset_id: str, content_hash: str, flags: Dict[int, List[str]],
+               params: Optional[Dict[int, Dict]] = None):
+    """
+    Persist the flagged Claim_IDs of each scenario, and the parameters they were computed
+    under, for the dataset content they were computed on.
+    """
+    params = params or {}
+    _write_json(_flags_path(dataset_id), {
+        "content_hash": content_hash,
+        "scenarios": {str(scenario_id): claim_ids for scenario_id, claim_ids in flags.items()},
+        "params": {str(scenario_id): params[scenario_id] for scenario_id in flags if scenario_id in params},
+    })
+
+
+def load_flags(dataset_id: str, content_hash: str) -> Tuple[Dict[int, List[str]], Dict[int, Dict]]:
+    """
+    Flagged Claim_IDs per scenario and the parameters each was computed under (none stored
+    means the defaults), or ({}, {}) if none were stored for this content of the dataset.
+    """
+    try:
+        with open(_flags_path(dataset_id), encoding='utf-8') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return {}, {}
+    if stored.get("content_hash") != content_hash:
+        return {}, {}
+    return ({int(scenario_id): claim_ids for scenario_id, claim_ids in stored["scenarios"].items()},
+            {int(scenario_id): params for scenario_id, params in stored.get("params", {}).items()})
+
+
+# ==================== HISTORICAL BASELINES ====================
+def _sketches_path(content_hash: str, name: str) -> str:
+    return os.path.join(CACHE_FOLDER, f"{content_hash}.{name}.sketches.json")
+
+
+def save_sketches(content_hash: str, name: str, payload: Dict):
+    """Persist a scenario's mergeable summaries (see quantile_sketch) of one dataset content."""
+    os.makedirs(CACHE_FOLDER, exist_ok=True)
+    _write_json(_sketches_path(content_hash, name), payload)
+
+
+def load_sketches(content_hash: str, name: str) -> Optional[Dict]:
+    try:
+        with open(_sketches_path(content_hash, name), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def baseline_sketches(name: str) -> List[Tuple[str, Dict]]:
+    """
+    (content_hash, payload) of the stored summaries of every dataset's current content, each
+    distinct content once. Contents replaced by an append are no longer part of the baseline,
+    so appended claims are never counted twice.
+    """
+    if not os.path.isdir(DATASETS_FOLDER):
+        return []
+    hashes = []
+    for entry in sorted(os.listdir(DATASETS_FOLDER)):
+        dataset_id, extension = os.path.splitext(entry)
+        info = get_dataset_info(dataset_id) if extension == '.json' else None
+        if info is not None and info["content_hash"] not in hashes:
+            hashes.append(info["content_hash"])
+    stored = [(content_hash, load_sketches(content_hash, name)) for content_hash in hashes]
+    return [(content_hash, payload) for content_hash, payload in stored if payload is not None]
+
+
+# ==================== GROUP STATISTICS ====================
+# Bump when a scenario's group_stats() changes what it records
+GROUP_STATS_VERSION = 1
+
+
+def _group_stats_path(content_hash: str, name: str) -> str:
+    return os.path.join(CACHE_FOLDER, f"{content_hash}.{name}.groupstats.v{GROUP_STATS_VERSION}.feather")
+
+
+def save_group_stats(content_hash: str, name: str, stats: pd.DataFrame) -> Optional[str]:
+    """Persist a scenario's per-group statistic (see Scenario.group_stats) of one dataset content."""
+    if pa is None:
+        return None
+    os.makedirs(CACHE_FOLDER, exist_ok=True)
+    target = _group_stats_path(content_hash, name)
+    tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        feather.write_feather(pa.Table.from_pandas(stats, preserve_index=False), tmp_path, compression='uncompressed')
+        os.replace(tmp_path, target)
+    except (pa.ArrowException, OSError, ValueError, TypeError) as e:
+        logger.warning(f"Could not write group statistics {name} for {content_hash}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+    return target
+
+
+def load_group_stats(content_hash: str, name: str) -> Optional[pd.DataFrame]:
+    if pa is None:
+        return None
+    try:
+        return feather.read_table(_group_stats_path(content_hash, name)).to_pandas()
+    except (pa.ArrowException, OSError, ValueError):
+        return None
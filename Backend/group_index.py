@@ -0,0 +1,137 @@
+"""
+Sorted group index shared by the grouping scenarios.
+
+Most grouping scenarios group the claims by member and a day (or a year) and then merge the
+flagged groups back onto the claims. A GroupIndex sorts the claims by their key columns once
+and records where each group starts, so a scenario's group reduction is a segment operation
+over that order and its merge-back is a gather of one value per group back to the claims.
+ClaimsDataset.group_index() builds each index once per dataset and key tuple.
+
+Positions are row positions in the frame the index was built from (not index labels).
+Claims with a missing key belong to no group, as with groupby(observed=True).
+"""
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Value code of claims left out by a mask (missing values are -1)
+_EXCLUDED = -2
+
+
+def key_codes(values) -> np.ndarray:
+    """Integer code per claim for a key column; equal values share a code and missing values get -1."""
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(dtype=np.int64)
+    codes, _ = pd.factorize(values)
+    return codes.astype(np.int64, copy=False)
+
+
+def required_bits(values, required: Sequence) -> np.ndarray:
+    """Per claim, a bitmask of which of the required values it has (bit i for required[i])."""
+    if len(required) > 63:
+        raise ValueError("contains_all supports at most 63 required values")
+    values = pd.Series(values).reset_index(drop=True)
+    bits = np.zeros(len(values), dtype=np.int64)
+    for bit, value in enumerate(required):
+        bits |= (values == value).to_numpy(dtype=bool).astype(np.int64) << bit
+    return bits
+
+
+class GroupIndex:
+    """Claims ordered by group, with the offset of each group's first claim in that order."""
+
+    def __init__(self, codes: Sequence[np.ndarray]):
+        codes = [np.asarray(c, dtype=np.int64) for c in codes]
+        grouped = np.logical_and.reduce([c >= 0 for c in codes])
+        rows = np.flatnonzero(grouped)
+        # lexsort orders by its last key first, so the first key column is the outermost sort
+        order = rows[np.lexsort([c[rows] for c in reversed(codes)])]
+
+        changed = np.zeros(len(order), dtype=bool)
+        if len(order):
+            changed[0] = True
+            for c in codes:
+                sorted_codes = c[order]
+                changed[1:] |= sorted_codes[1:] != sorted_codes[:-1]
+        starts = np.flatnonzero(changed)
+
+        self.order = order
+        self.offsets = np.append(starts, len(order))
+        self.n_rows = len(grouped)
+        self.group_of = np.full(self.n_rows, -1, dtype=np.int64)
+        self.group_of[order] = np.cumsum(changed) - 1
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, keys: List[str]) -> 'GroupIndex':
+        return cls([key_codes(df[key]) for key in keys])
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.offsets) - 1
+
+    def first_rows(self) -> np.ndarray:
+        """Position of each group's first claim in the index order (e.g. to read the group's key values)."""
+        return self.order[self.offsets[:-1]]
+
+    def sizes(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def _segment_sum(self, per_position: np.ndarray) -> np.ndarray:
+        """Per-group sums of values given in index order (one per grouped claim)."""
+        if self.n_groups == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.add.reduceat(per_position.astype(np.int64), self.offsets[:-1])
+
+    def count(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Claims per group, or only those where mask is True."""
+        if mask is None:
+            return self.sizes()
+        return self._segment_sum(np.asarray(mask, dtype=bool)[self.order])
+
+    def nunique(self, values, mask: Optional[np.ndarray] = None, dropna: bool = True) -> np.ndarray:
+        """
+        Distinct values per group, over the claims where mask is True (all if None).
+        With dropna=False a missing value counts as one more distinct value, like Series.unique().
+        """
+        codes = key_codes(values)
+        if mask is not None:
+            codes = np.where(np.asarray(mask, dtype=bool), codes, _EXCLUDED)
+        # Sort each group's segment by value code and count where the code changes
+        sorted_codes = codes[self.order]
+        within = np.lexsort((sorted_codes, self.group_of[self.order]))
+        sorted_codes = sorted_codes[within]
+        first = np.ones(len(sorted_codes), dtype=bool)
+        first[1:] = sorted_codes[1:] != sorted_codes[:-1]
+        first[self.offsets[:-1]] = True
+        counted = sorted_codes >= 0 if dropna else sorted_codes != _EXCLUDED
+        return self._segment_sum(first & counted)
+
+    def at_least_distinct(self, values, k: int, mask: Optional[np.ndarray] = None, dropna: bool = True) -> np.ndarray:
+        """Whether each group has at least k distinct values (see nunique)."""
+        return self.nunique(values, mask=mask, dropna=dropna) >= k
+
+    def contains_all(self, values, required: Sequence, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Whether each group has every one of the required values, over the claims where mask is True.
+        Each required value is one bit of a per-claim bitmask, OR-reduced over each group's segment.
+        """
+        bits = required_bits(values, required)
+        if mask is not None:
+            bits[~np.asarray(mask, dtype=bool)] = 0
+        if self.n_groups == 0:
+            return np.zeros(0, dtype=bool)
+        seen = np.bitwise_or.reduceat(bits[self.order], self.offsets[:-1])
+        return seen == (1 << len(required)) - 1
+
+    def gather(self, per_group: np.ndarray, fill=False) -> np.ndarray:
+        """One value per claim: its group's entry of per_group, or fill for claims in no group."""
+        per_group = np.asarray(per_group)
+        out = np.full(self.n_rows, fill, dtype=per_group.dtype)
+        grouped = self.group_of >= 0
+        out[grouped] = per_group[self.group_of[grouped]]
+        return out
+
+    def refine(self, values) -> 'GroupIndex':
+        """Index of the same claims grouped further by one more key (claims in no group stay out)."""
+        return GroupIndex([self.group_of, key_codes(values)])
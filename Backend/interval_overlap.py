@@ -0,0 +1,154 @@
+"""
+Sweep-line interval algorithms within groups.
+
+Date-overlap rules (e.g. a member treated in two countries over overlapping dates) compare
+each claim with the other claims of the same member. Joining a member's claims with
+themselves and then filtering builds every pair, which grows with the square of the
+member's claim count. Here the claims are sorted once by (group, start), and each claim is
+paired only with the claims after it in its group that start no later than it ends: in that
+order those are exactly the claims overlapping it, so only overlapping pairs are produced.
+The sweep is vectorised across all groups, and pairs are yielded in bounded batches.
+
+For counting rules (e.g. how many providers a member sees on one day) busy_windows() sweeps
++1/-1 events at each interval's start and end instead, so a 30-day stay is two events rather
+than 30 per-day rows; merge_intervals() first collapses intervals that must count once.
+"""
+from typing import Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Upper bound on the pairs materialised at once by iter_overlapping_pairs
+PAIR_BATCH_SIZE = 1_000_000
+
+
+def _ranks(*values: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Dense ranks of the given arrays over their combined values (order-preserving small integers)."""
+    combined = np.concatenate(values)
+    _, inverse = np.unique(combined, return_inverse=True)
+    return tuple(np.split(inverse.astype(np.int64), np.cumsum([len(v) for v in values])[:-1]))
+
+
+def iter_overlapping_pairs(groups, starts, ends,
+                           batch_size: int = PAIR_BATCH_SIZE) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yield (left, right) arrays of row positions: every unordered pair of claims in the same group
+    whose closed intervals [start, end] intersect, each pair once. Intervals given with end before
+    start are treated as [end, start]. Claims with group -1 or a missing start or end are skipped.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    starts = pd.to_datetime(pd.Series(starts)).to_numpy()
+    ends = pd.to_datetime(pd.Series(ends)).to_numpy()
+    valid = (groups >= 0) & ~np.isnat(starts) & ~np.isnat(ends)
+    rows = np.flatnonzero(valid)
+    if len(rows) < 2:
+        return
+
+    lo = np.minimum(starts[rows], ends[rows])
+    hi = np.maximum(starts[rows], ends[rows])
+    lo_rank, hi_rank = _ranks(lo.view(np.int64), hi.view(np.int64))
+    # One sortable key per claim: its group, then its start (ranks keep the product in int64)
+    span = int(max(lo_rank.max(), hi_rank.max())) + 1
+    order = np.lexsort((lo_rank, groups[rows]))
+    rows, lo_rank, hi_rank = rows[order], lo_rank[order], hi_rank[order]
+    start_keys = groups[rows] * span + lo_rank
+    end_keys = groups[rows] * span + hi_rank
+
+    # Claims after position p that start no later than p ends (same group): p's overlap partners
+    last = np.searchsorted(start_keys, end_keys, side='right')
+    counts = np.maximum(last - np.arange(len(rows)) - 1, 0)
+
+    # Split the positions so that no batch holds more than batch_size pairs (one claim may exceed it)
+    cumulative = np.cumsum(counts)
+    begin = 0
+    while begin < len(rows):
+        done = cumulative[begin - 1] if begin else 0
+        end = max(int(np.searchsorted(cumulative, done + batch_size, side='right')), begin + 1)
+        batch_counts = counts[begin:end]
+        total = int(batch_counts.sum())
+        if total:
+            positions = np.arange(begin, end)
+            left = np.repeat(positions, batch_counts)
+            # j-th partner of p is p + 1 + j
+            first = np.cumsum(batch_counts) - batch_counts
+            right = left + 1 + (np.arange(total) - np.repeat(first, batch_counts))
+            yield rows[left], rows[right]
+        begin = end
+
+
+def _composite(groups: np.ndarray, values: np.ndarray, low: int, span: int) -> np.ndarray:
+    """(group, value) as one sortable int64, for values in [low, low + span)."""
+    return groups * span + (values - low)
+
+
+def merge_intervals(keys, starts, ends) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Union of the closed integer intervals [start, end] that share a key (start <= end, key >= 0).
+    Returns (first, starts, ends) of the disjoint merged intervals, ordered by key then start,
+    where first is the input position of the first interval merged into each.
+    Overlapping or adjacent intervals (end + 1 == next start) are merged.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    if len(keys) == 0:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty
+
+    order = np.lexsort((starts, keys))
+    keys, starts, ends = keys[order], starts[order], ends[order]
+    low = int(starts.min())
+    span = int(ends.max()) - low + 2
+    # Furthest end seen so far within the key (later keys sort above earlier ones)
+    reach = np.maximum.accumulate(_composite(keys, ends, low, span))
+    begins = np.ones(len(keys), dtype=bool)
+    begins[1:] = (keys[1:] != keys[:-1]) | (_composite(keys[1:], starts[1:], low, span) > reach[:-1] + 1)
+    heads = np.flatnonzero(begins)
+    return order[heads], starts[heads], np.maximum.reduceat(ends, heads)
+
+
+def busy_windows(groups, starts, ends, min_active: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sweep +1/-1 events over closed integer intervals [start, end] (start <= end) and return
+    (groups, starts, ends) of the windows during which at least min_active intervals of the same
+    group are active, as disjoint windows ordered by group then start.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    event_groups = np.concatenate([groups, groups])
+    event_days = np.concatenate([starts, ends + 1])
+    deltas = np.concatenate([np.ones(len(starts), dtype=np.int64), -np.ones(len(ends), dtype=np.int64)])
+    order = np.lexsort((event_days, event_groups))
+    event_groups, event_days = event_groups[order], event_days[order]
+    # Every group's events sum to zero, so the running total over all groups is per group
+    active = np.cumsum(deltas[order])
+
+    # The count after the last event of each (group, day) holds until that group's next event day
+    last = np.ones(len(event_days), dtype=bool)
+    last[:-1] = (event_groups[1:] != event_groups[:-1]) | (event_days[1:] != event_days[:-1])
+    points = np.flatnonzero(last)
+    busy = points[:-1][active[points[:-1]] >= min_active]
+    following = points[np.searchsorted(points, busy, side='right')]
+    return event_groups[busy], event_days[busy], event_days[following] - 1
+
+
+def overlaps_windows(groups, starts, ends, windows: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> np.ndarray:
+    """Whether each closed integer interval meets any of its group's windows (as busy_windows returns them)."""
+    groups = np.asarray(groups, dtype=np.int64)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    window_groups, window_starts, window_ends = windows
+    hits = np.zeros(len(groups), dtype=bool)
+    if len(window_groups) == 0 or len(groups) == 0:
+        return hits
+
+    low = int(min(starts.min(), window_starts.min()))
+    span = int(max(ends.max(), window_ends.max())) - low + 1
+    window_end_keys = _composite(window_groups, window_ends, low, span)
+    # First window of the group ending on or after the interval's start; it meets the interval if it starts by its end
+    nearest = np.searchsorted(window_end_keys, _composite(groups, starts, low, span), side='left')
+    found = nearest < len(window_end_keys)
+    nearest = np.minimum(nearest, len(window_end_keys) - 1)
+    hits[found] = _composite(window_groups, window_starts, low, span)[nearest[found]] <= _composite(groups, ends, low, span)[found]
+    return hits
@@ -0,0 +1,29 @@
+"""
+Optional export of a scenario's flagged claims to its Scenario-N_outliers.csv file.
+
+Scenarios hand their results back in memory; no file is read back to build them. Files are
+only written when an export folder is configured with OUTLIERS_EXPORT_DIR (for example
+`OUTLIERS_EXPORT_DIR=. python Scenario-7.py`). Each file is written under a temporary name
+and renamed into place, so concurrent runs never see a half-written export.
+"""
+import os
+import threading
+from typing import Optional, Union
+
+import pandas as pd
+
+EXPORT_FOLDER = os.environ.get('OUTLIERS_EXPORT_DIR') or None
+
+
+def export_outliers(flagged: Union[pd.DataFrame, pd.Series], file_name: str,
+                    folder: Optional[str] = None) -> Optional[str]:
+    """Write flagged claims to file_name in the export folder; returns the path, or None if exporting is off."""
+    folder = folder or EXPORT_FOLDER
+    if folder is None:
+        return None
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, os.path.basename(file_name))
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    flagged.to_csv(temp_path, index=False)
+    os.replace(temp_path, path)
+    return path
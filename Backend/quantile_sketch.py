@@ -0,0 +1,139 @@
+"""
+Mergeable per-group quantile sketches.
+
+A GroupSketch summarises a numeric column for every group of a key (e.g. the amount per
+incident of each benefit code) as a few weighted centroids per group, in the style of a
+merging t-digest: the sorted values of a group are cut into buckets that are narrow near the
+tails and wide around the median, and each bucket keeps only its mean and weight. Memory per
+group is bounded by the compression whatever the group size, and small groups keep every value.
+
+Sketches are built for all groups at once with sort/groupby operations, merge by re-compressing
+the union of their centroids (so a baseline can accumulate over many uploads without re-reading
+them), and serialise to plain JSON. Counts and means are exact; quantiles interpolate between
+centroids as pandas' linear quantile does between values, and equal it while no group has been
+compressed.
+"""
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Centroid budget per group: about this many centroids at most, finer towards the tails
+COMPRESSION = 100
+
+
+def _bucket_of(position: np.ndarray, compression: int) -> np.ndarray:
+    """t-digest k1 scale: bucket of a quantile position in [0, 1], narrow near 0 and 1."""
+    return np.floor(compression * (np.arcsin(2 * np.clip(position, 0, 1) - 1) / np.pi + 0.5)).astype(np.int64)
+
+
+class GroupSketch:
+    """Weighted centroids per group of the key columns: one row per centroid with mean and weight."""
+
+    def __init__(self, keys: List[str], centroids: pd.DataFrame, compression: int = COMPRESSION):
+        self.keys = list(keys)
+        self.centroids = centroids
+        self.compression = compression
+
+    @classmethod
+    def from_values(cls, df: pd.DataFrame, keys: List[str], value: str,
+                    compression: int = COMPRESSION) -> 'GroupSketch':
+        """Sketch of df[value] per group of df[keys]; rows with a missing key or value are left out."""
+        points = df[keys + [value]].dropna().rename(columns={value: 'mean'})
+        points = _plain_keys(points, keys)
+        points['weight'] = 1.0
+        return cls(keys, _compress(points, keys, compression), compression)
+
+    def merge(self, other: 'GroupSketch') -> 'GroupSketch':
+        """Sketch of both sketches' values together."""
+        if other.keys != self.keys:
+            raise ValueError(f"Cannot merge sketches keyed by {self.keys} and {other.keys}")
+        union = pd.concat([self.centroids, other.centroids], ignore_index=True)
+        return GroupSketch(self.keys, _compress(union, self.keys, self.compression), self.compression)
+
+    @classmethod
+    def merge_all(cls, sketches: List['GroupSketch']) -> 'GroupSketch':
+        """One sketch of every given sketch's values (compressed once)."""
+        first = sketches[0]
+        union = pd.concat([sketch.centroids for sketch in sketches], ignore_index=True)
+        return cls(first.keys, _compress(union, first.keys, first.compression), first.compression)
+
+    def _weighted(self) -> pd.DataFrame:
+        return self.centroids.assign(total=self.centroids['mean'] * self.centroids['weight'])
+
+    def count(self) -> pd.Series:
+        """Values per group."""
+        return self.centroids.groupby(self.keys, sort=False)['weight'].sum()
+
+    def mean(self) -> pd.Series:
+        """Mean value per group."""
+        sums = self._weighted().groupby(self.keys, sort=False)[['total', 'weight']].sum()
+        return sums['total'] / sums['weight']
+
+    def quantile(self, q: float) -> pd.Series:
+        """
+        Quantile q per group. Centroid i sits at its cumulative weight midpoint, and the target
+        is q * (n - 1) + 0.5 on that axis, which for unit weights is pandas' linear interpolation.
+        """
+        c = self.centroids
+        group = c.groupby(self.keys, sort=False).ngroup().to_numpy()
+        weight = c['weight'].to_numpy()
+        means = c['mean'].to_numpy()
+        cumulative = c.groupby(self.keys, sort=False)['weight'].cumsum().to_numpy()
+        centre = cumulative - weight / 2
+
+        n_groups = int(group.max()) + 1 if len(group) else 0
+        totals = np.bincount(group, weights=weight, minlength=n_groups)
+        firsts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]]) if len(group) else np.array([], dtype=np.int64)
+        lasts = np.r_[firsts[1:] - 1, len(group) - 1] if len(group) else np.array([], dtype=np.int64)
+        target = q * (totals - 1) + 0.5
+
+        # Centroids are sorted by group then mean, so group + centre / (total + 1) is increasing
+        axis = group + centre / (totals[group] + 1)
+        lower = np.searchsorted(axis, np.arange(n_groups) + target / (totals + 1), side='right') - 1
+        lower = np.clip(lower, firsts, lasts)
+        upper = np.minimum(lower + 1, lasts)
+        gap = centre[upper] - centre[lower]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fraction = np.where(gap > 0, (target - centre[lower]) / gap, 0.0)
+        fraction = np.clip(fraction, 0, 1)
+        values = means[lower] + fraction * (means[upper] - means[lower])
+
+        index = c.iloc[firsts].set_index(self.keys).index
+        return pd.Series(values, index=index)
+
+    def to_dict(self) -> Dict:
+        return {
+            "keys": self.keys,
+            "compression": self.compression,
+            "centroids": {col: self.centroids[col].tolist() for col in self.centroids.columns},
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict) -> 'GroupSketch':
+        keys = payload["keys"]
+        centroids = pd.DataFrame(payload["centroids"], columns=keys + ['mean', 'weight'])
+        return cls(keys, centroids, payload.get("compression", COMPRESSION))
+
+
+def _plain_keys(df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """Key columns as plain objects so sketches from different datasets align and serialise."""
+    for key in keys:
+        if isinstance(df[key].dtype, pd.CategoricalDtype):
+            df[key] = df[key].astype(object)
+    return df
+
+
+def _compress(points: pd.DataFrame, keys: List[str], compression: int) -> pd.DataFrame:
+    """Collapse each group's (mean, weight) points into centroids by k1-scale buckets of their positions."""
+    points = points.sort_values(keys + ['mean'], kind='stable').reset_index(drop=True)
+    if points.empty:
+        return points[keys + ['mean', 'weight']]
+    by_group = points.groupby(keys, sort=False)['weight']
+    cumulative = by_group.cumsum()
+    totals = by_group.transform('sum')
+    points['bucket'] = _bucket_of(((cumulative - points['weight'] / 2) / totals).to_numpy(), compression)
+    points['total'] = points['mean'] * points['weight']
+    merged = points.groupby(keys + ['bucket'], sort=False)[['total', 'weight']].sum().reset_index()
+    merged['mean'] = merged['total'] / merged['weight']
+    return merged[keys + ['mean', 'weight']]
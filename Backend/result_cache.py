@@ -0,0 +1,131 @@
+"""
+Cache of scenario results keyed by dataset content, scenario and parameters.
+
+/api/analyze and the /api/scenario/<id> drill-down recompute the same results whenever the
+same extract is analyzed again. A result depends only on the dataset's content hash, the
+scenario, whether it is the run() result or the details() records, and the scenario's
+effective parameters (plus the code set and rule definitions it reads), so it is cached under
+exactly that key; a re-upload of the same file under a new dataset ID hits the same entries.
+
+The in-memory tier is an LRU bounded by the pickled size of its entries (RESULT_CACHE_BYTES).
+If RESULT_CACHE_DIR is set, entries are also written there and survive restarts and
+evictions. Cached values are shared between callers and must not be modified.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import code_sets
+import rule_plan
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate cached results when the scenarios change what they report
+RESULT_CACHE_VERSION = 2
+RESULT_CACHE_BYTES = int(os.environ.get('RESULT_CACHE_BYTES', 256 * 1024 * 1024))
+RESULT_CACHE_DIR = os.environ.get('RESULT_CACHE_DIR') or None
+
+
+def cache_key(content_hash: str, scenario_id: int, kind: str, params: Optional[Dict]) -> str:
+    """Key of one scenario result ('run' or 'details') on a dataset's content under the given parameters."""
+    rules = json.dumps({"params": params or {}, "code_sets": code_sets.definitions_digest(),
+                        "rules": rule_plan.definitions_digest()}, sort_keys=True, default=str)
+    digest = hashlib.sha256(rules.encode()).hexdigest()[:16]
+    return f"{content_hash}-s{scenario_id}-{kind}-{digest}.v{RESULT_CACHE_VERSION}"
+
+
+class ResultCache:
+    """Size-bounded LRU of results, with an optional folder of pickled entries behind it."""
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_BYTES, folder: Optional[str] = RESULT_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.folder = folder
+        self.entries: 'OrderedDict[str, Tuple[Any, int]]' = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, f"{key}.pkl")
+
+    def _remember(self, key: str, value: Any, size: int):
+        """Insert into the memory tier (caller holds the lock), evicting least recently used entries."""
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (value, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted
+
+    def __contains__(self, key: Optional[str]) -> bool:
+        if key is None:
+            return False
+        with self._lock:
+            if key in self.entries:
+                return True
+        return self.folder is not None and os.path.exists(self._path(key))
+
+    def get(self, key: Optional[str]) -> Optional[Any]:
+        """The cached value, or None on a miss (or for a None key)."""
+        if key is None:
+            return None
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+        if self.folder is not None and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), 'rb') as f:
+                    payload = f.read()
+                value = pickle.loads(payload)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable cached result {key}: {e}")
+            else:
+                with self._lock:
+                    self._remember(key, value, len(payload))
+                    self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: Optional[str], value: Any):
+        """Cache value under key (a None key is not cached)."""
+        if key is None:
+            return
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remember(key, value, len(payload))
+        if self.folder is not None:
+            try:
+                os.makedirs(self.folder, exist_ok=True)
+                temp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(payload)
+                os.replace(temp_path, self._path(key))
+            except OSError as e:
+                logger.warning(f"Could not write cached result {key}: {e}")
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self.entries), "bytes": self.size, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "disk": self.folder is not None}
+
+
+# Shared by /api/analyze and the scenario drill-down
+results = ResultCache()
@@ -0,0 +1,49 @@
+"""
+Shared read-only view of the claims for row-level checks.
+
+A row-level rule flags a claim from that claim's own row alone. ClaimRows factorises each code
+column once, so code predicates run per distinct value and every rule of a RulePlan (see
+rule_plan) evaluated over the same view reuses that work.
+"""
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class ClaimRows:
+    """Read-only view of a claims frame whose code columns are factorised once and shared between rules."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._factorized: Dict[str, Tuple[np.ndarray, pd.Series]] = {}
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.df.columns
+
+    def __getitem__(self, column: str) -> pd.Series:
+        return self.df[column]
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def factorized(self, column: str) -> Tuple[np.ndarray, pd.Series]:
+        """
+        (codes, text) for a column: text holds each distinct value as astype(str) renders it,
+        followed by 'nan', and codes index into it per claim (-1, a missing value, picks the 'nan').
+        """
+        if column not in self._factorized:
+            values = self.df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                codes, uniques = pd.factorize(values)
+            text = pd.Series(list(uniques.astype(str)) + ['nan'], dtype=object)
+            self._factorized[column] = (codes, text)
+        return self._factorized[column]
+
+    def code_mask(self, column: str, predicate: Callable[[pd.Series], pd.Series]) -> pd.Series:
+        """predicate evaluated once per distinct value of column, broadcast back to one bool per claim."""
+        codes, text = self.factorized(column)
+        hits = np.asarray(predicate(text), dtype=bool)
+        return pd.Series(hits[codes], index=self.df.index)
@@ -0,0 +1,758 @@
+"""
+Declarative fraud rules, and a planner that evaluates many of them with shared steps.
+
+A rule is declared as data in rules.json (or the file named by RULES_FILE) instead of as an
+analyzer class with its own load, filter, group and merge-back code:
+
+    where               predicate selecting the claims the rule looks at (all claims if omitted)
+    group_by            key columns, or {"column": col, "normalise": mode} for a key compared as
+                        normalised text; claims are then flagged by group (row-level if omitted)
+    aggregate           one statistic per group over the claims `where` selects, narrowed by the
+                        aggregate's own optional `where`:
+                            {"count": true}
+                            {"nunique": col, "dropna": bool}
+                            {"contains_all": col, "values": [...]}
+    having              threshold on the statistic, e.g. {">": 8} or {">": {"param": "max_diagnoses"}}
+                        (contains_all is already a yes/no statistic and takes none)
+    distinct            report each Claim_ID once (the default), or once per flagged claim line
+    if_columns_missing  "error" (the default) or "no_flags"
+
+A row-level rule flags the claims `where` selects; a grouped rule flags the claims `where`
+selects in the groups whose statistic passes `having`.
+
+Predicates:
+    {"notna": col or [cols]}
+    {"column": col, "==" or "!=": value}                  on the raw values
+    {"column": col, "<", "<=", ">" or ">=": number}       numeric; non-numeric values never pass
+                                                          (a missing value passes no comparison)
+    {"column": col, "in": [texts], "normalise": mode, "case": bool}
+    {"column": col, "in_set": name}                       a named code set (see code_sets)
+    {"length": col, <comparison>: number}                 text length; a missing value has none
+    {"spans_weekday": [from_col, to_col], "weekday": "Sunday"}  (a missing end is the start day)
+    {"all": [...]}, {"any": [...]}, {"not": predicate}
+Text predicates are evaluated once per distinct value, on the text ClaimRows gives it (a missing
+value reads 'nan'). Any value may be {"param": name}, taken from the scenario's parameters.
+
+RulePlan compiles a set of rules into one graph of steps. A step is identified by what it
+computes, with conjunctions and disjunctions in a canonical order, so a filter such as
+Paid_amount > 0, a member-day group index or a per-group count used by several rules is
+computed once per plan and shared by all of them. partition() splits a plan into groups of
+rules that share no costly step, so the groups can be evaluated in separate processes.
+
+A plan also scores new claims against a history without reading it again. statistics() names
+the group statistics of its grouped rules; a GroupState keeps one of them per group key over
+the history (claims counted, distinct values seen, required values seen), and score() combines
+it with the new claims' own contribution, so each new claim is flagged as evaluate() would flag
+it once appended to the history. Row-level rules need no state.
+"""
+import calendar
+import hashlib
+import json
+import operator
+import os
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Hashable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from calendar_spans import span_contains_weekday
+from code_sets import NORMALISE_MODES, code_set, normalised
+from code_sets import definitions_digest as code_sets_digest
+from group_index import GroupIndex, key_codes, required_bits
+from row_rules import ClaimRows
+
+RULES_FILE = os.environ.get(
+    'RULES_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules.json'))
+
+_RULE_KEYS = {"description", "where", "group_by", "aggregate", "having", "distinct", "if_columns_missing"}
+_COMPARISONS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+                ">": operator.gt, ">=": operator.ge}
+_NUMERIC = {"<", "<=", ">", ">="}
+_WEEKDAYS = {name.lower(): number for number, name in enumerate(calendar.day_name)}
+
+_ALL_ROWS = ('all_rows',)
+# Steps that cost one vectorised pass over a column: worth recomputing rather than tying rules together
+_CHEAP_STEPS = {'all_rows', 'notna', 'compare'}
+
+
+class Rule:
+    """A declared rule: its spec, validated, and the columns it reads."""
+
+    def __init__(self, name: str, spec: Dict):
+        unknown = set(spec) - _RULE_KEYS
+        if unknown:
+            raise ValueError(f"Rule '{name}': unknown keys {sorted(unknown)}")
+        if ("aggregate" in spec) != ("group_by" in spec):
+            raise ValueError(f"Rule '{name}': group_by and aggregate go together")
+        if spec.get("if_columns_missing", "error") not in ("error", "no_flags"):
+            raise ValueError(f"Rule '{name}': if_columns_missing must be 'error' or 'no_flags'")
+        self.name = name
+        self.spec = spec
+        self.description = spec.get("description", "")
+        self.distinct = spec.get("distinct", True)
+        self.flags_when_columns_missing = spec.get("if_columns_missing", "error") == "error"
+        self.columns = ['Claim_ID']
+        for column in _spec_columns(spec):
+            if column not in self.columns:
+                self.columns.append(column)
+
+    @property
+    def row_local(self) -> bool:
+        return "group_by" not in self.spec
+
+
+def _spec_columns(spec) -> List[str]:
+    """Every column a rule (or any part of it) reads, in order of mention."""
+    columns = []
+    if isinstance(spec, dict):
+        for key, value in spec.items():
+            if key in ("column", "length", "nunique", "contains_all"):
+                columns.append(value)
+            elif key in ("notna", "spans_weekday"):
+                columns.extend([value] if isinstance(value, str) else value)
+            elif key == "group_by":
+                columns.extend(k if isinstance(k, str) else k["column"] for k in value)
+            elif key in ("where", "aggregate", "not"):
+                columns.extend(_spec_columns(value))
+            elif key in ("all", "any"):
+                for part in value:
+                    columns.extend(_spec_columns(part))
+    return columns
+
+
+def load_rules(path: str = RULES_FILE) -> Dict[str, Rule]:
+    """Every rule defined in a JSON file of {name: spec}."""
+    with open(path) as f:
+        specs = json.load(f)
+    return {name: Rule(name, spec) for name, spec in specs.items()}
+
+
+_rules: Dict[str, Rule] = {}
+
+
+def rule(name: str) -> Rule:
+    """The rule of that name (definitions are read once per process)."""
+    if not _rules:
+        _rules.update(load_rules())
+    if name not in _rules:
+        raise KeyError(f"Unknown rule '{name}' (defined: {sorted(_rules)})")
+    return _rules[name]
+
+
+@lru_cache(maxsize=None)
+def definitions_digest(path: str = RULES_FILE) -> str:
+    """Hash of the rule definitions (read once per process, like the definitions themselves)."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# ==================== COMPILING ====================
+def _value(value, params: Dict, numeric: bool = False):
+    """A literal, or the parameter a {"param": name} refers to (as a number if numeric)."""
+    if isinstance(value, dict):
+        if set(value) != {"param"}:
+            raise ValueError(f"Unsupported value {value}")
+        if value["param"] not in params:
+            raise ValueError(f"Missing parameter '{value['param']}'")
+        value = params[value["param"]]
+    if numeric and isinstance(value, str):
+        number = float(value)
+        value = int(number) if number.is_integer() else number
+    return value
+
+
+def _comparison(spec: Dict) -> Tuple[str, object]:
+    ops = [op for op in _COMPARISONS if op in spec]
+    if len(ops) != 1:
+        raise ValueError(f"Expected exactly one comparison in {spec}")
+    return ops[0], spec[ops[0]]
+
+
+class RulePlan:
+    """
+    Several rules compiled into one graph of steps; evaluate() computes each step once per
+    batch of claims, however many rules use it. Rules are keyed by any hashable ID.
+    """
+
+    def __init__(self, rules: Dict[Hashable, Rule], params: Optional[Dict[Hashable, Dict]] = None):
+        params = params or {}
+        self.rules = dict(rules)
+        self.roots: Dict[Hashable, tuple] = {}
+        self.errors: Dict[Hashable, Exception] = {}
+        for rule_id, entry in self.rules.items():
+            try:
+                self.roots[rule_id] = self._compile(entry.spec, params.get(rule_id) or {})
+            except (ValueError, KeyError, TypeError) as e:
+                self.errors[rule_id] = ValueError(f"Rule '{entry.name}': {e}")
+
+    @property
+    def row_local(self) -> bool:
+        return all(entry.row_local for entry in self.rules.values())
+
+    @property
+    def columns(self) -> List[str]:
+        columns = []
+        for entry in self.rules.values():
+            columns += [col for col in entry.columns if col not in columns]
+        return columns
+
+    # ---- compiling specs to step keys ----
+    def _compile(self, spec: Dict, params: Dict) -> tuple:
+        where = self._predicate(spec["where"], params) if "where" in spec else _ALL_ROWS
+        if "group_by" not in spec:
+            return where
+
+        groups = self._group(spec["group_by"])
+        aggregate = dict(spec["aggregate"])
+        mask = self._and([where, self._predicate(aggregate.pop("where"), params)]) if "where" in aggregate else where
+        if aggregate.get("count") is True and len(aggregate) == 1:
+            statistic = ('count', groups, mask)
+        elif "nunique" in aggregate and set(aggregate) <= {"nunique", "dropna"}:
+            statistic = ('nunique', groups, aggregate["nunique"], bool(aggregate.get("dropna", True)), mask)
+        elif "contains_all" in aggregate and set(aggregate) == {"contains_all", "values"}:
+            statistic = ('contains_all', groups, aggregate["contains_all"], tuple(aggregate["values"]), mask)
+        else:
+            raise ValueError(f"Unsupported aggregate {spec['aggregate']}")
+
+        if statistic[0] == 'contains_all':
+            if "having" in spec:
+                raise ValueError("contains_all takes no having threshold")
+            passing = statistic
+        else:
+            op, value = _comparison(spec["having"])
+            passing = ('having', statistic, op, _value(value, params, numeric=True))
+        return ('flag', groups, passing, where)
+
+    def _group(self, keys: List) -> tuple:
+        """Step of a group index; a normalised key refines the index of the keys before it."""
+        parsed = []
+        for key in keys:
+            if isinstance(key, str):
+                parsed.append((key, None))
+            else:
+                if key.get("normalise", "strip") not in NORMALISE_MODES:
+                    raise ValueError(f"Unsupported normalise mode in {key}")
+                parsed.append((key["column"], key.get("normalise", "strip")))
+        return ('group', tuple(parsed))
+
+    def _and(self, parts: List[tuple]) -> tuple:
+        return self._junction('and', parts)
+
+    def _junction(self, kind: str, parts: List[tuple]) -> tuple:
+        flat: Set[tuple] = set()
+        for part in parts:
+            if part[0] == kind:
+                flat.update(part[1])
+            elif not (kind == 'and' and part == _ALL_ROWS):
+                flat.add(part)
+        if not flat:
+            return _ALL_ROWS
+        if len(flat) == 1:
+            return next(iter(flat))
+        return (kind, tuple(sorted(flat, key=repr)))
+
+    def _predicate(self, spec: Dict, params: Dict) -> tuple:
+        if "all" in spec:
+            return self._junction('and', [self._predicate(part, params) for part in spec["all"]])
+        if "any" in spec:
+            return self._junction('or', [self._predicate(part, params) for part in spec["any"]])
+        if "not" in spec:
+            inner = self._predicate(spec["not"], params)
+            return inner[1] if inner[0] == 'not' else ('not', inner)
+        if "notna" in spec:
+            columns = [spec["notna"]] if isinstance(spec["notna"], str) else spec["notna"]
+            return self._and([('notna', column) for column in columns])
+        if "spans_weekday" in spec:
+            start, end = spec["spans_weekday"]
+            return ('spans_weekday', start, end, _WEEKDAYS[str(_value(spec["weekday"], params)).lower()])
+        if "length" in spec:
+            op, value = _comparison(spec)
+            return ('length', spec["length"], op, _value(value, params, numeric=True))
+        if "column" not in spec:
+            raise ValueError(f"Unsupported predicate {spec}")
+
+        column = spec["column"]
+        if "in_set" in spec:
+            code_set(spec["in_set"])
+            return ('in_set', column, spec["in_set"])
+        if "in" in spec:
+            mode = spec.get("normalise", "none")
+            if mode not in NORMALISE_MODES:
+                raise ValueError(f"Unsupported normalise mode '{mode}'")
+            case = bool(spec.get("case", True))
+            values = [str(_value(v, params)) for v in spec["in"]]
+            values = values if case else [v.lower() for v in values]
+            return ('in', column, mode, case, tuple(sorted(set(values))))
+        op, value = _comparison(spec)
+        return ('compare', column, op, _value(value, params, numeric=op in _NUMERIC))
+
+    # ---- sharing ----
+    def steps(self, rule_id: Hashable) -> Set[tuple]:
+        """Every step a rule's flags are computed from."""
+        seen: Set[tuple] = set()
+        pending = [self.roots[rule_id]] if rule_id in self.roots else []
+        while pending:
+            step = pending.pop()
+            if step not in seen and step != _ALL_ROWS:
+                seen.add(step)
+                pending.extend(_inputs(step))
+        return seen
+
+    def explain(self) -> Dict:
+        """Steps per rule, and how many of them the plan shares between rules."""
+        per_rule = {rule_id: self.steps(rule_id) for rule_id in self.roots}
+        uses = Counter(step for steps in per_rule.values() for step in steps)
+        return {
+            "rules": len(self.roots),
+            "steps_without_sharing": sum(uses.values()),
+            "steps": len(uses),
+            "shared": [{"step": _describe(step), "rules": count}
+                       for step, count in uses.most_common() if count > 1],
+        }
+
+    def partition(self) -> List[List[Hashable]]:
+        """
+        The rules split into groups that can be evaluated apart (e.g. in separate processes)
+        without computing any costly step twice: rules sharing a group index, a statistic or a
+        text predicate are in the same group. Groups and the rules in them keep plan order.
+        """
+        owner: Dict[tuple, int] = {}
+        groups: List[List[Hashable]] = []
+        for rule_id in self.rules:
+            shared = sorted({owner[step] for step in self.steps(rule_id)
+                             if step[0] not in _CHEAP_STEPS and step in owner})
+            target = shared[0] if shared else len(groups)
+            if not shared:
+                groups.append([])
+            for merged in shared[1:]:
+                groups[target] += groups[merged]
+                groups[merged] = []
+                owner.update({step: target for step, group in owner.items() if group == merged})
+            groups[target].append(rule_id)
+            owner.update({step: target for step in self.steps(rule_id) if step[0] not in _CHEAP_STEPS})
+        order = {rule_id: position for position, rule_id in enumerate(self.rules)}
+        return [sorted(group, key=order.get) for group in groups if group]
+
+    def subplan(self, rule_ids: List[Hashable]) -> 'RulePlan':
+        """The plan of some of these rules, compiled as they are here."""
+        plan = RulePlan({})
+        plan.rules = {rule_id: self.rules[rule_id] for rule_id in rule_ids}
+        plan.roots = {rule_id: self.roots[rule_id] for rule_id in rule_ids if rule_id in self.roots}
+        plan.errors = {rule_id: self.errors[rule_id] for rule_id in rule_ids if rule_id in self.errors}
+        return plan
+
+    # ---- evaluating ----
+    def evaluate(self, dataset) -> Tuple[Dict[Hashable, np.ndarray], Dict[Hashable, Exception]]:
+        """
+        ({rule_id: one bool per claim}, {rule_id: error}) over a ClaimsDataset. A failing step
+        fails only the rules that use it.
+        """
+        flags, errors = {}, {}
+        for rule_id, rule_flags, error in self.evaluate_each(dataset):
+            if error is None:
+                flags[rule_id] = rule_flags
+            else:
+                errors[rule_id] = error
+        return flags, errors
+
+    def evaluate_each(self, dataset) -> Iterator[Tuple[Hashable, Optional[np.ndarray], Optional[Exception]]]:
+        """
+        (rule_id, one bool per claim, None) or (rule_id, None, error) for each rule in plan order,
+        as soon as it is evaluated; steps computed for earlier rules are reused by later ones.
+        """
+        run = _Evaluation(dataset)
+        for rule_id, entry in self.rules.items():
+            if rule_id in self.errors:
+                yield rule_id, None, self.errors[rule_id]
+                continue
+            if not entry.flags_when_columns_missing and not set(entry.columns) <= set(dataset.df.columns):
+                yield rule_id, np.zeros(len(dataset.df), dtype=bool), None
+                continue
+            try:
+                flags = run.value(self.roots[rule_id])
+            except Exception as e:
+                yield rule_id, None, e
+                continue
+            yield rule_id, flags, None
+
+    # ---- re-applying thresholds ----
+    def _thresholded(self, rule_id: Hashable) -> tuple:
+        """The flag step of a grouped rule with a having threshold."""
+        if rule_id in self.errors:
+            raise self.errors[rule_id]
+        root = self.roots[rule_id]
+        if root[0] != 'flag' or root[2][0] != 'having':
+            raise ValueError(f"Rule '{self.rules[rule_id].name}' has no group threshold")
+        return root
+
+    def statistic_name(self, rule_id: Hashable) -> str:
+        """
+        Name of what a thresholded rule's group_statistic() computes (everything but the
+        threshold, and the code sets it reads), under which the table can be stored.
+        """
+        _, groups, passing, where = self._thresholded(rule_id)
+        step = (groups, passing[1], where)
+        return hashlib.sha256(f"{step!r}|{code_sets_digest()}".encode()).hexdigest()[:16]
+
+    def group_statistic(self, rule_id: Hashable, dataset) -> pd.DataFrame:
+        """
+        Every claim a thresholded rule can flag (Claim_ID) with its group's statistic (value),
+        in claim order: the rule flags the rows of this table that pass its threshold, so any
+        other threshold can be applied to it without a pass over the claims (see rethreshold).
+        """
+        _, groups, passing, where = self._thresholded(rule_id)
+        entry = self.rules[rule_id]
+        if not entry.flags_when_columns_missing and not set(entry.columns) <= set(dataset.df.columns):
+            return pd.DataFrame({'Claim_ID': pd.Series(dtype=object), 'value': pd.Series(dtype=np.int64)})
+        run = _Evaluation(dataset)
+        group_of = run.value(groups).group_of
+        rows = group_of >= 0
+        mask = run.mask(where)
+        if mask is not None:
+            rows = rows & mask
+        return pd.DataFrame({
+            'Claim_ID': dataset.df['Claim_ID'].to_numpy()[rows],
+            'value': run.value(passing[1])[group_of[rows]],
+        })
+
+    def rethreshold(self, rule_id: Hashable, stats: pd.DataFrame) -> np.ndarray:
+        """Which rows of a group_statistic() table the rule flags under this plan's threshold."""
+        _, _, passing, _ = self._thresholded(rule_id)
+        return np.asarray(_COMPARISONS[passing[2]](stats['value'].to_numpy(), passing[3]), dtype=bool)
+
+    # ---- scoring new claims against a history ----
+    def statistics(self) -> Dict[str, tuple]:
+        """
+        The group statistic steps of the plan's grouped rules, by a name derived from what they
+        compute (and the code sets they read), under which their GroupState can be stored.
+        """
+        statistics = {}
+        for root in self.roots.values():
+            if root[0] == 'flag':
+                step = _statistic(root)
+                digest = hashlib.sha256(f"{step!r}|{code_sets_digest()}".encode()).hexdigest()[:16]
+                statistics[f"{step[0]}-{digest}"] = step
+        return statistics
+
+    def score(self, claims, states: Dict[str, object]) -> Tuple[Dict[Hashable, np.ndarray], Dict[Hashable, Exception]]:
+        """
+        ({rule_id: one bool per new claim}, {rule_id: error}) over a ClaimsDataset of new claims,
+        given the GroupState of each statistics() name over the history (or the exception its
+        build raised). A rule whose columns the history lacks scores the claims among themselves
+        if it is declared "no_flags", as evaluate() would not flag the history either.
+        """
+        run = _Evaluation(claims)
+        names = {step: name for name, step in self.statistics().items()}
+        flags, errors = {}, dict(self.errors)
+        for rule_id, root in self.roots.items():
+            entry = self.rules[rule_id]
+            if not entry.flags_when_columns_missing and not set(entry.columns) <= set(claims.df.columns):
+                flags[rule_id] = np.zeros(len(claims.df), dtype=bool)
+                continue
+            try:
+                if root[0] != 'flag':
+                    flags[rule_id] = run.value(root)
+                    continue
+                state = states[names[_statistic(root)]]
+                if isinstance(state, KeyError) and not entry.flags_when_columns_missing:
+                    state = GroupState.empty(_statistic(root))
+                elif isinstance(state, Exception):
+                    raise state
+                flags[rule_id] = _score_flag(run, root, state)
+            except Exception as e:
+                errors[rule_id] = e
+        return flags, errors
+
+
+class _Evaluation:
+    """Step values over one batch of claims, each computed on first use (failures are kept too)."""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.rows = ClaimRows(dataset.df)
+        self.values: Dict[tuple, object] = {}
+
+    def value(self, key: tuple):
+        if key not in self.values:
+            try:
+                self.values[key] = _STEPS[key[0]](self, *key[1:])
+            except Exception as e:
+                self.values[key] = e
+        value = self.values[key]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def mask(self, key: tuple) -> Optional[np.ndarray]:
+        return None if key == _ALL_ROWS else self.value(key)
+
+
+def _all_rows(run: _Evaluation):
+    return np.ones(len(run.rows), dtype=bool)
+
+
+def _notna(run: _Evaluation, column):
+    return run.rows[column].notna().to_numpy()
+
+
+def _compare(run: _Evaluation, column, op, value):
+    values = run.rows[column]
+    if op in _NUMERIC:
+        values = pd.to_numeric(values, errors='coerce')
+    present = values.notna()
+    return (_COMPARISONS[op](values, value) & present).fillna(False).to_numpy(dtype=bool)
+
+
+def _in(run: _Evaluation, column, mode, case, values):
+    def predicate(text):
+        text = normalised(text, mode)
+        return (text if case else text.str.lower()).isin(values)
+    return run.rows.code_mask(column, predicate).to_numpy()
+
+
+def _in_set(run: _Evaluation, column, name):
+    return run.rows.code_mask(column, code_set(name)).to_numpy()
+
+
+def _length(run: _Evaluation, column, op, value):
+    # A missing value (the trailing 'nan') has no length: it passes != only, as with Series.str.len()
+    codes, text = run.rows.factorized(column)
+    lengths = text.str.len().to_numpy(dtype=float)
+    lengths[-1] = np.nan
+    return np.asarray(_COMPARISONS[op](lengths, value), dtype=bool)[codes]
+
+
+def _spans_weekday(run: _Evaluation, start, end, weekday):
+    starts = run.rows[start]
+    return np.asarray(span_contains_weekday(starts, run.rows[end].fillna(starts), weekday), dtype=bool)
+
+
+def _and_step(run: _Evaluation, parts):
+    return np.logical_and.reduce([run.value(part) for part in parts])
+
+
+def _or_step(run: _Evaluation, parts):
+    return np.logical_or.reduce([run.value(part) for part in parts])
+
+
+def _not_step(run: _Evaluation, part):
+    return ~run.value(part)
+
+
+def _group_step(run: _Evaluation, keys):
+    """Plain keys use the dataset's shared index; a normalised key refines the index of the keys before it."""
+    if all(mode is None for _, mode in keys):
+        return run.dataset.group_index([column for column, _ in keys])
+    column, mode = keys[-1]
+    if mode is None:
+        values = key_codes(run.rows[column])
+    else:
+        # Normalised text of each claim's value, as codes (a missing value reads 'nan' and forms a group)
+        codes, text = run.rows.factorized(column)
+        values = pd.factorize(normalised(text, mode))[0][codes]
+    if len(keys) == 1:
+        return GroupIndex([values])
+    return run.value(('group', keys[:-1])).refine(values)
+
+
+def _count(run: _Evaluation, groups, mask):
+    return run.value(groups).count(run.mask(mask))
+
+
+def _nunique(run: _Evaluation, groups, column, dropna, mask):
+    return run.value(groups).nunique(run.rows[column], mask=run.mask(mask), dropna=dropna)
+
+
+def _contains_all(run: _Evaluation, groups, column, values, mask):
+    return run.value(groups).contains_all(run.rows[column], list(values), mask=run.mask(mask))
+
+
+def _having(run: _Evaluation, statistic, op, value):
+    return _COMPARISONS[op](run.value(statistic), value)
+
+
+def _flag(run: _Evaluation, groups, passing, where):
+    flagged = run.value(groups).gather(run.value(passing))
+    mask = run.mask(where)
+    return flagged if mask is None else flagged & mask
+
+
+_STEPS = {
+    'all_rows': _all_rows, 'notna': _notna, 'compare': _compare, 'in': _in, 'in_set': _in_set,
+    'length': _length, 'spans_weekday': _spans_weekday, 'and': _and_step, 'or': _or_step, 'not': _not_step,
+    'group': _group_step, 'count': _count, 'nunique': _nunique, 'contains_all': _contains_all,
+    'having': _having, 'flag': _flag,
+}
+
+
+def _inputs(step: tuple) -> List[tuple]:
+    """The steps a step reads."""
+    kind = step[0]
+    if kind in ('and', 'or'):
+        return list(step[1])
+    if kind == 'not':
+        return [step[1]]
+    if kind == 'group':
+        keys = step[1]
+        refines = len(keys) > 1 and any(mode is not None for _, mode in keys)
+        return [('group', keys[:-1])] if refines else []
+    if kind in ('count', 'nunique', 'contains_all'):
+        return [step[1], step[-1]]
+    if kind == 'having':
+        return [step[1]]
+    if kind == 'flag':
+        return list(step[1:])
+    return []
+
+
+def _describe(step: tuple) -> str:
+    """Readable form of a step, for explain()."""
+    kind = step[0]
+    if kind in ('and', 'or'):
+        return f" {kind} ".join(f"({_describe(part)})" for part in step[1])
+    if kind == 'not':
+        return f"not ({_describe(step[1])})"
+    if kind == 'group':
+        return "group by " + ", ".join(column if mode is None else f"{column} ({mode})" for column, mode in step[1])
+    if kind in ('count', 'nunique', 'contains_all'):
+        return f"{kind}{tuple(str(p) for p in step[2:-1])} per {_describe(step[1])[len('group by '):]}"
+    if kind == 'having':
+        return f"{_describe(step[1])} {step[2]} {step[3]}"
+    if kind == 'flag':
+        return f"claims of groups where {_describe(step[2])}"
+    return f"{kind} " + " ".join(str(part) for part in step[1:])
+
+
+# ==================== SCORING NEW CLAIMS ====================
+def _statistic(root: tuple) -> tuple:
+    """The group statistic step of a grouped rule's flag step."""
+    passing = root[2]
+    return passing[1] if passing[0] == 'having' else passing
+
+
+def _plain(values: pd.Series) -> np.ndarray:
+    """Values as Python objects, with None for every kind of missing value (so they compare and hash alike)."""
+    plain = values.to_numpy(dtype=object)
+    plain[pd.isna(plain)] = None
+    return plain
+
+
+def _claim_keys(run: _Evaluation, groups: tuple) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Each claim's group key as columns k0, k1, ... (normalised text for normalised keys), and whether it is in a group."""
+    memo = ('claim_keys', groups)
+    if memo in run.values:
+        return run.values[memo]
+    columns = {}
+    for position, (column, mode) in enumerate(groups[1]):
+        if mode is None:
+            columns[f"k{position}"] = _plain(run.rows[column])
+        else:
+            codes, text = run.rows.factorized(column)
+            columns[f"k{position}"] = normalised(text, mode).to_numpy(dtype=object)[codes]
+    run.values[memo] = (pd.DataFrame(columns), run.value(groups).group_of >= 0)
+    return run.values[memo]
+
+
+def _key_tuples(frame: pd.DataFrame) -> List[tuple]:
+    return list(zip(*[frame[column].tolist() for column in frame.columns if column != 'value']))
+
+
+def _contributions(run: _Evaluation, step: tuple) -> pd.DataFrame:
+    """
+    What each claim adds to a group statistic: its group key (k0, k1, ...) and a value (1 for
+    a counted claim, the value nunique counts, or its bits of the required values), for the
+    claims in a group that the statistic's mask selects.
+    """
+    keys, selected = _claim_keys(run, step[1])
+    mask = run.mask(step[-1])
+    if mask is not None:
+        selected = selected & mask
+    if step[0] == 'count':
+        value = np.ones(len(selected), dtype=np.int64)
+    elif step[0] == 'nunique':
+        values = run.rows[step[2]]
+        if step[3]:
+            selected = selected & values.notna().to_numpy()
+        value = _plain(values)
+    else:
+        value = required_bits(run.rows[step[2]], list(step[3]))
+        selected = selected & (value != 0)
+    return keys.assign(value=value)[selected].reset_index(drop=True)
+
+
+class GroupState:
+    """
+    One group statistic of a history, per group key: the claims counted ('count'), the
+    distinct values seen ('nunique') or the bits of the required values seen ('contains_all').
+    `frame` is its stored form, key columns k0, k1, ... and a value column.
+    """
+
+    def __init__(self, step: tuple, frame: pd.DataFrame):
+        self.step = step
+        self.frame = frame
+        keys = _key_tuples(frame)
+        self.table: Dict[tuple, object] = {}
+        if step[0] == 'count':
+            self.table = dict(zip(keys, frame['value'].tolist()))
+        elif step[0] == 'nunique':
+            for key, value in zip(keys, _plain(frame['value'])):
+                self.table.setdefault(key, set()).add(value)
+        else:
+            for key, value in zip(keys, frame['value'].tolist()):
+                self.table[key] = self.table.get(key, 0) | value
+
+    @classmethod
+    def build(cls, step: tuple, dataset) -> 'GroupState':
+        """The statistic's state over a history ClaimsDataset."""
+        frame = _contributions(_Evaluation(dataset), step)
+        if step[0] == 'count':
+            keys = [column for column in frame.columns if column != 'value']
+            frame = frame.groupby(keys, sort=False)['value'].sum().reset_index()
+        else:
+            frame = frame.drop_duplicates(ignore_index=True)
+        return cls(step, frame)
+
+    @classmethod
+    def empty(cls, step: tuple) -> 'GroupState':
+        columns = {f"k{position}": pd.Series(dtype=object) for position in range(len(step[1][1]))}
+        return cls(step, pd.DataFrame({**columns, 'value': pd.Series(dtype=object)}))
+
+    def combined(self, key: tuple, added):
+        """The group's statistic over the history and the new claims' contribution (as _score_flag gathers it)."""
+        kind = self.step[0]
+        if kind == 'count':
+            return self.table.get(key, 0) + (added or 0)
+        if kind == 'nunique':
+            return len(self.table.get(key, set()) | (added or set()))
+        return (self.table.get(key, 0) | (added or 0)) == (1 << len(self.step[3])) - 1
+
+
+def _score_flag(run: _Evaluation, root: tuple, state: GroupState) -> np.ndarray:
+    """A grouped rule's flags for new claims: their groups' statistic over the history state and the new claims together."""
+    _, groups, passing, where = root
+    added: Dict[tuple, object] = {}
+    contributions = _contributions(run, state.step)
+    for key, value in zip(_key_tuples(contributions), _plain(contributions['value'])):
+        if state.step[0] == 'count':
+            added[key] = added.get(key, 0) + value
+        elif state.step[0] == 'nunique':
+            added.setdefault(key, set()).add(value)
+        else:
+            added[key] = added.get(key, 0) | value
+
+    keys, candidates = _claim_keys(run, groups)
+    mask = run.mask(where)
+    if mask is not None:
+        candidates = candidates & mask
+    claim_keys = _key_tuples(keys)
+    passes: Dict[tuple, bool] = {}
+    flags = np.zeros(len(candidates), dtype=bool)
+    for position in np.flatnonzero(candidates):
+        key = claim_keys[position]
+        if key not in passes:
+            statistic = state.combined(key, added.get(key))
+            passes[key] = bool(statistic if passing[0] != 'having' else _COMPARISONS[passing[2]](statistic, passing[3]))
+        flags[position] = passes[key]
+    return flags
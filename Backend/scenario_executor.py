@@ -0,0 +1,376 @@
+"""
+Runs the scenarios of an analysis, several at a time on a pool of worker processes.
+
+Scenarios declared as rules (registry rule, see rule_plan) are compiled into one plan, so
+filters, group indexes and aggregates that several of them use are computed once. The plan is
+split into tasks of rules that share costly steps (RulePlan.partition), which run in parallel
+like the other scenarios, and each rule's result is reported as soon as it is evaluated.
+
+Workers are not sent the claims. Each one memory-maps the dataset's columnar (Arrow) cache and
+reads only the columns its scenario declares, so every process shares the same pages of the
+parsed claims instead of receiving a pickled copy. Results are yielded as scenarios finish.
+
+Results are cached by dataset content, scenario and parameters (see result_cache): a scenario
+already computed on the same content is answered from the cache without running, and the
+details view is served from the cache, or from the cached run() result where it is only the
+flagged Claim_IDs.
+
+Group-threshold scenarios (registry rescorable) can also be rescored: their per-group statistic
+is stored once per dataset content, and any other threshold is applied to it without a scan.
+
+New claims can be scored against a stored dataset as their history (score_claims). The state
+they are compared with (group statistics of the rules, a scorable module's scoring state) is
+built the first time a dataset content is scored, stored next to the group statistics and kept
+in memory, so scoring reads neither the history nor its cache again.
+"""
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from claims_dataset import ClaimsDataset
+from dataset_store import (cache_dataset_by_id, get_dataset_info, iter_batches_by_id, load_dataset_by_id,
+                           load_group_stats, save_group_stats)
+from result_cache import ResultCache, cache_key, results as result_cache
+from rule_plan import GroupState
+from scenario_registry import ScenarioResult, get_scenario, plan_rules, required_columns_for
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for /api/analyze; 1 runs every scenario in the request thread
+ANALYZE_WORKERS = int(os.environ.get('ANALYZE_WORKERS', os.cpu_count() or 1))
+
+# Memory for the scoring state of recently scored histories
+SCORING_STATE_BYTES = int(os.environ.get('SCORING_STATE_BYTES', 256 * 1024 * 1024))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_guard = threading.Lock()
+
+
+def run_scenario(scenario_id: int, dataset_id: str, chunked: bool = False,
+                 dataset: Optional[ClaimsDataset] = None, params: Optional[Dict] = None) -> ScenarioResult:
+    """
+    Run one scenario on a stored dataset: batch by batch if chunked, otherwise on `dataset`
+    or, when none is given, on the scenario's own columns read from the cache.
+    `params` override the scenario's registered defaults.
+    """
+    scenario = get_scenario(scenario_id)
+    if chunked:
+        return scenario.run_chunked(iter_batches_by_id(dataset_id, columns=scenario.required_columns), params)
+    if dataset is None:
+        dataset = load_dataset_by_id(dataset_id, columns=scenario.required_columns)
+    return scenario.run(dataset, params)
+
+
+def run_rules(scenario_ids: List[int], dataset_id: str, chunked: bool = False,
+              dataset: Optional[ClaimsDataset] = None,
+              params: Optional[Dict[int, Dict]] = None) -> Iterator[Tuple[int, Optional[ScenarioResult], Optional[Exception]]]:
+    """
+    Evaluate the rules of several scenarios as one plan over the claims and yield
+    (scenario_id, result, error) as each rule is evaluated. Chunked, which only row-level rules
+    allow, evaluates the plan on each batch and yields every scenario after the last one.
+    """
+    plan = plan_rules(scenario_ids, params)
+    if chunked and not plan.row_local:
+        raise ValueError("Only row-level rules can be evaluated batch by batch")
+    shared = plan.explain()
+    logger.info(f"Rule plan for scenarios {scenario_ids}: {shared['steps']} steps "
+                f"({shared['steps_without_sharing']} without sharing)")
+
+    if not chunked:
+        if dataset is None:
+            dataset = load_dataset_by_id(dataset_id, columns=plan.columns)
+        claim_ids = dataset.df['Claim_ID']
+        for scenario_id, flags, error in plan.evaluate_each(dataset):
+            yield scenario_id, None if error else get_scenario(scenario_id).rule_result(claim_ids[flags]), error
+        return
+
+    flagged = {scenario_id: [] for scenario_id in scenario_ids}
+    errors = {}
+    for batch in iter_batches_by_id(dataset_id, columns=plan.columns):
+        flags, batch_errors = plan.evaluate(batch)
+        errors.update(batch_errors)
+        claim_ids = batch.df['Claim_ID']
+        for scenario_id, rows in flags.items():
+            flagged[scenario_id].append(claim_ids[rows])
+
+    for scenario_id in scenario_ids:
+        if scenario_id in errors:
+            yield scenario_id, None, errors[scenario_id]
+            continue
+        parts = flagged[scenario_id]
+        claim_ids = pd.concat(parts, ignore_index=True) if parts else pd.Series([], dtype=object)
+        yield scenario_id, get_scenario(scenario_id).rule_result(claim_ids), None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_guard:
+        if _pool is None:
+            # Workers are forked from a clean single-threaded server process rather than from
+            # the threaded web server, where available
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(max_workers=ANALYZE_WORKERS, mp_context=multiprocessing.get_context(method))
+            logger.info(f"Started scenario pool with {ANALYZE_WORKERS} {method} workers")
+        return _pool
+
+
+def _discard_pool():
+    global _pool
+    with _pool_guard:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(_discard_pool)
+
+
+def _task_outcomes(scenario_ids: List[int], dataset_id: str, chunked: bool,
+                   dataset: Optional[ClaimsDataset] = None,
+                   params: Optional[Dict[int, Dict]] = None) -> Iterator[Tuple[int, Optional[ScenarioResult], Optional[Exception]]]:
+    """(scenario_id, result, error) of one task as each scenario finishes: a single scenario, or a group of rules."""
+    params = params or {}
+    done = set()
+    try:
+        if get_scenario(scenario_ids[0]).rule:
+            for scenario_id, result, error in run_rules(scenario_ids, dataset_id, chunked, dataset, params):
+                done.add(scenario_id)
+                yield scenario_id, result, error
+            return
+        scenario_id = scenario_ids[0]
+        result = run_scenario(scenario_id, dataset_id, chunked, dataset, params.get(scenario_id))
+        done.add(scenario_id)
+        yield scenario_id, result, None
+    except Exception as e:
+        for scenario_id in scenario_ids:
+            if scenario_id not in done:
+                yield scenario_id, None, e
+
+
+def _run_task(scenario_ids: List[int], dataset_id: str, chunked: bool,
+              dataset: Optional[ClaimsDataset] = None,
+              params: Optional[Dict[int, Dict]] = None) -> Dict[int, Tuple[Optional[ScenarioResult], Optional[Exception]]]:
+    """{scenario_id: (result, error)} for one task, run in a worker process."""
+    return {scenario_id: (result, error)
+            for scenario_id, result, error in _task_outcomes(scenario_ids, dataset_id, chunked, dataset, params)}
+
+
+def _result_key(scenario_id: int, dataset_id: str, kind: str, params: Optional[Dict]) -> Optional[str]:
+    """Result cache key of a scenario's run() or details() on a stored dataset (None if not cacheable)."""
+    info = get_dataset_info(dataset_id)
+    params = get_scenario(scenario_id).cache_params(params)
+    if info is None or params is None:
+        return None
+    return cache_key(info["content_hash"], scenario_id, kind, params)
+
+
+def run_scenarios(scenario_ids: Iterable[int], dataset_id: str, chunked_ids: Iterable[int] = (),
+                  parallel: Optional[bool] = None,
+                  params: Optional[Dict[int, Dict]] = None) -> Iterator[Tuple[int, Optional[ScenarioResult], Optional[Exception]]]:
+    """
+    Yield (scenario_id, result, error) for each scenario as it finishes, cached results first.
+    The others go to the worker pool, which reads the dataset from its cache, or with
+    parallel=False run one after another in this process; parallel defaults to the pool when
+    more than one task is left to run. `params` maps scenario IDs to overrides of their
+    registered parameters.
+    """
+    params = params or {}
+    keys = {scenario_id: _result_key(scenario_id, dataset_id, 'run', params.get(scenario_id))
+            for scenario_id in scenario_ids}
+    # The cache is looked up once: the scenarios missing here are the ones run, and the only
+    # ones whose columns are loaded
+    missing = []
+    for scenario_id, key in keys.items():
+        result = result_cache.get(key)
+        if result is None:
+            missing.append(scenario_id)
+        else:
+            yield scenario_id, result, None
+
+    for scenario_id, result, error in _run_uncached(missing, dataset_id, chunked_ids, parallel, params):
+        if error is None:
+            result_cache.put(keys[scenario_id], result)
+        yield scenario_id, result, error
+
+
+def scenario_details(scenario_id: int, dataset_id: str, params: Optional[Dict] = None) -> List[Dict]:
+    """A scenario's details() records on a stored dataset, from the result cache where possible."""
+    scenario = get_scenario(scenario_id)
+    if scenario.details_from_claims:
+        # The records are the run() Claim_IDs, so a run cached by /api/analyze answers this too
+        _, result, error = next(run_scenarios([scenario_id], dataset_id, parallel=False, params={scenario_id: params}))
+        if error is not None:
+            raise error
+        return scenario.details_of(result)
+
+    key = _result_key(scenario_id, dataset_id, 'details', params)
+    records = result_cache.get(key)
+    if records is None:
+        records = scenario.details(load_dataset_by_id(dataset_id), params)
+        result_cache.put(key, records)
+    return records
+
+
+def rescore_scenario(scenario_id: int, dataset_id: str, params: Optional[Dict] = None) -> ScenarioResult:
+    """
+    A rescorable scenario's run() result under params, from its stored per-group statistic.
+    The statistic is computed and stored the first time a dataset content is rescored.
+    """
+    scenario = get_scenario(scenario_id)
+    content_hash = get_dataset_info(dataset_id)["content_hash"]
+    # A rule's statistic is named by what it computes, so a changed rule does not reuse a stored one
+    name = scenario.stats_name(params)
+    stats_key = cache_key(content_hash, scenario_id, 'groupstats', {"name": name})
+    stats = result_cache.get(stats_key)
+    if stats is None:
+        stats = load_group_stats(content_hash, name)
+        if stats is None:
+            stats = scenario.group_stats(load_dataset_by_id(dataset_id, columns=scenario.required_columns), params)
+            save_group_stats(content_hash, name, stats)
+        result_cache.put(stats_key, stats)
+
+    # Equal to run() under the same params, so /api/analyze can reuse it
+    result = scenario.rescore(stats, params)
+    result_cache.put(_result_key(scenario_id, dataset_id, 'run', params), result)
+    return result
+
+
+_scoring_states = ResultCache(max_bytes=SCORING_STATE_BYTES, folder=None)
+
+
+def _scoring_state(content_hash: str, name: str, build: Callable[[], pd.DataFrame],
+                   wrap: Callable[[pd.DataFrame], object] = lambda frame: frame):
+    """
+    A history's scoring state: from memory, else wrap() of its stored frame, else wrap() of
+    build(), which is stored for the next process.
+    """
+    key = f"{content_hash}-{name}"
+    state = _scoring_states.get(key)
+    if state is None:
+        frame = load_group_stats(content_hash, name)
+        if frame is None:
+            frame = build()
+            save_group_stats(content_hash, name, frame)
+        state = wrap(frame)
+        _scoring_states.put(key, state)
+    return state
+
+
+def score_claims(dataset_id: str, claims: ClaimsDataset, scenario_ids: Iterable[int],
+                 params: Optional[Dict[int, Dict]] = None) -> Dict[int, Tuple[Optional[ScenarioResult], Optional[Exception]]]:
+    """
+    {scenario_id: (result, error)} for new claims scored against a stored dataset as their
+    history: declared rules as one plan over the state of their group statistics, scorable
+    scenarios against their scoring state, other row-level scenarios on the claims alone.
+    """
+    params = params or {}
+    content_hash = get_dataset_info(dataset_id)["content_hash"]
+    scenarios = [get_scenario(scenario_id) for scenario_id in scenario_ids]
+    outcomes = {}
+
+    ruled = [scenario for scenario in scenarios if scenario.rule]
+    if ruled:
+        plan = plan_rules([scenario.scenario_id for scenario in ruled], params)
+        loaded = []
+
+        def history() -> ClaimsDataset:
+            # The history is read at most once, and only if a state has to be built
+            if not loaded:
+                loaded.append(load_dataset_by_id(dataset_id, columns=plan.columns))
+            return loaded[0]
+
+        states = {}
+        for name, step in plan.statistics().items():
+            try:
+                states[name] = _scoring_state(content_hash, f"score-{name}",
+                                              lambda: GroupState.build(step, history()).frame,
+                                              lambda frame: GroupState(step, frame))
+            except Exception as e:
+                states[name] = e
+        flags, errors = plan.score(claims, states)
+        claim_ids = claims.df['Claim_ID']
+        for scenario in ruled:
+            if scenario.scenario_id in errors:
+                outcomes[scenario.scenario_id] = (None, errors[scenario.scenario_id])
+            else:
+                outcomes[scenario.scenario_id] = (scenario.rule_result(claim_ids[flags[scenario.scenario_id]]), None)
+
+    for scenario in scenarios:
+        if scenario.rule:
+            continue
+        scenario_params = params.get(scenario.scenario_id)
+        try:
+            if scenario.scorable:
+                state = _scoring_state(content_hash, f"scenario-{scenario.scenario_id}-score", lambda: scenario.scoring_state(
+                    load_dataset_by_id(dataset_id, columns=scenario.required_columns)))
+                outcomes[scenario.scenario_id] = (scenario.score(state, claims, scenario_params), None)
+            elif scenario.row_local:
+                outcomes[scenario.scenario_id] = (scenario.run(claims, scenario_params), None)
+            else:
+                raise ValueError(f"Scenario {scenario.scenario_id} cannot score new claims")
+        except Exception as e:
+            outcomes[scenario.scenario_id] = (None, e)
+    return {scenario.scenario_id: outcomes[scenario.scenario_id] for scenario in scenarios}
+
+
+def _run_uncached(scenario_ids: Iterable[int], dataset_id: str, chunked_ids: Iterable[int],
+                  parallel: Optional[bool], params: Dict[int, Dict]) -> Iterator[Tuple[int, Optional[ScenarioResult], Optional[Exception]]]:
+    """run_scenarios() without the cache: run every given scenario."""
+    chunked_ids = set(chunked_ids)
+
+    # One task per scenario, except declared rules: in memory, one task per group of rules that
+    # share costly steps; batch by batch, one task for all of them, so the file is read once
+    tasks: List[Tuple[List[int], bool]] = []
+    ruled: Dict[bool, List[int]] = {}
+    for scenario_id in scenario_ids:
+        chunked = scenario_id in chunked_ids
+        if get_scenario(scenario_id).rule:
+            ruled.setdefault(chunked, []).append(scenario_id)
+        else:
+            tasks.append(([scenario_id], chunked))
+    for chunked, rule_ids in ruled.items():
+        groups = [rule_ids] if chunked else plan_rules(rule_ids, params).partition()
+        tasks.extend((group, chunked) for group in groups)
+
+    # Several tasks run in parallel worker processes that memory-map the dataset's columnar
+    # cache; otherwise the upload is loaded once, restricted to the columns the in-memory
+    # scenarios read, and every one of them works from the same dataset
+    in_memory = [scenario_id for task, chunked in tasks if not chunked for scenario_id in task]
+    if parallel is None:
+        parallel = len(tasks) > 1
+    if parallel and ANALYZE_WORKERS > 1 and len(tasks) > 1 and in_memory:
+        parallel = cache_dataset_by_id(dataset_id)
+    if not parallel or ANALYZE_WORKERS <= 1 or len(tasks) <= 1:
+        dataset = None
+        if len(in_memory) > 1:
+            dataset = load_dataset_by_id(dataset_id, columns=required_columns_for(in_memory))
+        for task, chunked in tasks:
+            yield from _task_outcomes(task, dataset_id, chunked, None if chunked else dataset, params)
+        return
+
+    pending = list(tasks)
+    try:
+        pool = _get_pool()
+        futures = {pool.submit(_run_task, task, dataset_id, chunked, None, params): (task, chunked) for task, chunked in tasks}
+        for future in as_completed(futures):
+            task, chunked = futures[future]
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                raise error
+            pending.remove((task, chunked))
+            outcomes = {scenario_id: (None, error) for scenario_id in task} if error else future.result()
+            for scenario_id, (result, task_error) in outcomes.items():
+                yield scenario_id, result, task_error
+    except BrokenProcessPool as e:
+        # A worker died (e.g. out of memory); finish the rest here and start a fresh pool next time
+        logger.error(f"Scenario pool failed ({e}); running {[task for task, _ in pending]} in process")
+        _discard_pool()
+        for task, chunked in pending:
+            yield from _task_outcomes(task, dataset_id, chunked, None, params)
@@ -0,0 +1,574 @@
+"""
+Registry of the fraud detection scenarios.
+
+Each scenario is declared once below: its display metadata, where run() reports its count,
+its default parameters, its declarative rule (see rule_plan) if it has one, how it can be
+rescored or score new claims, and how /api/analyze shows its flagged claims.
+The Scenario-N.py module behind an entry is only imported the first time the scenario is used.
+A scenario with a rule is run, drilled into and rescored from its rule alone; its Scenario-N.py
+file only runs the rule from the command line (run_from_command_line).
+"""
+import os
+import sys
+import threading
+import importlib.util
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+from claims_dataset import ClaimsDataset
+from outlier_export import export_outliers
+from rule_plan import Rule, RulePlan, rule
+
+SCENARIO_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+_import_lock = threading.Lock()
+
+
+def import_module_from_file(file_path, module_name):
+    spec = importlib.util.spec_from_file_location(module_name, file_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def coerce_param(name: str, value, default):
+    """A parameter override as the type of its registered default (unchanged if it has none)."""
+    if default is None or value is None or type(value) is type(default):
+        return value
+    if isinstance(default, bool):
+        text = str(value).strip().lower()
+        if text in ('true', '1', 'yes'):
+            return True
+        if text in ('false', '0', 'no'):
+            return False
+    elif isinstance(default, (int, float)):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = None
+        # An int parameter takes whole numbers only ("2" or 2.0, not "2.5")
+        if number is not None and (isinstance(default, float) or number.is_integer()):
+            return type(default)(number)
+    elif isinstance(default, str):
+        return str(value)
+    raise ValueError(f"Parameter {name} must be {type(default).__name__}, not {value!r}")
+
+
+@dataclass
+class AnomalyCard:
+    """How /api/analyze shows the first `limit` flagged claims of a scenario as anomalies."""
+    tag: str
+    type: str
+    provider_prefix: str
+    provider_name: str
+    description: Union[str, Callable[[int], str]]
+    severity: str
+    service_date: str
+    risk_score: int
+    billed_amount: int
+    billed_step: int
+    limit: int
+
+    def build(self, scenario_id: int, claim_ids: List) -> List[Dict]:
+        return [{
+            "id": f"scenario{scenario_id}_{self.tag}_{idx}",
+            "type": self.type,
+            "method": "Python Rules",
+            "claim_id": claim_id,
+            "provider_id": f"{self.provider_prefix}{idx + 1}",
+            "provider_name": f"{self.provider_name} {idx + 1}",
+            "description": self.description(idx) if callable(self.description) else self.description,
+            "severity": self.severity,
+            "service_date": self.service_date,
+            "risk_score": self.risk_score,
+            "billed_amount": self.billed_amount + (idx * self.billed_step)
+        } for idx, claim_id in enumerate(claim_ids[:self.limit])]
+
+
+@dataclass
+class ScenarioResult:
+    """Outcome of one scenario run, whatever count key its module reports."""
+    scenario_id: int
+    count: int
+    claim_ids: List
+    raw: Dict = field(default_factory=dict)
+
+
+@dataclass
+class Scenario:
+    scenario_id: int
+    name: str
+    description: str
+    method: str
+    risk_level: str
+    count_key: str                       # key of the flagged count in the module's run() result
+    threshold: str                       # human-readable rule, for the detection log
+    class_name: Optional[str] = None     # class declaring REQUIRED_COLUMNS (module level if None)
+    params: Dict = field(default_factory=dict)
+    group_key: Optional[str] = None      # claims are only compared within groups of this column
+    row_local: bool = False              # each claim is flagged on its own row alone
+    chunked: bool = False                # runs batch by batch out of core (module run_chunked(), or a row-level rule)
+    rule: Optional[str] = None           # its declarative rule (rules.json), which then defines every result
+    details_from_claims: bool = False    # details() is just the run() Claim_IDs as {"Claim_ID": ...} records
+    rescorable: bool = False             # module has group_stats()/rescore() to re-apply thresholds without a scan
+    scorable: bool = False               # module has scoring_state()/score() to score new claims against a history
+    cacheable: Optional[Callable[[Dict], bool]] = None  # whether results under these params may be cached (always if None)
+    anomaly: Optional[AnomalyCard] = None
+    _module: object = field(default=None, init=False, repr=False)
+
+    @property
+    def module(self):
+        """The Scenario-N.py module, imported on first use."""
+        if self._module is None:
+            with _import_lock:
+                if self._module is None:
+                    self._module = import_module_from_file(
+                        os.path.join(SCENARIO_FOLDER, f"Scenario-{self.scenario_id}.py"),
+                        f"scenario{self.scenario_id}")
+        return self._module
+
+    @property
+    def required_columns(self) -> List[str]:
+        if self.rule:
+            return self.declared_rule.columns
+        owner = getattr(self.module, self.class_name) if self.class_name else self.module
+        return owner.REQUIRED_COLUMNS
+
+    def _params(self, params: Optional[Dict]) -> Dict:
+        # Overrides take the type of the registered default, so "2" from a query string runs
+        # and is cached exactly as 2 from JSON
+        overrides = {name: coerce_param(name, value, self.params.get(name)) for name, value in (params or {}).items()}
+        return {**self.params, **overrides}
+
+    def _result(self, raw: Optional[Dict]) -> ScenarioResult:
+        raw = raw or {}
+        return ScenarioResult(self.scenario_id, raw.get(self.count_key, 0), raw.get('claim_ids', []), raw)
+
+    def effective_params(self, params: Optional[Dict] = None) -> Dict:
+        """Its registered parameters with params' overrides applied, as run() uses them."""
+        return self._params(params)
+
+    def cache_params(self, params: Optional[Dict]) -> Optional[Dict]:
+        """Effective parameters to key cached results by, or None if results under them are not cacheable."""
+        params = self._params(params)
+        if self.cacheable is not None and not self.cacheable(params):
+            return None
+        return params
+
+    def run(self, dataset, params: Optional[Dict] = None) -> ScenarioResult:
+        if self.rule:
+            return self.rule_result(dataset.df['Claim_ID'][self._rule_flags(dataset, params)])
+        return self._result(self.module.run(dataset, self._params(params)))
+
+    def run_chunked(self, batches: Iterable, params: Optional[Dict] = None) -> ScenarioResult:
+        if self.rule:
+            parts = [batch.df['Claim_ID'][self._rule_flags(batch, params)] for batch in batches]
+            return self.rule_result(pd.concat(parts, ignore_index=True) if parts else pd.Series([], dtype=object))
+        return self._result(self.module.run_chunked(batches, self._params(params)))
+
+    @property
+    def declared_rule(self) -> Rule:
+        return rule(self.rule)
+
+    def rule_plan(self, params: Optional[Dict] = None) -> RulePlan:
+        """Its declared rule alone, compiled under params."""
+        return plan_rules([self.scenario_id], {self.scenario_id: params})
+
+    def _rule_flags(self, dataset, params: Optional[Dict]):
+        """One bool per claim of a ClaimsDataset: whether its rule flags it under params."""
+        flags, errors = self.rule_plan(params).evaluate(dataset)
+        if self.scenario_id in errors:
+            raise errors[self.scenario_id]
+        return flags[self.scenario_id]
+
+    def rule_result(self, claim_ids: pd.Series) -> ScenarioResult:
+        """The run() result from the Claim_IDs of the claims its rule flags, in claim order."""
+        if self.declared_rule.distinct:
+            claim_ids = claim_ids.drop_duplicates()
+        return self._result({self.count_key: len(claim_ids), "claim_ids": claim_ids.tolist()})
+
+    def details(self, dataset, params: Optional[Dict] = None) -> List[Dict]:
+        if self.rule:
+            # The claims its rule flags, with the columns the rule reads
+            flagged = dataset.frame(self.required_columns)[self._rule_flags(dataset, params)]
+            if self.declared_rule.distinct:
+                flagged = flagged.drop_duplicates('Claim_ID')
+            return flagged.to_dict('records')
+        return self.module.details(dataset, self._params(params))
+
+    def stats_name(self, params: Optional[Dict] = None) -> str:
+        """Name its group_stats() under params are stored by; a rule's names what its statistic computes."""
+        if self.rule:
+            return f"scenario-{self.scenario_id}-{self.rule_plan(params).statistic_name(self.scenario_id)}"
+        return f"scenario-{self.scenario_id}"
+
+    def group_stats(self, dataset, params: Optional[Dict] = None) -> pd.DataFrame:
+        """Per-claim table of the group statistic the thresholds apply to (rescorable scenarios only)."""
+        if self.rule:
+            return self.rule_plan(params).group_statistic(self.scenario_id, dataset)
+        return self.module.group_stats(dataset)
+
+    def rescore(self, stats: pd.DataFrame, params: Optional[Dict] = None) -> ScenarioResult:
+        """The run() result under params, from group_stats() output."""
+        if self.rule:
+            return self.rule_result(stats['Claim_ID'][self.rule_plan(params).rethreshold(self.scenario_id, stats)])
+        return self._result(self.module.rescore(stats, self._params(params)))
+
+    @property
+    def scores_claims(self) -> bool:
+        """Whether /api/score can evaluate it on new claims: by its rule, its scoring state, or on the claims alone."""
+        return bool(self.rule) or self.scorable or self.row_local
+
+    def scoring_state(self, dataset) -> pd.DataFrame:
+        """The per-claim history new claims are scored against (scorable scenarios only)."""
+        return self.module.scoring_state(dataset)
+
+    def score(self, state: pd.DataFrame, claims, params: Optional[Dict] = None) -> ScenarioResult:
+        """The run() result for new claims (a ClaimsDataset) scored against scoring_state() of their history."""
+        return self._result(self.module.score(state, claims, self._params(params)))
+
+    def details_of(self, result: ScenarioResult) -> List[Dict]:
+        """details() records from a run() result (details_from_claims scenarios only)."""
+        return [{"Claim_ID": claim_id} for claim_id in result.claim_ids]
+
+    def anomalies(self, result: ScenarioResult) -> List[Dict]:
+        if self.anomaly is None or not result.count or not result.claim_ids:
+            return []
+        return self.anomaly.build(self.scenario_id, result.claim_ids)
+
+    def metadata(self) -> Dict:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "method": self.method,
+            "risk_level": self.risk_level
+        }
+
+
+SCENARIOS: Dict[int, Scenario] = {}
+
+
+def register(scenario: Scenario) -> Scenario:
+    SCENARIOS[scenario.scenario_id] = scenario
+    return scenario
+
+
+def get_scenario(scenario_id) -> Optional[Scenario]:
+    return SCENARIOS.get(scenario_id)
+
+
+def plan_rules(scenario_ids: Iterable[int], params: Optional[Dict[int, Dict]] = None) -> RulePlan:
+    """The declared rules of the given scenarios as one plan keyed by scenario ID, under their effective parameters."""
+    params = params or {}
+    scenarios = [SCENARIOS[scenario_id] for scenario_id in scenario_ids]
+    return RulePlan({scenario.scenario_id: scenario.declared_rule for scenario in scenarios},
+                    {scenario.scenario_id: scenario._params(params.get(scenario.scenario_id)) for scenario in scenarios})
+
+
+def required_columns_for(scenario_ids: Iterable[int]) -> List[str]:
+    """Union of the columns read by the given scenarios (Claim_ID is always kept)."""
+    columns = ['Claim_ID']
+    for scenario_id in scenario_ids:
+        scenario = get_scenario(scenario_id)
+        for col in scenario.required_columns if scenario else []:
+            if col not in columns:
+                columns.append(col)
+    return columns
+
+
+def scenario_id_from(ref) -> Optional[int]:
+    """Scenario number from a request entry or JSON key: 3, "3" or "scenario-3"; None if it is neither."""
+    if isinstance(ref, str):
+        if ref.isdigit():
+            return int(ref) if int(ref) in SCENARIOS else None
+        prefix, _, number = ref.partition('-')
+        if prefix == 'scenario' and number.isdigit() and int(number) in SCENARIOS:
+            return int(number)
+        return None
+    return ref
+
+
+def run_from_command_line(scenario_id: int, default_csv: str = "synthetic_healthcare_fraud_data.csv"):
+    """Run a scenario on the claims CSV named on the command line and export its flagged Claim_IDs."""
+    scenario = SCENARIOS[scenario_id]
+    result = scenario.run(ClaimsDataset.from_csv(sys.argv[1] if len(sys.argv) > 1 else default_csv))
+    print(f"Scenario {scenario_id} ({scenario.name}): {result.count} flagged claims")
+    path = export_outliers(pd.DataFrame({"Claim_ID": result.claim_ids}), f"Scenario-{scenario_id}_outliers.csv")
+    if path:
+        print(f"Results saved to {path}")
+
+
+# ==================== SCENARIOS ====================
+register(Scenario(
+    1, "Benefit Outlier Detection", "Identifies claims with unusual benefit amounts using statistical analysis",
+    method="Statistical Analysis", risk_level="High",
+    count_key="outliers_count", threshold="z_score > 3.0",
+    class_name="BenefitOutlierDetector", params={"baseline": "dataset"},
+    # Against the history baseline the result also depends on every other stored upload
+    cacheable=lambda params: params.get("baseline") != "history",
+    anomaly=AnomalyCard(
+        "outlier", "Benefit Outlier", "PROV_", "Provider",
+        "Unusual benefit amount detected in claim analysis",
+        severity="High", service_date="2024-01-01", risk_score=85,
+        billed_amount=15000, billed_step=1000, limit=50),
+))
+
+register(Scenario(
+    2, "Chemotherapy Gap Detection", "Detects suspicious gaps in chemotherapy treatment sequences",
+    method="Pattern Analysis", risk_level="High",
+    count_key="gaps_count", threshold="gap_days > 1.5 * median_gap",
+    class_name="ChemoGapDetector", params={"min_gap": 3, "max_gap": 13}, group_key="Member_ID", rescorable=True,
+    scorable=True,
+    anomaly=AnomalyCard(
+        "gap", "Chemotherapy Gap", "ONCO_PROV_", "Oncology Provider",
+        lambda idx: f"Gap of {15 + idx * 5} days detected between chemotherapy treatments",
+        severity="High", service_date="2024-01-15", risk_score=90,
+        billed_amount=25000, billed_step=2000, limit=12),
+))
+
+register(Scenario(
+    3, "Cross-Country Fraud Detection", "Identifies patients with overlapping treatments in different countries",
+    method="Geographic Analysis", risk_level="Critical",
+    count_key="anomalies_count", threshold="service in multiple countries on same day",
+    class_name="CrossCountryFraudDetector", group_key="Member_ID",
+    anomaly=AnomalyCard(
+        "cross_country", "Cross-Country Fraud", "INTL_PROV_", "International Provider",
+        "Patient received treatment in multiple countries within 24 hours",
+        severity="High", service_date="2024-01-20", risk_score=95,
+        billed_amount=35000, billed_step=5000, limit=25),
+))
+
+register(Scenario(
+    4, "Sunday Claims Analysis", "Flags claims for treatments provided on Sundays",
+    method="Temporal Analysis", risk_level="Medium",
+    count_key="sunday_claims_count", threshold="day_of_week == Sunday",
+    row_local=True, rule="sunday_treatment",
+    anomaly=AnomalyCard(
+        "sunday", "Sunday Treatment", "WEEKEND_PROV_", "Weekend Provider",
+        "Treatment provided on Sunday which is unusual",
+        severity="Medium", service_date="2024-01-07", risk_score=65,
+        billed_amount=8000, billed_step=500, limit=50),
+))
+
+register(Scenario(
+    5, "Multiple Claims Same Invoice", "Detects multiple claims submitted with identical invoice reference numbers",
+    method="Invoice Analysis", risk_level="High",
+    count_key="duplicate_claims_count", threshold="duplicate invoice_no_reference",
+    group_key="Invoice_No_Reference", rule="shared_invoice_reference",
+    anomaly=AnomalyCard(
+        "duplicate", "Duplicate Invoice", "DUP_PROV_", "Duplicate Provider",
+        "Multiple claims submitted with same invoice reference number",
+        severity="High", service_date="2024-01-10", risk_score=88,
+        billed_amount=12000, billed_step=800, limit=30),
+))
+
+register(Scenario(
+    6, "Inpatient/Outpatient Same Date", "Identifies patients with both inpatient and outpatient services on same date",
+    method="Service Type Analysis", risk_level="High",
+    count_key="conflict_claims_count", threshold="inpatient and outpatient service on same day",
+    group_key="Member_ID", rule="inpatient_outpatient_same_day",
+    anomaly=AnomalyCard(
+        "conflict", "Service Type Conflict", "CONF_PROV_", "Conflict Provider",
+        "Patient has both inpatient and outpatient services on same date",
+        severity="High", service_date="2024-01-12", risk_score=92,
+        billed_amount=18000, billed_step=1200, limit=20),
+))
+
+register(Scenario(
+    7, "Provider Multi-Country", "Flags non-global providers operating in more than 3 countries",
+    method="Geographic Analysis", risk_level="Medium",
+    count_key="multi_country_claims_count", threshold="provider in > 3 countries",
+    params={"max_countries": 3}, group_key="Provider_ID",
+    details_from_claims=True, rescorable=True, rule="provider_multi_country",
+    anomaly=AnomalyCard(
+        "multicountry", "Multi-Country Provider", "MULTI_PROV_", "Multi-Country Provider",
+        "Provider operating in more than 3 countries",
+        severity="Medium", service_date="2024-01-18", risk_score=78,
+        billed_amount=22000, billed_step=1500, limit=40),
+))
+
+register(Scenario(
+    8, "Multiple Provider Same Date", "Detects patients visiting more than 2 providers on the same date",
+    method="Provider Overlap Analysis", risk_level="Medium",
+    count_key="overlapping_visits_count", threshold="patient visiting > 2 providers on same day",
+    class_name="Scenario8Analyzer", group_key="Member_ID",
+    anomaly=AnomalyCard(
+        "overlap", "Provider Overlap", "OVER_PROV_", "Overlapping Provider",
+        "Patient visited more than 2 providers on same date",
+        severity="Medium", service_date="2024-01-22", risk_score=72,
+        billed_amount=9500, billed_step=600, limit=35),
+))
+
+register(Scenario(
+    9, "Member Multi-Currency", "Identifies members with claims in 3 or more different currencies",
+    method="Currency Pattern Analysis", risk_level="Medium",
+    count_key="multi_currency_claims_count", threshold="member with claims in >= 3 currencies",
+    params={"min_currencies": 3}, group_key="Member_ID", rescorable=True,
+    rule="member_multi_currency",
+    anomaly=AnomalyCard(
+        "currency", "Multi-Currency Member", "CURR_PROV_", "Currency Provider",
+        "Member has claims in 3 or more different currencies",
+        severity="Medium", service_date="2024-01-25", risk_score=75,
+        billed_amount=14000, billed_step=900, limit=25),
+))
+
+register(Scenario(
+    10, "Gender-Procedure Mismatch", "Detects gender-specific procedures assigned to wrong gender",
+    method="Medical Validation", risk_level="High",
+    count_key="gender_mismatch_count", threshold="gender-specific procedure on wrong gender",
+    row_local=True, chunked=True, details_from_claims=True,
+    rule="gender_procedure_mismatch",
+    anomaly=AnomalyCard(
+        "gender", "Gender-Procedure Mismatch", "GENDER_PROV_", "Gender Provider",
+        "Gender-specific procedure assigned to wrong gender",
+        severity="High", service_date="2024-01-28", risk_score=95,
+        billed_amount=16000, billed_step=1100, limit=30),
+))
+
+register(Scenario(
+    11, "Early Invoice Date", "Flags claims where invoice date is before treatment date",
+    method="Temporal Validation", risk_level="High",
+    count_key="early_invoice_count", threshold="invoice date < treatment from date",
+    row_local=True, chunked=True, details_from_claims=True, rule="early_invoice",
+    anomaly=AnomalyCard(
+        "early", "Early Invoice Date", "EARLY_PROV_", "Early Provider",
+        "Invoice date is earlier than treatment date",
+        severity="High", service_date="2024-01-30", risk_score=90,
+        billed_amount=11000, billed_step=700, limit=25),
+))
+
+register(Scenario(
+    12, "Adult Pediatric Diagnosis", "Identifies adults with pediatric/neonatal diagnoses",
+    method="Medical Code Analysis", risk_level="High",
+    count_key="adult_pediatric_count", threshold="age >= 18 and pediatric diagnosis",
+    row_local=True, chunked=True, rule="adult_pediatric_diagnosis",
+    anomaly=AnomalyCard(
+        "pediatric", "Adult Pediatric Diagnosis", "PED_PROV_", "Pediatric Provider",
+        "Adult patient assigned pediatric/neonatal diagnosis",
+        severity="High", service_date="2024-02-01", risk_score=88,
+        billed_amount=13000, billed_step=950, limit=20),
+))
+
+register(Scenario(
+    13, "Multiple Payee Types", "Flags same member with different payee types on same invoice date",
+    method="Billing Analysis", risk_level="Medium",
+    count_key="multiple_payee_count", threshold="member with > 1 payee type on same day",
+    group_key="Member_ID", rule="multiple_payee_types",
+    anomaly=AnomalyCard(
+        "payee", "Multiple Payee Types", "PAYEE_PROV_", "Payee Provider",
+        "Same member with different payee types on same invoice date",
+        severity="Medium", service_date="2024-02-03", risk_score=70,
+        billed_amount=9500, billed_step=650, limit=15),
+))
+
+register(Scenario(
+    14, "Excessive Diagnoses", "Detects members with more than 8 diagnoses on same day",
+    method="Medical Complexity Analysis", risk_level="Medium",
+    count_key="excessive_diagnoses_count", threshold="> 8 diagnoses on same day",
+    params={"max_diagnoses": 8}, group_key="Member_ID",
+    details_from_claims=True, rescorable=True, rule="excessive_diagnoses",
+    anomaly=AnomalyCard(
+        "diagnoses", "Excessive Diagnoses", "DIAG_PROV_", "Diagnosis Provider",
+        "Member has more than 8 diagnoses on same day",
+        severity="Medium", service_date="2024-02-05", risk_score=68,
+        billed_amount=17000, billed_step=1300, limit=18),
+))
+
+register(Scenario(
+    15, "Hospital Benefits from Non-Hospital Providers", "Flags non-hospital providers using hospital-only benefit codes",
+    method="Benefit Code Validation", risk_level="High",
+    count_key="hospital_benefit_mismatch_count", threshold="non-hospital with hospital benefit codes",
+    row_local=True, chunked=True, details_from_claims=True,
+    rule="hospital_benefit_non_hospital_provider",
+    anomaly=AnomalyCard(
+        "hospital", "Hospital Benefit Mismatch", "HOSP_PROV_", "Non-Hospital Provider",
+        "Non-hospital provider using hospital-only benefit codes",
+        severity="High", service_date="2024-02-08", risk_score=92,
+        billed_amount=19000, billed_step=1400, limit=25),
+))
+
+register(Scenario(
+    16, "Paid Claims from Veterinary Providers", "Flags paid claims from specific veterinary providers",
+    method="Provider Type Validation", risk_level="High",
+    count_key="veterinary_claims_count", threshold="claim from veterinary provider",
+    row_local=True, chunked=True, details_from_claims=True,
+    rule="paid_veterinary_claim",
+    anomaly=AnomalyCard(
+        "vet", "Veterinary Provider Claims", "VET_PROV_", "Veterinary Provider",
+        "Human healthcare claims from veterinary providers",
+        severity="High", service_date="2024-02-10", risk_score=98,
+        billed_amount=8500, billed_step=500, limit=15),
+))
+
+register(Scenario(
+    17, "Multiple MRI/CT Same Day", "Detects multiple MRI/CT procedures on same day for same diagnosis",
+    method="Procedure Utilization Analysis", risk_level="Medium",
+    count_key="multiple_mri_ct_count", threshold="> 1 MRI/CT scan on same day for same diagnosis",
+    group_key="Member_ID", details_from_claims=True,
+    rule="multiple_mri_ct_same_day",
+    anomaly=AnomalyCard(
+        "mri", "Multiple MRI/CT Same Day", "MRI_PROV_", "Imaging Provider",
+        "Multiple MRI/CT procedures on same day for same diagnosis",
+        severity="Medium", service_date="2024-02-12", risk_score=75,
+        billed_amount=25000, billed_step=2000, limit=20),
+))
+
+register(Scenario(
+    18, "Placeholder Scenario", "Placeholder for future fraud detection scenario",
+    method="Placeholder Analysis", risk_level="Low",
+    count_key="placeholder_count", threshold="N/A",
+    class_name="Scenario18Analyzer", details_from_claims=True,
+))
+
+register(Scenario(
+    19, "Multiple Screenings Same Year", "Flags members with multiple screenings in same year",
+    method="Screening Frequency Analysis", risk_level="Medium",
+    count_key="multiple_screenings_count", threshold="> 1 screening of same type in a year",
+    params={"max_screenings": 1}, group_key="Member_ID",
+    details_from_claims=True, rescorable=True, rule="multiple_screenings_same_year",
+    anomaly=AnomalyCard(
+        "screening", "Multiple Screenings Same Year", "SCREEN_PROV_", "Screening Provider",
+        "Member has multiple screenings in same year",
+        severity="Medium", service_date="2024-02-15", risk_score=72,
+        billed_amount=3500, billed_step=300, limit=22),
+))
+
+register(Scenario(
+    20, "Dialysis Without Kidney Diagnosis", "Flags dialysis claims without kidney/renal diagnoses",
+    method="Medical Code Validation", risk_level="High",
+    count_key="dialysis_without_kidney_count", threshold="dialysis claim without kidney diagnosis",
+    row_local=True, chunked=True, details_from_claims=True,
+    rule="dialysis_without_kidney_diagnosis",
+    anomaly=AnomalyCard(
+        "dialysis", "Dialysis Without Kidney Diagnosis", "DIAL_PROV_", "Dialysis Provider",
+        "Dialysis treatment without kidney/renal diagnosis",
+        severity="High", service_date="2024-02-18", risk_score=89,
+        billed_amount=15000, billed_step=1100, limit=18),
+))
+
+register(Scenario(
+    21, "Unusual Dentistry Claims", "Flags dentistry claims with non-dental diagnosis codes",
+    method="Specialty Code Validation", risk_level="Medium",
+    count_key="unusual_dentistry_count", threshold="dentistry claim with non-dental diagnosis",
+    class_name="Scenario21Analyzer", row_local=True, details_from_claims=True,
+    anomaly=AnomalyCard(
+        "dental", "Unusual Dentistry Claims", "DENT_PROV_", "Dental Provider",
+        "Dentistry claims with non-dental diagnosis codes",
+        severity="Medium", service_date="2024-02-20", risk_score=73,
+        billed_amount=2500, billed_step=200, limit=16),
+))
+
+register(Scenario(
+    22, "Invalid Migraine Claims", "Flags migraine diagnoses with invalid benefit codes",
+    method="Diagnosis-Benefit Validation", risk_level="Medium",
+    count_key="invalid_migraine_count", threshold="migraine diagnosis with invalid benefit code",
+    row_local=True, chunked=True, details_from_claims=True, rule="invalid_migraine_benefit",
+    anomaly=AnomalyCard(
+        "migraine", "Invalid Migraine Claims", "MIGR_PROV_", "Migraine Provider",
+        "Migraine diagnosis with invalid benefit codes",
+        severity="Medium", service_date="2024-02-22", risk_score=69,
+        billed_amount=1800, billed_step=150, limit=14),
+))
@@ -0,0 +1,75 @@
+"""
+Checks of the closed-form weekday-in-span test (calendar_spans) against enumerating each span's
+days with pd.date_range, as Scenario 4 did before it.
+
+Run with `python -m pytest test_calendar_spans.py` from the Backend folder.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from calendar_spans import SATURDAY, SUNDAY, span_contains_weekday, span_days
+
+# A Monday, so the week from it starts on every weekday
+MONDAY_START = pd.Timestamp("2025-01-06")
+
+
+def enumerated(starts, ends, weekday: int) -> list:
+    """Whether pd.date_range(start, end) holds a day falling on weekday, span by span."""
+    return [pd.notna(start) and pd.notna(end) and bool((pd.date_range(start, end).dayofweek == weekday).any())
+            for start, end in zip(starts, ends)]
+
+
+def spans(lengths, first_days=range(7), hour: int = 0):
+    """(starts, ends) of spans starting on each of first_days after MONDAY_START, ending length days later."""
+    starts, ends = [], []
+    for first_day in first_days:
+        start = MONDAY_START + pd.Timedelta(days=first_day, hours=hour)
+        for length in lengths:
+            starts.append(start)
+            ends.append(start + pd.Timedelta(days=length))
+    return pd.Series(starts), pd.Series(ends)
+
+
+@pytest.mark.parametrize("weekday", range(7))
+def test_spans_of_up_to_eight_days_from_every_weekday(weekday):
+    # Ending a day before the start, on the start itself, one day later, and 6, 7 and 8 days later
+    starts, ends = spans([-1, 0, 1, 6, 7, 8])
+    assert span_contains_weekday(starts, ends, weekday).tolist() == enumerated(starts, ends, weekday)
+
+
+@pytest.mark.parametrize("weekday", [SATURDAY, SUNDAY])
+def test_spans_starting_or_ending_on_the_weekend(weekday):
+    saturday, sunday = MONDAY_START + pd.Timedelta(days=5), MONDAY_START + pd.Timedelta(days=6)
+    day = pd.Timedelta(days=1)
+    starts = pd.Series([saturday, sunday, saturday, sunday, saturday - day, sunday + day, sunday - 7 * day])
+    ends = pd.Series([saturday, sunday, sunday, saturday, saturday, sunday + day, saturday])
+    flags = span_contains_weekday(starts, ends, weekday)
+    assert flags.tolist() == enumerated(starts, ends, weekday)
+    # The weekend day itself, alone or as either bound, is covered
+    assert flags[0] == (weekday == SATURDAY) and flags[1] == (weekday == SUNDAY) and flags[2]
+
+
+def test_spans_with_a_time_of_day():
+    # pd.date_range steps whole days from the start's time, so a span short of 24 hours covers its start only
+    starts, ends = spans([0, 0.5, 1, 6.5, 7], hour=18)
+    for weekday in range(7):
+        assert span_contains_weekday(starts, ends, weekday).tolist() == enumerated(starts, ends, weekday)
+
+
+def test_spans_with_a_missing_date_cover_no_day():
+    starts = pd.Series([pd.NaT, MONDAY_START, pd.NaT])
+    ends = pd.Series([MONDAY_START + pd.Timedelta(days=8), pd.NaT, pd.NaT])
+    for weekday in range(7):
+        assert not span_contains_weekday(starts, ends, weekday).any()
+    assert np.isnan(span_days(starts, ends)).all()
+
+
+def test_span_days_counts_what_date_range_enumerates():
+    starts, ends = spans([-3, -1, 0, 1, 6, 7, 8, 30])
+    assert span_days(starts, ends).tolist() == [len(pd.date_range(start, end)) for start, end in zip(starts, ends)]
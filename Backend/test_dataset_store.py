@@ -0,0 +1,59 @@
+"""
+Checks of the per-upload dataset store (dataset_store): appending new claims to a stored dataset.
+
+Run with `python -m pytest test_dataset_store.py` from the Backend folder.
+"""
+import io
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import dataset_store
+from dataset_store import append_upload, get_dataset_info, load_dataset_by_id, store_upload
+
+HEADER = "Claim_ID,Member_ID,Treatment from date,Treatment_to_date,Claim_invoice_date,Paid_amount\n"
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    """An empty store in a temporary folder."""
+    for name in ("CACHE_FOLDER", "UPLOADS_FOLDER", "DATASETS_FOLDER"):
+        monkeypatch.setattr(dataset_store, name, str(tmp_path / name.lower()))
+
+
+def claims_csv(first_claim: int, dates) -> bytes:
+    lines = [f"CLM{first_claim + i:05d},MBR{i % 3:03d},{day},{day},{day},100.0\n" for i, day in enumerate(dates)]
+    return (HEADER + "".join(lines)).encode()
+
+
+def upload(content: bytes) -> str:
+    return store_upload(io.BytesIO(content), "claims.csv")["dataset_id"]
+
+
+def test_day_first_dataset_accepts_a_delta_that_also_reads_month_first():
+    # Days above 12 make the stored book unambiguously day-first
+    dataset_id = upload(claims_csv(0, [f"{day:02d}/01/2025" for day in range(10, 30)]))
+    assert get_dataset_info(dataset_id)["date_format"] == "%d/%m/%Y"
+
+    # A short daily delta whose days are all <= 12 would be detected as %m/%d/%Y on its own
+    manifest, delta = append_upload(dataset_id, io.BytesIO(claims_csv(100, ["05/03/2025"] * 20)), "daily.csv")
+    assert manifest["rows"] == 40
+    assert manifest["date_format"] == "%d/%m/%Y"
+    assert (delta.df["Treatment_from_date"] == pd.Timestamp("2025-03-05")).all()
+
+    combined = load_dataset_by_id(dataset_id)
+    assert combined.df["Treatment_from_date"].iloc[-1] == pd.Timestamp("2025-03-05")
+
+
+def test_delta_with_dates_the_dataset_format_cannot_read_is_rejected():
+    dataset_id = upload(claims_csv(0, [f"{day:02d}/01/2025" for day in range(10, 30)]))
+    before = get_dataset_info(dataset_id)
+
+    with pytest.raises(ValueError, match="cannot read"):
+        append_upload(dataset_id, io.BytesIO(claims_csv(100, ["2025-03-05"] * 5)), "daily.csv")
+    # The dataset is left as it was
+    assert get_dataset_info(dataset_id) == before
@@ -0,0 +1,227 @@
+"""
+Checks of the sweep-line interval algorithms (interval_overlap) against the pairwise and
+per-day groupby analyzers they replaced in Scenario 3 and Scenario 8.
+
+Scenario 3 used to self-join each member's claims and keep the overlapping pairs; Scenario 8
+expanded every treatment span into one row per day and grouped by member and day. Both are
+rebuilt here as the reference, and must flag exactly the claims the sweeps flag, on hand-made
+edge cases (spans touching on one day, single-day spans, reversed spans, a provider seen on
+several claims) and on a random extract.
+
+Run with `python -m pytest test_interval_overlap.py` from the Backend folder.
+"""
+import os
+import sys
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from claims_dataset import ClaimsDataset
+from interval_overlap import busy_windows, iter_overlapping_pairs, merge_intervals, overlaps_windows
+from scenario_registry import SCENARIOS
+
+COLUMNS = ["Claim_ID", "Member_ID", "Provider_ID", "Treatment from date", "Treatment_to_date",
+           "Treatment_Country", "diagnosis_code"]
+
+
+def claims(rows) -> ClaimsDataset:
+    """A dataset from (claim, member, provider, from, to, country, diagnosis) tuples, dates as m/d/Y."""
+    return ClaimsDataset.from_frame(pd.DataFrame(rows, columns=COLUMNS))
+
+
+def random_claims(rows: int = 300, seed: int = 11) -> ClaimsDataset:
+    rng = np.random.default_rng(seed)
+    start = pd.Series(pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 30, rows), unit="D"))
+    # Mostly short spans, some single days, a few ending before they start
+    end = start + pd.to_timedelta(rng.integers(-1, 5, rows), unit="D")
+    claim_ids = [f"CLM{i:04d}" for i in range(rows)]
+    for position in rng.choice(np.arange(1, rows), rows // 20, replace=False):
+        claim_ids[position] = claim_ids[position - 1]
+    frame = pd.DataFrame({
+        "Claim_ID": claim_ids,
+        "Member_ID": rng.choice([f"MBR{i:02d}" for i in range(20)], rows),
+        "Provider_ID": rng.choice([f"PRV{i}" for i in range(5)], rows),
+        "Treatment from date": start.dt.strftime("%m/%d/%Y"),
+        "Treatment_to_date": end.dt.strftime("%m/%d/%Y").mask(rng.random(rows) < 0.1),
+        "Treatment_Country": rng.choice(["US", "ES", "IN"], rows),
+        "diagnosis_code": pd.Series(rng.choice(["A01", "B02", "C03"], rows)).mask(rng.random(rows) < 0.05),
+    })
+    return ClaimsDataset.from_frame(frame)
+
+
+# ==================== SCENARIO 3 ====================
+def pairwise_cross_country(dataset: ClaimsDataset) -> list:
+    """Claim_IDs Scenario 3 flagged with its self-join of each member's claims."""
+    df = dataset.frame(SCENARIOS[3].required_columns).rename(columns={"diagnosis_code": "Diagnostic_Code"})
+    df["Treatment_to_date"] = df["Treatment_to_date"].fillna(df["Treatment_from_date"])
+    df = df.dropna(subset=["Treatment_from_date", "Treatment_to_date", "Member_ID", "Treatment_Country",
+                           "Diagnostic_Code"])
+    claims_a = df[["Member_ID", "Claim_ID", "Treatment_from_date", "Treatment_to_date", "Treatment_Country",
+                   "Diagnostic_Code"]]
+    merged = pd.merge(claims_a, claims_a.copy(), on="Member_ID", suffixes=["_A", "_B"])
+    anomalies = merged[
+        (merged["Claim_ID_A"] < merged["Claim_ID_B"]) &
+        (merged["Treatment_Country_A"] != merged["Treatment_Country_B"]) &
+        (merged["Diagnostic_Code_A"] != merged["Diagnostic_Code_B"]) &
+        (merged["Treatment_from_date_A"] <= merged["Treatment_to_date_B"]) &
+        (merged["Treatment_to_date_A"] >= merged["Treatment_from_date_B"])
+    ]
+    return pd.concat([anomalies["Claim_ID_A"], anomalies["Claim_ID_B"]]).drop_duplicates().tolist()
+
+
+CROSS_COUNTRY_CASES = {
+    # Spans touching on their last and first day overlap; the next day's claim does not
+    "touching": [
+        ("C1", "M1", "P1", "01/01/2025", "01/05/2025", "US", "A01"),
+        ("C2", "M1", "P1", "01/05/2025", "01/07/2025", "ES", "B02"),
+        ("C3", "M1", "P1", "01/08/2025", "01/08/2025", "IN", "C03"),
+    ],
+    # A missing end is the start day, so two single-day claims on one day overlap
+    "same_day": [
+        ("C1", "M1", "P1", "02/01/2025", None, "US", "A01"),
+        ("C2", "M1", "P2", "02/01/2025", "02/01/2025", "IN", "B02"),
+        ("C3", "M2", "P1", "02/01/2025", "02/01/2025", "ES", "C03"),
+    ],
+    # Same country, same diagnosis or another member: no anomaly
+    "not_different": [
+        ("C1", "M1", "P1", "03/01/2025", "03/04/2025", "US", "A01"),
+        ("C2", "M1", "P1", "03/02/2025", "03/03/2025", "US", "B02"),
+        ("C3", "M2", "P1", "03/01/2025", "03/04/2025", "US", "A01"),
+        ("C4", "M2", "P1", "03/02/2025", "03/03/2025", "ES", "A01"),
+        ("C5", "M3", "P1", "03/02/2025", "03/03/2025", "IN", "C03"),
+    ],
+    # A span ending before it starts only overlaps what the pairwise comparison says it does
+    "reversed": [
+        ("C1", "M1", "P1", "04/10/2025", "04/05/2025", "US", "A01"),
+        ("C2", "M1", "P1", "04/06/2025", "04/08/2025", "ES", "B02"),
+        ("C3", "M1", "P1", "04/10/2025", "04/12/2025", "IN", "C03"),
+        ("C4", "M1", "P1", "04/01/2025", "04/30/2025", "IN", "D04"),
+    ],
+    # Lines of one claim are never paired with each other
+    "claim_lines": [
+        ("C1", "M1", "P1", "05/01/2025", "05/02/2025", "US", "A01"),
+        ("C1", "M1", "P1", "05/01/2025", "05/02/2025", "ES", "B02"),
+        ("C2", "M1", "P1", "05/02/2025", "05/02/2025", "IN", "C03"),
+    ],
+}
+
+
+@pytest.mark.parametrize("case", CROSS_COUNTRY_CASES)
+def test_cross_country_sweep_flags_what_the_self_join_flags(case):
+    dataset = claims(CROSS_COUNTRY_CASES[case])
+    assert SCENARIOS[3].run(dataset).claim_ids == pairwise_cross_country(dataset)
+
+
+def test_cross_country_sweep_on_a_random_extract():
+    dataset = random_claims()
+    expected = pairwise_cross_country(dataset)
+    assert expected
+    assert SCENARIOS[3].run(dataset).claim_ids == expected
+
+
+def test_overlapping_pairs_are_every_intersecting_pair_once():
+    rng = np.random.default_rng(3)
+    groups = rng.integers(-1, 6, 200)
+    starts = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 20, 200), unit="D")
+    ends = starts + pd.to_timedelta(rng.integers(-2, 4, 200), unit="D")
+    ends = pd.Series(ends).mask(rng.random(200) < 0.05)
+    lo, hi = np.minimum(starts, ends), np.maximum(starts, ends)
+
+    expected = {(i, j) for i, j in combinations(range(200), 2)
+                if groups[i] == groups[j] >= 0 and pd.notna(ends[i]) and pd.notna(ends[j])
+                and lo[i] <= hi[j] and lo[j] <= hi[i]}
+    # Small batches split the pairs across several yields
+    found = [tuple(sorted(pair)) for left, right in iter_overlapping_pairs(groups, starts, ends, batch_size=7)
+             for pair in zip(left.tolist(), right.tolist())]
+    assert len(found) == len(set(found))
+    assert set(found) == expected
+
+
+# ==================== SCENARIO 8 ====================
+def per_day_providers(dataset: ClaimsDataset) -> list:
+    """Claim_IDs Scenario 8 flagged by expanding each span into days and grouping by member and day."""
+    data = dataset.frame(SCENARIOS[8].required_columns).dropna(subset=["Treatment_from_date", "Treatment_to_date"])
+    data["Individual_Date"] = data.apply(
+        lambda row: pd.date_range(row["Treatment_from_date"], row["Treatment_to_date"]), axis=1)
+    data = data.explode("Individual_Date")
+    flagged = data.groupby(["Member_ID", "Individual_Date"], observed=True).filter(
+        lambda day: day["Provider_ID"].nunique() > 2)
+    return flagged["Claim_ID"].drop_duplicates().tolist()
+
+
+MULTI_PROVIDER_CASES = {
+    # Three providers meet on the day the spans touch
+    "touching": [
+        ("C1", "M1", "P1", "01/01/2025", "01/03/2025", "US", "A01"),
+        ("C2", "M1", "P2", "01/03/2025", "01/04/2025", "US", "A01"),
+        ("C3", "M1", "P3", "01/03/2025", "01/03/2025", "US", "A01"),
+        ("C4", "M1", "P4", "01/04/2025", "01/06/2025", "US", "A01"),
+    ],
+    # Providers one day apart never meet
+    "adjacent_days": [
+        ("C1", "M1", "P1", "02/01/2025", "02/02/2025", "US", "A01"),
+        ("C2", "M1", "P2", "02/02/2025", "02/03/2025", "US", "A01"),
+        ("C3", "M1", "P3", "02/04/2025", "02/04/2025", "US", "A01"),
+    ],
+    # A provider on several claims of the day counts once
+    "repeated_provider": [
+        ("C1", "M1", "P1", "03/01/2025", "03/01/2025", "US", "A01"),
+        ("C2", "M1", "P1", "03/01/2025", "03/02/2025", "US", "A01"),
+        ("C3", "M1", "P1", "03/01/2025", "03/01/2025", "US", "A01"),
+        ("C4", "M1", "P2", "03/01/2025", "03/01/2025", "US", "A01"),
+    ],
+    # Back-to-back spans of one provider, a second and a third on the same day
+    "repeated_provider_busy": [
+        ("C1", "M1", "P1", "04/01/2025", "04/01/2025", "US", "A01"),
+        ("C2", "M1", "P1", "04/02/2025", "04/02/2025", "US", "A01"),
+        ("C3", "M1", "P2", "04/01/2025", "04/02/2025", "US", "A01"),
+        ("C4", "M1", "P3", "04/02/2025", "04/02/2025", "US", "A01"),
+        ("C5", "M2", "P3", "04/02/2025", "04/02/2025", "US", "A01"),
+    ],
+    # Spans without an end, or ending before they start, cover no day
+    "no_days": [
+        ("C1", "M1", "P1", "05/01/2025", None, "US", "A01"),
+        ("C2", "M1", "P2", "05/03/2025", "05/01/2025", "US", "A01"),
+        ("C3", "M1", "P3", "05/01/2025", "05/02/2025", "US", "A01"),
+        ("C4", "M1", "P4", "05/02/2025", "05/02/2025", "US", "A01"),
+    ],
+}
+
+
+@pytest.mark.parametrize("case", MULTI_PROVIDER_CASES)
+def test_provider_sweep_flags_what_the_per_day_groupby_flags(case):
+    dataset = claims(MULTI_PROVIDER_CASES[case])
+    assert SCENARIOS[8].run(dataset).claim_ids == per_day_providers(dataset)
+
+
+def test_provider_sweep_on_a_random_extract():
+    dataset = random_claims()
+    expected = per_day_providers(dataset)
+    assert expected
+    assert SCENARIOS[8].run(dataset).claim_ids == expected
+
+
+def test_busy_windows_are_the_days_with_enough_distinct_providers():
+    rng = np.random.default_rng(5)
+    members, providers = rng.integers(0, 4, 80), rng.integers(0, 4, 80)
+    starts = rng.integers(0, 15, 80)
+    ends = starts + rng.integers(0, 3, 80)
+
+    visits = members * 4 + providers
+    first, merged_starts, merged_ends = merge_intervals(visits, starts, ends)
+    windows = busy_windows(members[first], merged_starts, merged_ends, min_active=3)
+    busy_days = {(group, day) for group, start, end in zip(*windows) for day in range(start, end + 1)}
+
+    per_day = {}
+    for member, provider, start, end in zip(members, providers, starts, ends):
+        for day in range(start, end + 1):
+            per_day.setdefault((member, day), set()).add(provider)
+    assert busy_days == {key for key, seen in per_day.items() if len(seen) >= 3}
+
+    expected = [any((member, day) in busy_days for day in range(start, end + 1))
+                for member, start, end in zip(members, starts, ends)]
+    assert overlaps_windows(members, starts, ends, windows).tolist() == expected
@@ -0,0 +1,133 @@
+"""
+Checks of the mergeable quantile sketches (quantile_sketch) against exact quantiles, and of
+the historical baseline Scenario 1 builds from them through the dataset store.
+
+Run with `python -m pytest test_quantile_sketch.py` from the Backend folder.
+"""
+import io
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import dataset_store
+from claims_dataset import ClaimsDataset
+from dataset_store import baseline_sketches, load_dataset_by_id, store_upload
+from quantile_sketch import GroupSketch
+from scenario_registry import SCENARIOS
+
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+# Most a sketch's quantile may be off, as a fraction of the values between it and the exact one
+RANK_TOLERANCE = 0.002
+
+
+def rank_error(values: np.ndarray, estimate: float, q: float) -> float:
+    """How far the share of values at or below estimate is from q."""
+    return abs(np.mean(values <= estimate) - q)
+
+
+@pytest.fixture(scope="module")
+def skewed():
+    """A large long-tailed group, compressed by the sketch, and a small one it keeps exactly."""
+    rng = np.random.default_rng(1)
+    large = rng.lognormal(5, 1.2, 20000)
+    small = rng.lognormal(3, 0.5, 40)
+    return pd.DataFrame({"group": ["large"] * len(large) + ["small"] * len(small), "value": np.r_[large, small]})
+
+
+def test_quantiles_of_a_skewed_group_are_close_to_exact(skewed):
+    sketch = GroupSketch.from_values(skewed, ["group"], "value")
+    values = skewed.loc[skewed["group"] == "large", "value"].to_numpy()
+    assert len(sketch.centroids) < 200
+    for q in QUANTILES:
+        estimate = sketch.quantile(q)["large"]
+        assert rank_error(values, estimate, q) <= RANK_TOLERANCE, q
+        assert estimate == pytest.approx(np.quantile(values, q), rel=0.02), q
+
+
+def test_uncompressed_groups_are_exact(skewed):
+    sketch = GroupSketch.from_values(skewed, ["group"], "value")
+    values = skewed.loc[skewed["group"] == "small", "value"].to_numpy()
+    for q in QUANTILES:
+        assert sketch.quantile(q)["small"] == pytest.approx(np.quantile(values, q)), q
+    assert sketch.count()["small"] == len(values)
+    assert sketch.mean()["small"] == pytest.approx(values.mean())
+
+
+def test_merged_batch_sketches_match_a_single_pass(skewed):
+    single = GroupSketch.from_values(skewed, ["group"], "value")
+    batches = [GroupSketch.from_values(skewed.iloc[start::10], ["group"], "value") for start in range(10)]
+    pairwise = batches[0]
+    for batch in batches[1:]:
+        pairwise = pairwise.merge(batch)
+    # As stored and read back by the dataset store
+    serialised = [GroupSketch.from_dict(json.loads(json.dumps(batch.to_dict()))) for batch in batches]
+    large = skewed.loc[skewed["group"] == "large", "value"].to_numpy()
+
+    for merged in (GroupSketch.merge_all(batches), pairwise, GroupSketch.merge_all(serialised)):
+        pd.testing.assert_series_equal(merged.count().sort_index(), single.count().sort_index())
+        pd.testing.assert_series_equal(merged.mean().sort_index(), single.mean().sort_index())
+        for q in QUANTILES:
+            assert rank_error(large, merged.quantile(q)["large"], q) <= RANK_TOLERANCE, q
+            # The small group stays uncompressed through every merge
+            assert merged.quantile(q)["small"] == pytest.approx(single.quantile(q)["small"]), q
+
+
+# ==================== SCENARIO 1 HISTORY ====================
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """An empty store in a temporary folder."""
+    for name in ("CACHE_FOLDER", "UPLOADS_FOLDER", "DATASETS_FOLDER"):
+        monkeypatch.setattr(dataset_store, name, str(tmp_path / name.lower()))
+
+
+def benefit_claims(rows: int = 6000, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Claim_ID": [f"CLM{i:05d}" for i in range(rows)],
+        "Provider_ID": rng.choice(["P1", "P2", "P3", "P4"], rows),
+        "Provider_country_code": rng.choice(["US", "ES"], rows),
+        "Claimed_currency_code": "USD",
+        "Claim_invoice_gross_total_amount": np.minimum(rng.lognormal(5, 1.2, rows), 9999).round(2),
+        "Payee_type": "P",
+        "Incident_count": rng.integers(1, 4, rows),
+        "Benefit_head_code": rng.choice(["4000", "2500", "6500"], rows),
+        "Benefit_head_descr": "benefit",
+        "Paid_amount": 100.0,
+        "Payment_currency_code": "USD",
+    })
+
+
+def prepared(detector):
+    detector.load_and_prepare_data()
+    detector.calculate_incident_amounts()
+    return detector
+
+
+def test_history_baseline_merges_every_stored_upload(store):
+    claims = benefit_claims()
+    halves = [claims.iloc[:len(claims) // 2], claims.iloc[len(claims) // 2:]]
+    dataset_ids = [store_upload(io.BytesIO(half.to_csv(index=False).encode()), "claims.csv")["dataset_id"]
+                   for half in halves]
+    detector_class = SCENARIOS[1].module.BenefitOutlierDetector
+
+    # The first upload's run stores its sketches; the second is scored against both
+    SCENARIOS[1].run(load_dataset_by_id(dataset_ids[0]), {"baseline": "history"})
+    history = prepared(detector_class(load_dataset_by_id(dataset_ids[1]), "history")).history_sketches()
+    assert len(baseline_sketches("scenario-1")) == 2
+
+    everything = prepared(detector_class(ClaimsDataset.from_frame(claims))).df
+    per_benefit = everything.groupby("Benefit_head_code", observed=True)["gross_per_incident"]
+    for code, values in per_benefit:
+        for q in (0.25, 0.75):
+            assert rank_error(values.to_numpy(), history["benefit"].quantile(q)[code], q) <= RANK_TOLERANCE, (code, q)
+    for level in ("provider", "country"):
+        keys = history[level].keys
+        exact = everything.groupby(keys, observed=True)["gross_per_incident"]
+        assert history[level].count().to_dict() == exact.count().astype(float).to_dict(), level
+        assert history[level].mean().to_dict() == pytest.approx(exact.mean().to_dict()), level
@@ -0,0 +1,223 @@
+"""
+Checks of the declarative rules (rule_plan, rules.json) against frozen baseline outputs.
+
+A scenario with a rule has no other implementation. rule_plan_golden.json holds the Claim_IDs
+its hand-written Scenario-N.py analyzer flagged on a small synthetic claims extract before the
+rule replaced it; the rule must flag exactly those claims, whether it is evaluated alone, with
+all the others as one shared plan, from its stored group statistic, or as new claims scored
+against the rest of the extract.
+
+Run with `python -m pytest test_rule_plan.py` from the Backend folder.
+"""
+import os
+import sys
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from claims_dataset import ClaimsDataset
+from rule_plan import GroupState, Rule, RulePlan
+from scenario_registry import SCENARIOS, plan_rules
+
+RULE_SCENARIOS = [scenario_id for scenario_id, scenario in SCENARIOS.items() if scenario.rule]
+
+# Parameters each rule is also checked under, so that thresholds which rarely pass on the
+# default parameters flag something
+OTHER_PARAMS = {
+    7: {"max_countries": 1},
+    9: {"min_currencies": 2},
+    14: {"max_diagnoses": 1},
+    19: {"max_screenings": 0},
+}
+
+HISTORY_ROWS = 300
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rule_plan_golden.json")
+
+
+def claims_frame(rows: int = 400, seed: int = 7) -> pd.DataFrame:
+    """
+    A claims extract, as uploaded, whose small pools of members, days and codes make every
+    rule flag some claims: shared invoices, same-day services, listed providers and codes,
+    with missing values, padding and case variants mixed in.
+    """
+    rng = np.random.default_rng(seed)
+
+    def pick(values, missing: float = 0.0):
+        picked = pd.Series(rng.choice(np.array(values, dtype=object), rows), dtype=object)
+        return picked.mask(rng.random(rows) < missing)
+
+    start = pd.Series(pd.Timestamp("2024-12-20") + pd.to_timedelta(rng.integers(0, 20, rows), unit="D"))
+    end = (start + pd.to_timedelta(rng.integers(0, 6, rows), unit="D")).dt.strftime("%m/%d/%Y")
+    invoice = (start + pd.to_timedelta(rng.integers(-3, 8, rows), unit="D")).dt.strftime("%m/%d/%Y")
+    claim_ids = [f"CLM{i:05d}" for i in range(rows)]
+    # Some claims have several lines
+    for position in rng.choice(np.arange(1, rows), rows // 20, replace=False):
+        claim_ids[position] = claim_ids[position - 1]
+
+    frame = pd.DataFrame({
+        "Claim_ID": claim_ids,
+        "Member_ID": pick([f"MBR{i:03d}" for i in range(25)]),
+        "Provider_ID": pick(["112038", "841666", "126225", "571029", "300100", "300200", "300300", "300400"]),
+        "Provider type": pick(["local", "global", "Global", "regional"]),
+        "Treatment_Country": pick(["US", "ES", "AT", "IN", "FR"]),
+        "Claimed_currency_code": pick(["USD", "EUR", "GBP", "INR"], missing=0.1),
+        "Payment_currency_code": pick(["USD", "EUR"]),
+        "Payee_type": pick(["R", "P"], missing=0.05),
+        "Gender": pick(["M", "F"]),
+        "Age": pd.Series(rng.integers(0, 80, rows), dtype=float).mask(rng.random(rows) < 0.05),
+        "Treatment from date": start.dt.strftime("%m/%d/%Y"),
+        "Treatment_to_date": end.mask(rng.random(rows) < 0.1),
+        "Claim_invoice_date": invoice.mask(rng.random(rows) < 0.05),
+        "Paid_amount": pd.Series(rng.choice([0.0, 120.5, 980.0, 2400.0], rows)).mask(rng.random(rows) < 0.05),
+        "specialisation_code": pick(["3", "4", "6"]),
+        "Provider_type_code": pick(["HO", "NE", "GP", " GP", "HO ", "CL"], missing=0.05),
+        "Benefit_head_code": pick(["4000", "2500", "2560", "2570", "6500", "3660", "3611", "1000"]),
+        "diagnosis_code": pick(["P05.1", "765", "N18.3", "346", "G43.9", "D05.1", "d05.1", "404.01", ""],
+                               missing=0.05),
+        "Procedure_code": pick(["19081", "2200", "90935", "77067", "30301", "12345"]),
+        "Invoice_No_Reference": pick([f"INV{i:02d}" for i in range(40)] + [""], missing=0.05),
+    })
+    # Some scans are repeated for the same member, day and diagnosis
+    repeated = ["Member_ID", "Treatment from date", "Treatment_to_date", "diagnosis_code", "Benefit_head_code"]
+    for position in rng.choice(np.arange(1, rows), rows // 40, replace=False):
+        frame.loc[position, repeated] = frame.loc[position - 1, repeated].tolist()
+        frame.loc[[position - 1, position], "Benefit_head_code"] = "2560"
+    return frame
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return claims_frame()
+
+
+@pytest.fixture(scope="module")
+def dataset(raw):
+    return ClaimsDataset.from_frame(raw)
+
+
+@pytest.fixture(scope="module")
+def golden():
+    with open(GOLDEN_FILE) as f:
+        return {int(scenario_id): outputs for scenario_id, outputs in json.load(f).items()}
+
+
+def baseline_claim_ids(golden, scenario_id, params=None):
+    """Claim_IDs the scenario's hand-written analyzer flagged on the fixture, under its default or OTHER_PARAMS."""
+    return golden[scenario_id]["default" if params is None else "other"]
+
+
+def parameter_sets(scenario_id):
+    return [None, OTHER_PARAMS[scenario_id]] if scenario_id in OTHER_PARAMS else [None]
+
+
+@pytest.mark.parametrize("scenario_id", RULE_SCENARIOS)
+def test_rule_flags_what_its_analyzer_flagged(scenario_id, dataset, golden):
+    flagged = 0
+    for params in parameter_sets(scenario_id):
+        expected = baseline_claim_ids(golden, scenario_id, params)
+        assert SCENARIOS[scenario_id].run(dataset, params).claim_ids == expected
+        flagged += len(expected)
+    # The fixture is only a check of the rule if the rule flags something on it
+    assert flagged > 0
+
+
+@pytest.mark.parametrize("params", [None, OTHER_PARAMS])
+def test_shared_plan_flags_what_each_analyzer_flagged(params, dataset, golden):
+    flags, errors = plan_rules(RULE_SCENARIOS, params).evaluate(dataset)
+    assert errors == {}
+    claim_ids = dataset.df["Claim_ID"]
+    for scenario_id in RULE_SCENARIOS:
+        scenario_params = (params or {}).get(scenario_id)
+        result = SCENARIOS[scenario_id].rule_result(claim_ids[flags[scenario_id]])
+        assert result.claim_ids == baseline_claim_ids(golden, scenario_id, scenario_params), scenario_id
+
+
+@pytest.mark.parametrize("scenario_id", [s for s in RULE_SCENARIOS if SCENARIOS[s].rescorable])
+def test_rescore_from_group_statistic_equals_run(scenario_id, dataset):
+    scenario = SCENARIOS[scenario_id]
+    stats = scenario.group_stats(dataset)
+    threshold = next(iter(OTHER_PARAMS[scenario_id]))
+    for value in range(0, 5):
+        params = {threshold: value}
+        assert scenario.rescore(stats, params).claim_ids == scenario.run(dataset, params).claim_ids, params
+
+
+def test_thresholds_given_as_text_run_and_cache_as_numbers(dataset):
+    scenario = SCENARIOS[7]
+    assert scenario.cache_params({"max_countries": "1"}) == scenario.cache_params({"max_countries": 1})
+    assert scenario.run(dataset, {"max_countries": "1"}).claim_ids == scenario.run(dataset, {"max_countries": 1}).claim_ids
+    for invalid in ("one", "1.5"):
+        with pytest.raises(ValueError):
+            scenario.effective_params({"max_countries": invalid})
+
+
+def test_score_against_history_equals_evaluate_on_all_claims(raw, dataset):
+    plan = plan_rules(RULE_SCENARIOS, OTHER_PARAMS)
+    history = ClaimsDataset.from_frame(raw.iloc[:HISTORY_ROWS].reset_index(drop=True))
+    new_claims = ClaimsDataset.from_frame(raw.iloc[HISTORY_ROWS:].reset_index(drop=True))
+
+    states = {name: GroupState.build(step, history) for name, step in plan.statistics().items()}
+    scored, errors = plan.score(new_claims, states)
+    assert errors == {}
+    flags, _ = plan.evaluate(dataset)
+    for scenario_id in RULE_SCENARIOS:
+        assert np.array_equal(scored[scenario_id], flags[scenario_id][HISTORY_ROWS:]), scenario_id
+
+
+def test_score_with_stored_state_equals_built_state(raw):
+    plan = plan_rules(RULE_SCENARIOS)
+    history = ClaimsDataset.from_frame(raw.iloc[:HISTORY_ROWS].reset_index(drop=True))
+    new_claims = ClaimsDataset.from_frame(raw.iloc[HISTORY_ROWS:].reset_index(drop=True))
+
+    built = {name: GroupState.build(step, history) for name, step in plan.statistics().items()}
+    # The state is stored as its frame and read back into a new GroupState
+    stored = {name: GroupState(state.step, state.frame.copy()) for name, state in built.items()}
+    for scenario_id, flags in plan.score(new_claims, built)[0].items():
+        assert np.array_equal(flags, plan.score(new_claims, stored)[0][scenario_id]), scenario_id
+
+
+# ==================== PLANNING ====================
+PAID = {"column": "Paid_amount", ">": 0}
+
+
+def test_explain_counts_a_shared_filter_once():
+    rules = {
+        "paid": Rule("paid", {"where": PAID}),
+        "paid_members": Rule("paid_members", {"where": PAID, "group_by": ["Member_ID"],
+                                              "aggregate": {"count": True}, "having": {">": 1}}),
+    }
+    alone = sum(RulePlan({name: rule}).explain()["steps"] for name, rule in rules.items())
+    shared = RulePlan(rules).explain()
+    assert shared["steps_without_sharing"] == alone
+    assert shared["steps"] == alone - 1
+    assert [entry["rules"] for entry in shared["shared"]] == [2]
+
+
+def test_explain_shares_conjunctions_in_any_order():
+    first = {"all": [PAID, {"notna": "Member_ID"}]}
+    second = {"all": [{"notna": "Member_ID"}, PAID]}
+    plan = RulePlan({"first": Rule("first", {"where": first}), "second": Rule("second", {"where": second})})
+    explained = plan.explain()
+    assert explained["steps"] < explained["steps_without_sharing"]
+
+
+def test_partition_keeps_rules_with_a_shared_group_index_together():
+    per_member_day = {"group_by": ["Member_ID", "Treatment_day"], "aggregate": {"count": True}}
+    rules = {
+        "busy_days": Rule("busy_days", {**per_member_day, "having": {">": 3}}),
+        "paid": Rule("paid", {"where": PAID}),
+        "paid_busy_days": Rule("paid_busy_days", {**per_member_day, "where": PAID, "having": {">": 1}}),
+    }
+    # A shared cheap filter does not tie "paid" to the grouped rules
+    assert RulePlan(rules).partition() == [["busy_days", "paid_busy_days"], ["paid"]]
+
+
+def test_partition_of_the_declared_rules_covers_each_once():
+    groups = plan_rules(RULE_SCENARIOS).partition()
+    assert sorted(scenario_id for group in groups for scenario_id in group) == sorted(RULE_SCENARIOS)
+    assert len(groups) > 1
@@ -11,6 +11,7 @@ import Papa from 'papaparse';
 // Import API configuration
 import API_CONFIG from '../config/api';
 import AnalysisLoadingPage from './AnalysisLoadingPage';
+import { useStore } from '../store/useStore';
 
 interface CompactCSVUploadProps {
   onDataUploaded: (data: any[], anomalies: any[], scenarioResults?: any, summary?: any) => void;
@@ -38,6 +39,7 @@ interface ValidationMethods {
 }
 
 const CompactCSVUpload: React.FC<CompactCSVUploadProps> = ({ onDataUploaded, onBack }) => {
+  const setDatasetId = useStore((state) => state.setDatasetId);
   const [uploadStatus, setUploadStatus] = useState<'idle' | 'file-selected' | 'field-review' | 'descriptive-analysis' | 'uploading' | 'processing' | 'analyzing' | 'complete' | 'error'>('idle');
   const [progress, setProgress] = useState(0);
   const [fileName, setFileName] = useState('');
@@ -812,6 +814,31 @@ const CompactCSVUpload: React.FC<CompactCSVUploadProps> = ({ onDataUploaded, onB
     setProgress(10);
     setErrorMessage('');
 
+    // The analysis runs as a job on the backend; poll its status until every scenario has finished
+    const waitForAnalysis = (jobId: string): Promise<any> => new Promise((resolve, reject) => {
+      const poll = () => {
+        fetch(`${API_BASE_URL}${API_CONFIG.ENDPOINTS.STATUS}/${jobId}`)
+          .then(response => {
+            if (!response.ok) {
+              throw new Error(`HTTP error! Status: ${response.status}`);
+            }
+            return response.json();
+          })
+          .then(status => {
+            if (status.status === 'completed') {
+              resolve(status.results);
+            } else if (status.status === 'error') {
+              reject(new Error(status.error || 'Analysis failed'));
+            } else {
+              setProgress(60 + Math.round((status.progress || 0) * 0.35));
+              setTimeout(poll, API_CONFIG.POLL_INTERVAL);
+            }
+          })
+          .catch(reject);
+      };
+      poll();
+    });
+
     // Create a FormData object to send the file
     const formData = new FormData();
     formData.append('file', selectedFile);
@@ -835,8 +862,9 @@ const CompactCSVUpload: React.FC<CompactCSVUploadProps> = ({ onDataUploaded, onB
       .then(data => {
         setUploadStatus('processing');
         
-        // Get the uploaded file path from the response
-        const filePath = data.file_path;
+        // Every upload gets its own dataset ID; later requests refer to the upload by it
+        const datasetId = data.dataset_id;
+        setDatasetId(datasetId);
         
         // Now analyze the uploaded file with selected scenarios
         const scenarios = [];
@@ -854,8 +882,9 @@ const CompactCSVUpload: React.FC<CompactCSVUploadProps> = ({ onDataUploaded, onB
             'Content-Type': 'application/json',
           },
           body: JSON.stringify({
-            file_path: filePath,
-            scenarios: scenarios
+            dataset_id: datasetId,
+            scenarios: scenarios,
+            async: true
           }),
         });
       })
@@ -863,9 +892,9 @@ const CompactCSVUpload: React.FC<CompactCSVUploadProps> = ({ onDataUploaded, onB
         if (!response.ok) {
           throw new Error(`HTTP error! Status: ${response.status}`);
         }
-        setProgress(75);
         return response.json();
       })
+      .then(job => waitForAnalysis(job.job_id))
       .then(data => {
         console.log('Analysis results received:', data);
         
@@ -916,7 +945,7 @@ const CompactCSVUpload: React.FC<CompactCSVUploadProps> = ({ onDataUploaded, onB
         setErrorMessage(`API Error: ${error.message}`);
         setUploadStatus('error');
       });
-  }, [selectedFile, validationMethods, detectMLAnomalies, onDataUploaded]);
+  }, [selectedFile, validationMethods, detectMLAnomalies, onDataUploaded, setDatasetId]);
 
   const resetUpload = () => {
     setUploadStatus('idle');
@@ -74,13 +74,17 @@ const CustomTooltip = ({ active, payload, label, totalAnomalies }: any) => {
 };
 
 const MLAnalysis = () => {
-  const { mlAnalysisResults, setMlAnalysisResults } = useStore();
+  const { datasetId, mlAnalysisResults, setMlAnalysisResults } = useStore();
   const [jobId, setJobId] = useState<string | null>(null);
   const [status, setStatus] = useState<JobStatus | null>(mlAnalysisResults);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
   const startAnalysis = async () => {
+    if (!datasetId) {
+      setError('Please upload a claims file first.');
+      return;
+    }
     setIsLoading(true);
     setError(null);
     setStatus(null);
@@ -92,7 +96,7 @@ const MLAnalysis = () => {
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ file_path: 'temp_upload.csv' }), // Assuming the file is already uploaded
+        body: JSON.stringify({ dataset_id: datasetId }), // Dataset of the most recent upload
       });
       if (!response.ok) {
         const errorData = await response.json();
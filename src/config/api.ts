@@ -10,11 +10,16 @@ const API_CONFIG = {
     HEALTH: '/health',
     UPLOAD: '/upload',
     ANALYZE: '/analyze',
+    STATUS: '/status',
     SCENARIOS: '/scenarios'
   },
 
   // Request timeout in milliseconds
-  TIMEOUT: 30000
+  TIMEOUT: 30000,
+
+  // How often a running analysis job is polled, in milliseconds (analyses run as jobs, so
+  // they are not bound by TIMEOUT)
+  POLL_INTERVAL: 1000
 };
 
 export default API_CONFIG;
\ No newline at end of file
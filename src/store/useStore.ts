@@ -1,11 +1,15 @@
 import { create } from 'zustand';
 
 interface StoreState {
+  datasetId: string | null;
+  setDatasetId: (datasetId: string | null) => void;
   mlAnalysisResults: any | null;
   setMlAnalysisResults: (results: any) => void;
 }
 
 export const useStore = create<StoreState>((set) => ({
+  datasetId: null,
+  setDatasetId: (datasetId) => set({ datasetId }),
   mlAnalysisResults: null,
   setMlAnalysisResults: (results) => set({ mlAnalysisResults: results }),
 }));
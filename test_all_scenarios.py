@@ -103,6 +103,7 @@ try:
     with open(test_file, 'rb') as f:
         files = {'file': f}
         response = requests.post(f'{API_BASE}/upload', files=files)
+        dataset_id = response.json().get('dataset_id')
     
     if response.status_code == 200:
         upload_result = response.json()
@@ -115,7 +116,7 @@ try:
     print("\n3. Testing analyze endpoint with ALL scenarios (1-14)...")
     analyze_data = {
         'scenarios': list(range(1, 15)),  # All scenarios 1-14
-        'file_path': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Backend', 'temp_upload.csv')
+        'dataset_id': dataset_id
     }
     response = requests.post(f'{API_BASE}/analyze', json=analyze_data)
     
@@ -159,7 +160,7 @@ try:
         success_count = 0
         for scenario_id in range(1, 15):
             try:
-                response = requests.get(f'{API_BASE}/scenario/{scenario_id}')
+                response = requests.get(f'{API_BASE}/scenario/{scenario_id}', params={'dataset_id': dataset_id})
                 if response.status_code == 200:
                     scenario_result = response.json()
                     result_count = len(scenario_result.get('results', []))
@@ -66,6 +66,7 @@ try:
     with open(test_file, 'rb') as f:
         files = {'file': f}
         response = requests.post(f'{API_BASE}/upload', files=files)
+        dataset_id = response.json().get('dataset_id')
     
     if response.status_code == 200:
         upload_result = response.json()
@@ -78,7 +79,7 @@ try:
     print("\n3. Testing problematic scenarios (15-22)...")
     analyze_data = {
         'scenarios': [15, 16, 17, 19, 20, 21, 22],  # Focus on new scenarios
-        'file_path': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Backend', 'temp_upload.csv')
+        'dataset_id': dataset_id
     }
     response = requests.post(f'{API_BASE}/analyze', json=analyze_data)
     
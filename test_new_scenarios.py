@@ -52,13 +52,14 @@ try:
     with open(test_file, 'rb') as f:
         files = {'file': f}
         response = requests.post(f'{API_BASE}/upload', files=files)
+        dataset_id = response.json().get('dataset_id')
     print(f"Upload: {response.status_code} - {response.json()}")
     
     # Test analyze endpoint with all scenarios
     print("\nTesting analyze endpoint with all scenarios (1-9)...")
     analyze_data = {
         'scenarios': [1, 2, 3, 4, 5, 6, 7, 8, 9],
-        'file_path': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Backend', 'temp_upload.csv')
+        'dataset_id': dataset_id
     }
     response = requests.post(f'{API_BASE}/analyze', json=analyze_data)
     print(f"Analysis: {response.status_code}")
@@ -86,7 +87,7 @@ try:
         print(f"\nTesting individual scenario endpoints...")
         for scenario_id in range(5, 10):  # Test new scenarios 5-9
             try:
-                response = requests.get(f'{API_BASE}/scenario/{scenario_id}')
+                response = requests.get(f'{API_BASE}/scenario/{scenario_id}', params={'dataset_id': dataset_id})
                 if response.status_code == 200:
                     scenario_result = response.json()
                     print(f"  Scenario {scenario_id}: {scenario_result['name']} - {len(scenario_result.get('results', []))} detailed results")
@@ -38,13 +38,14 @@ try:
     with open(test_file, 'rb') as f:
         files = {'file': f}
         response = requests.post(f'{API_BASE}/upload', files=files)
+        dataset_id = response.json().get('dataset_id')
     print(f"Upload: {response.status_code} - {response.json()}")
     
     # Test analyze endpoint
     print("\nTesting analyze endpoint...")
     analyze_data = {
         'scenarios': [1, 2, 3, 4],
-        'file_path': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Backend', 'temp_upload.csv')
+        'dataset_id': dataset_id
     }
     response = requests.post(f'{API_BASE}/analyze', json=analyze_data)
     print(f"Analysis: {response.status_code}")